@@ -1,13 +1,17 @@
+from collections import OrderedDict
 from datetime import datetime, date, timedelta
 import os
 import json
+import threading
 from flask import Blueprint, Response, jsonify, render_template, current_app, send_from_directory, send_file, request
 import pytz
 import logging
 
 from ..model.hash_manager import HashManager, HASH_KEY
-from ..model.schedule import TimedSchedule
+from ..model.schedule import ScheduleRender
 from ..model.configuration_manager import ConfigurationManager
+from ..task.tracing import TRACER
+from ..task.profiler import DEFAULT_INTERVAL
 
 logger = logging.getLogger(__name__)
 api_bp = Blueprint('api', __name__, url_prefix='/api')
@@ -185,6 +189,11 @@ def get_locales():
 	]
 	return jsonify(locales)
 
+# render_schedules() results by (storage, file revisions, range, tz); a calendar view re-requests the same few ranges
+RENDER_CACHE_SIZE:int = 16
+_render_cache:OrderedDict[tuple, ScheduleRender] = OrderedDict()
+_render_lock = threading.Lock()
+
 @api_bp.route('/schedule/render', methods=['GET'])
 def render_schedule():
 	"""
@@ -201,44 +210,90 @@ def render_schedule():
 	system = stm.load_settings("system")
 	tz = pytz.timezone(system.get("timezoneName", "US/Eastern"))
 	sm = cm.schedule_manager()
-	schedule_info = sm.load(hm)
-	sm.validate(schedule_info)
-	master_schedule = schedule_info.get("master", None)
-	if master_schedule is None:
-		return jsonify({"success": False, "error": "Master Schedule not found"}), 404
-	schedules = schedule_info.get("schedules", [])
-	if schedules is []:
-		return jsonify({"success": False, "error": "Schedule List not found"}), 404
-
 	start_ts = datetime.now(tz) if start_at is None else datetime.fromisoformat(start_at)
 	start_ts = start_ts.replace(hour=0, minute=0, second=0, microsecond=0)
 	end_ts = start_ts + timedelta(days=days)
-	schedule_ts = start_ts
-	schedule_map = {}
-	render_list = []
-	while schedule_ts < end_ts:
-		for schedule in schedules:
-			info = schedule.get("info", None)
-			if info is not None and isinstance(info, TimedSchedule):
-				info.set_date_controller(lambda: schedule_ts)
-		current = master_schedule.evaluate(schedule_ts)
-		if current:
-			schedule = next((sx for sx in schedules if sx.get("name", None) and sx["name"] == current.schedule), None)
-			if schedule and "info" in schedule and isinstance(schedule["info"], TimedSchedule):
-				target:TimedSchedule = schedule["info"]
-				render = [{ "schedule": target.id, "id":xx.id, "start": xx.start.isoformat(), "end": xx.end.isoformat() } for xx in target.items]
-				render_list.extend(render)
-				schedule_map.setdefault(target.id, target.to_dict())
-		else:
-			return jsonify({ "schedule_ts": schedule_ts.isoformat(), "success": False, "error": "Master Schedule evaluate failed"}), 404
-		schedule_ts = schedule_ts + timedelta(days=1)
-		pass
+	key = (sm.ROOT_PATH, sm.revision(), start_ts.isoformat(), days, tz.zone)
+	with _render_lock:
+		result = _render_cache.get(key, None)
+		if result is not None:
+			_render_cache.move_to_end(key)
+	if result is None:
+		try:
+			snapshot = sm.snapshot(hm)
+		except ValueError as e:
+			# a schedule file is being written or does not load/validate
+			return jsonify({ "success": False, "error": str(e) }), 409
+		result = snapshot.render(start_ts, days)
+		with _render_lock:
+			_render_cache[key] = result
+			while len(_render_cache) > RENDER_CACHE_SIZE:
+				_render_cache.popitem(last=False)
+	if result.unmatched is not None:
+		return jsonify({ "schedule_ts": result.unmatched.isoformat(), "success": False, "error": "Master Schedule evaluate failed"}), 404
 	retv = {
 		"success": True,
 		"start_ts": start_ts.isoformat(),
 		"end_ts": end_ts.isoformat(),
 		"days": days,
-		"schedules": schedule_map,
-		"render": render_list
+		"schedules": result.schedules,
+		"render": result.render
 	}
 	return jsonify(retv)
+
+@api_bp.route('/traces', methods=['GET'])
+def list_traces():
+	"""
+	QSP   format  default  description
+	limit int     50       number of most recent traces
+	"""
+	limit = request.args.get("limit", 50, type=int)
+	return jsonify({ "success": True, "traces": TRACER.snapshot(limit) })
+
+@api_bp.route('/telemetry', methods=['GET'])
+def telemetry_snapshot():
+	"""
+	QSP    format  default  description
+	events int     50       number of most recent telemetry messages
+	"""
+	aggregator = current_app.config.get('TELEMETRY_AGGREGATOR', None)
+	if aggregator is None:
+		return jsonify({"success": False, "error": "Telemetry is not available"}), 404
+	events = request.args.get("events", 50, type=int)
+	return jsonify({ "success": True, "telemetry": aggregator.snapshot(events) })
+
+def get_profiler():
+	return current_app.config.get('PROFILER', None)
+
+@api_bp.route('/profiler', methods=['GET'])
+def profiler_status():
+	profiler = get_profiler()
+	if profiler is None:
+		return jsonify({"success": False, "error": "Profiler is not available"}), 404
+	return jsonify({ "success": True, "profiler": profiler.status() })
+
+@api_bp.route('/profiler/start', methods=['POST'])
+def profiler_start():
+	"""
+	QSP      format  default  description
+	interval int     50       sampling interval in ms
+	"""
+	profiler = get_profiler()
+	if profiler is None:
+		return jsonify({"success": False, "error": "Profiler is not available"}), 404
+	interval = request.args.get("interval", round(DEFAULT_INTERVAL * 1000), type=int)
+	if interval < 1:
+		return jsonify({"success": False, "error": "interval must be at least 1ms"}), 400
+	if not profiler.start(interval / 1000):
+		return jsonify({"success": False, "error": "Profiler is already running"}), 409
+	return jsonify({ "success": True, "profiler": profiler.status() })
+
+@api_bp.route('/profiler/stop', methods=['POST'])
+def profiler_stop():
+	profiler = get_profiler()
+	if profiler is None:
+		return jsonify({"success": False, "error": "Profiler is not available"}), 404
+	path = profiler.stop()
+	if path is None:
+		return jsonify({"success": False, "error": "Profiler is not running"}), 409
+	return jsonify({ "success": True, "profiler": profiler.status() })
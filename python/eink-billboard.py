@@ -3,13 +3,17 @@
 # run from root folder
 # python -m python.eink-billboard --dev --cors "http://localhost:5173" --host localhost --storage ../.storage
 
-import os, logging.config
+import os, signal, logging.config
 
 from .model.configuration_manager import ConfigurationManager
 
 from .blueprints.root import root_bp
 from .blueprints.api import api_bp
 from .task.telemetry_sink import TelemetrySink
+from .task.telemetry import TelemetryAggregator
+from .task.tracing import TRACER
+from .task.profiler import SamplingProfiler
+from .task.schedule_watcher import ScheduleWatcher
 from .task.application import Application, StartEvent
 from .task.messages import QuitMessage, StartOptions
 from .model.hash_manager import HashManager, HASH_KEY
@@ -40,6 +44,7 @@ parser.add_argument('--host', help='Change listening interface')
 parser.add_argument('--app', help='Path to web app bundle')
 parser.add_argument('--storage', help='Path to storage folder; relative to location of the PY file!')
 parser.add_argument('--cors', help='Activate CORS and set the allowed host URL')
+parser.add_argument('--telemetry-log', help='Append telemetry to this rolling log file')
 args = parser.parse_args()
 
 # development mode
@@ -100,6 +105,8 @@ if __name__ == '__main__':
 #		display_manager.display_image(img)
 #		device_config.update_value("startup", False, write=True)
 
+	profiler = None
+	schedule_watcher = None
 	try:
 		cm = ConfigurationManager(storage_path=STORAGE)
 		hash_manager = HashManager(cm.STORAGE_PATH)
@@ -112,7 +119,9 @@ if __name__ == '__main__':
 		app.register_blueprint(root_bp)
 		app.register_blueprint(api_bp)
 		# start the application layer
-		sink = TelemetrySink()
+		aggregator = TelemetryAggregator(log_path=args.telemetry_log)
+		TRACER.observer = aggregator.observe
+		sink = TelemetrySink(aggregator)
 		xapp = Application(APPNAME, sink)
 		xapp.start()
 		force_reset = not os.path.exists(STORAGE)
@@ -128,6 +137,12 @@ if __name__ == '__main__':
 		app.config['HASH_MANAGER'] = hash_manager
 		app.config['APPLICATION'] = xapp
 		app.config['TELEMETRY'] = sink
+		app.config['TELEMETRY_AGGREGATOR'] = aggregator
+		profiler = SamplingProfiler(os.path.join(cm.STORAGE_PATH, "profiles"))
+		app.config['PROFILER'] = profiler
+		if hasattr(signal, "SIGUSR2"):
+			# kill -USR2 <pid> toggles the profiler
+			profiler.toggle_on_signal(signal.SIGUSR2)
 		app.config['ROOT_PATH'] = cm.ROOT_PATH
 		app.config['STORAGE_PATH'] = cm.STORAGE_PATH
 
@@ -136,6 +151,10 @@ if __name__ == '__main__':
 			logger.warning(f"startup message {msg}")
 			msg = sink.receive()
 
+		if started:
+			# schedule edits reach the running tasks without a restart
+			schedule_watcher = ScheduleWatcher(xapp.router, cm.storage_schedules, hash_manager)
+			schedule_watcher.start()
 		hash_manager.start()
 
 		# Get local IP address for display (only in dev mode when running on non-Pi)
@@ -160,6 +179,10 @@ if __name__ == '__main__':
 			xapp.join(timeout=5)
 			if hash_manager is not None:
 				hash_manager.stop()
+			if profiler is not None:
+				profiler.stop()
+			if schedule_watcher is not None:
+				schedule_watcher.stop()
 		except Exception as ee:
 			logger.error(f"Exception during shutdown: {ee}", exc_info=True)
 		finally:
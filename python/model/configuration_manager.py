@@ -1,3 +1,4 @@
+from concurrent.futures import Executor
 import importlib
 from pathlib import Path
 import os
@@ -380,9 +381,9 @@ class ConfigurationManager:
 		manager.ensure_folders()
 		return manager
 
-	def schedule_manager(self):
-		"""Create a ScheduleManager bound to the schedule storage folder."""
-		manager = ScheduleManager(self.storage_schedules)
+	def schedule_manager(self, executor: Executor = None):
+		"""Create a ScheduleManager bound to the schedule storage folder; executor (optional) parses files concurrently."""
+		manager = ScheduleManager(self.storage_schedules, executor=executor)
 		return manager
 
 	def settings_manager(self):
@@ -441,7 +442,8 @@ class ConfigurationManager:
 			logger.error(f"Failed to import module '{info_module}': {e}")
 			return None
 
-	def create_plugin(self, info) -> Any|None:
+	def resolve_plugin(self, info) -> type|None:
+		"""The plugin class for an enum_plugins() entry; None if disabled or not importable."""
 		info_info = info["info"]
 		info_path = info["path"]
 		info_id = info_info.get("id")
@@ -449,9 +451,13 @@ class ConfigurationManager:
 		if info_info.get("disabled", False):
 			logger.info(f"Plugin '{info_name}' (ID: {info_id}) is disabled; skipping load.")
 			return None
-		plugin_class = self._resolve(info_path, info_info)
+		return self._resolve(info_path, info_info)
+
+	def create_plugin(self, info) -> Any|None:
+		info_info = info["info"]
+		plugin_class = self.resolve_plugin(info)
 		if plugin_class:
-			return plugin_class(info_id, info_name)
+			return plugin_class(info_info.get("id"), info_info.get("name"))
 		return None
 
 	def load_plugins(self, infos):
@@ -1,6 +1,7 @@
 import json
 import hashlib
 import threading
+from typing import Callable
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
@@ -17,21 +18,26 @@ class HashHandler(FileSystemEventHandler):
 	def on_created(self, event):
 		if not event.is_directory:
 			print(f"File created: {event.src_path}")
+			self.hm.notify(event.src_path)
 
 	def on_modified(self, event):
 		if not event.is_directory:
 			print(f"File modified: {event.src_path}")
 			self.hm.evict(event.src_path)
+			self.hm.notify(event.src_path)
 
 	def on_deleted(self, event):
 		if not event.is_directory:
 			print(f"File deleted: {event.src_path}")
 			self.hm.evict(event.src_path)
+			self.hm.notify(event.src_path)
 
 	def on_moved(self, event):
 		if not event.is_directory:
 			print(f"File moved from {event.src_path} to {event.dest_path}")
 			self.hm.evict(event.src_path)
+			self.hm.notify(event.src_path)
+			self.hm.notify(event.dest_path)
 
 HASH_KEY = "_rev"
 class HashManager:
@@ -39,6 +45,8 @@ class HashManager:
 		self.root_path = root_path
 		self.lock = threading.Lock()
 		self.hashdict = {}
+		self.observer = None
+		self.listeners:list[Callable[[str], None]] = []
 	def start(self):
 		self.event_handler = HashHandler(self)
 		self.observer = Observer()
@@ -48,11 +56,28 @@ class HashManager:
 		if self.observer is not None:
 			self.observer.stop()
 			self.observer.join()
+	def add_listener(self, listener: Callable[[str], None]):
+		"""listener(path) is called (on the watchdog thread) for every file created, modified, deleted or moved."""
+		with self.lock:
+			self.listeners = self.listeners + [listener]
+	def remove_listener(self, listener: Callable[[str], None]):
+		with self.lock:
+			self.listeners = [lx for lx in self.listeners if lx is not listener]
+	def notify(self, path:str):
+		for listener in self.listeners:
+			try:
+				listener(path)
+			except Exception as e:
+				print(f"File listener failed for {path}: {e}")
 	def evict(self, path:str):
 		with self.lock:
 			entries_to_remove = [id for id, entry in self.hashdict.items() if entry.path == path]
 			for id in entries_to_remove:
 				del self.hashdict[id]
+	def has_path(self, path:str) -> bool:
+		"""True if a document hashed from path is still tracked (not evicted by a file change)."""
+		with self.lock:
+			return any(entry.path == path for entry in self.hashdict.values())
 	def hash_document(self, id:str, path:str, document:dict):
 		"""
 		Hashes the provided document and stores the hash associated with the given ID.
@@ -1,6 +1,8 @@
 from abc import abstractmethod, ABC
-from typing import Generator, Generic, TypeVar, List
-from datetime import datetime, timedelta
+import bisect
+import heapq
+from typing import Callable, Generator, Generic, NamedTuple, TypeVar, List
+from datetime import date, datetime, timedelta
 
 T = TypeVar('T')
 
@@ -15,12 +17,16 @@ class SchedulableBase(ABC):
 	def start(self) -> datetime:
 		if self.date_controller is None:
 			raise ValueError("Date controller is not set")
-		# start at midnight
-		the_date = self.date_controller().replace(hour=0, minute=0, second=0, microsecond=0)
-		return the_date + timedelta(minutes=self.start_minutes)
+		return self.start_on(self.date_controller())
 	@property
 	def end(self) -> datetime:
 		return self.start + timedelta(minutes=self.duration_minutes)
+	def start_on(self, day: datetime) -> datetime:
+		"""Start of this slot on day's date (no date controller involved)."""
+		# start at midnight
+		return day.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(minutes=self.start_minutes)
+	def end_on(self, day: datetime) -> datetime:
+		return self.start_on(day) + timedelta(minutes=self.duration_minutes)
 	@abstractmethod
 	def to_dict(self):
 		retv = {
@@ -114,13 +120,96 @@ class Playlist:
 	def validate(self):
 		return None
 
+type DayPredicate = Callable[[date], bool]
+
+def compile_trigger(trigger: dict) -> DayPredicate|None:
+	"""
+	Turn a master schedule trigger into a predicate over a calendar day (a date or datetime; only the date is used).
+	None for unknown or incomplete triggers, which never match.
+	"""
+	if trigger is None:
+		return None
+	match trigger.get("type", None):
+		case "dayofweek":
+			days = frozenset(trigger.get("days", []))
+			return lambda day: day.weekday() in days
+		case "dayofmonth":
+			dayofmonth = trigger.get("dayofmonth", None)
+			if dayofmonth is None:
+				return None
+			return lambda day: day.day == dayofmonth
+		case "dayandmonth":
+			dm = trigger.get("day", None)
+			month = trigger.get("month", None)
+			if dm is None or month is None:
+				return None
+			return lambda day: day.day == dm and day.month == month
+		case "dayandmonthrange":
+			day_start = trigger.get("day_start", None)
+			month_start = trigger.get("month_start", None)
+			day_end = trigger.get("day_end", None)
+			month_end = trigger.get("month_end", None)
+			if day_start is None or month_start is None or day_end is None or month_end is None:
+				return None
+			# inclusive of both days, within one calendar year (a range that wraps the year end never matches)
+			first = (month_start, day_start)
+			last = (month_end, day_end)
+			return lambda day: first <= (day.month, day.day) <= last
+		case "daymonthyear":
+			dm = trigger.get("day", None)
+			month = trigger.get("month", None)
+			year = trigger.get("year", None)
+			if dm is None or month is None or year is None:
+				return None
+			return lambda day: day.day == dm and day.month == month and day.year == year
+		case _:
+			return None
+
+# evaluate() results kept per calendar day; far more than a calendar view or a running scheduler needs
+MASTER_MEMO_DAYS:int = 400
+
 class MasterSchedule:
 	def __init__(self, defaultSchedule: str, schedules: List[MasterScheduleItem]):
 		if defaultSchedule is None or schedules is None:
 			raise ValueError("default_schedule and schedules cannot be None")
 		self.defaultSchedule = defaultSchedule
+		self._compiled:list[tuple[MasterScheduleItem, DayPredicate]] = None
+		# the list (and its length) compiled from
+		self._compiled_from:tuple[List[MasterScheduleItem], int] = None
+		self._memo:dict[tuple[int,int,int], MasterScheduleItem|None] = {}
 		self.schedules = schedules
 
+	@property
+	def schedules(self) -> List[MasterScheduleItem]:
+		return self._schedules
+
+	@schedules.setter
+	def schedules(self, schedules: List[MasterScheduleItem]):
+		self._schedules = schedules
+		self.invalidate()
+
+	@property
+	def compiled(self) -> list[tuple[MasterScheduleItem, DayPredicate]]:
+		"""(item, predicate) for enabled items with a known trigger, in priority order (last match wins)."""
+		schedules = self._schedules
+		if self._compiled is None or self._compiled_from[0] is not schedules or self._compiled_from[1] != len(schedules):
+			compiled = []
+			for item in schedules:
+				if item.enabled:
+					predicate = compile_trigger(item.trigger)
+					if predicate is not None:
+						compiled.append((item, predicate))
+			self._compiled = compiled
+			self._compiled_from = (schedules, len(schedules))
+			self._memo = {}
+		return self._compiled
+
+	def invalidate(self):
+		"""Drop the compiled triggers and the per-day memo; call after replacing or editing an item in place."""
+		self._compiled = None
+		self._compiled_from = None
+		self._memo = {}
+
 	def validate(self, schedule_infos: List[dict]):
 		if schedule_infos is None:
 			raise ValueError("schedule_infos cannot be None")
@@ -137,56 +226,152 @@ class MasterSchedule:
 				return f"Schedule '{item.schedule}' referenced by master schedule item '{item.id}' does not exist."
 		return None
 
-	def evaluate(self, now:datetime) -> MasterScheduleItem:
-		matching_schedules = []
-		for item in self.schedules:
-			if item.enabled:
-				match item.trigger.get("type", None):
-					case "dayofweek":
-						days = item.trigger.get("days", [])
-						if now.weekday() in days:
-							matching_schedules.append(item)
-					case "dayofmonth":
-						days = item.trigger.get("dayofmonth", None)
-						if days is not None and now.day == days:
-							matching_schedules.append(item)
-					case "dayandmonth":
-						day = item.trigger.get("day", None)
-						month = item.trigger.get("month", None)
-						if day is not None and month is not None and now.day == day and now.month == month:
-							matching_schedules.append(item)
-					case "dayandmonthrange":
-						day_start = item.trigger.get("day_start", None)
-						month_start = item.trigger.get("month_start", None)
-						day_end = item.trigger.get("day_end", None)
-						month_end = item.trigger.get("month_end", None)
-						if day_start is not None and month_start is not None and day_end is not None and month_end is not None:
-							start_date = datetime(now.year, month_start, day_start, 0, 0, 0)
-							end_date = datetime(now.year, month_end, day_end, 23, 59, 59)
-							if start_date <= now <= end_date:
-								matching_schedules.append(item)
-							pass
-					case "daymonthyear":
-						day = item.trigger.get("day", None)
-						month = item.trigger.get("month", None)
-						year = item.trigger.get("year", None)
-						if day is not None and month is not None and year is not None and now.day == day and now.month == month and now.year == year:
-							matching_schedules.append(item)
-					case _:
-						# Unknown trigger type, ignore
-						pass
-		return matching_schedules[-1] if matching_schedules else None
+	def evaluate(self, now:datetime|date) -> MasterScheduleItem:
+		"""The last enabled item whose trigger matches now's calendar day (memoized per day)."""
+		compiled = self.compiled
+		key = (now.year, now.month, now.day)
+		memo = self._memo
+		if key in memo:
+			return memo[key]
+		retv = None
+		for (item, predicate) in reversed(compiled):
+			if predicate(now):
+				retv = item
+				break
+		if len(memo) >= MASTER_MEMO_DAYS:
+			memo.clear()
+		memo[key] = retv
+		return retv
+
+	def evaluate_range(self, start:datetime|date, days:int) -> list[tuple[date, MasterScheduleItem|None]]:
+		"""evaluate() for each of days consecutive calendar days from start's date."""
+		first = date(start.year, start.month, start.day)
+		retv = []
+		for ix in range(days):
+			day = first + timedelta(days=ix)
+			retv.append((day, self.evaluate(day)))
+		return retv
+
+	def next_change(self, now:datetime) -> datetime:
+		"""Earliest instant after now at which evaluate() can return something different; triggers are per-day."""
+		return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+def minute_of_day(ts: datetime) -> float:
+	"""Minutes since midnight of ts's own date, without building intermediate datetimes."""
+	return ts.hour * 60 + ts.minute + (ts.second + ts.microsecond / 1_000_000) / 60
+
+class ScheduleOverlap(NamedTuple):
+	"""Two items of a TimedSchedule that overlap, by position in items, and the overlapping minute range."""
+	first: SchedulableBase
+	second: SchedulableBase
+	first_index: int
+	second_index: int
+	start_minutes: int
+	end_minutes: int
+	def __str__(self):
+		return f"'{self.first.id}' (#{self.first_index}) overlaps '{self.second.id}' (#{self.second_index}) in minutes [{self.start_minutes}, {self.end_minutes})"
+
+class CompiledSchedule:
+	"""
+	Immutable index over a TimedSchedule's items as integer minute offsets from midnight, sorted by (start, end).
+	Lookups bisect the offset arrays and never touch the items' datetime properties.
+	"""
+	__slots__ = ("items", "starts", "ends", "order", "overlapping", "boundaries")
+	def __init__(self, items: list[SchedulableBase]):
+		order = sorted(range(len(items)), key=lambda ix: (items[ix].start_minutes, items[ix].start_minutes + items[ix].duration_minutes))
+		self.order = order
+		self.items = [items[ix] for ix in order]
+		self.starts = [ix.start_minutes for ix in self.items]
+		self.ends = [ix.start_minutes + ix.duration_minutes for ix in self.items]
+		self.boundaries = sorted(set(self.starts) | set(self.ends))
+		overlapping = False
+		reach = None
+		for start, end in zip(self.starts, self.ends):
+			if reach is not None and start < reach:
+				overlapping = True
+				break
+			reach = end if reach is None else max(reach, end)
+		self.overlapping = overlapping
+
+	def active(self, minute: float) -> SchedulableBase|None:
+		"""The item covering minute offset [start, end); with overlaps, the first one in original order (as TimedSchedule.current)."""
+		count = bisect.bisect_right(self.starts, minute)
+		if not self.overlapping:
+			if count > 0 and minute < self.ends[count - 1]:
+				return self.items[count - 1]
+			return None
+		best = None
+		for pos in range(count):
+			if minute < self.ends[pos] and (best is None or self.order[pos] < self.order[best]):
+				best = pos
+		return self.items[best] if best is not None else None
+
+	def overlapping_with(self, start: int, end: int) -> list[int]:
+		"""Sorted positions of items overlapping [start, end)."""
+		pos = bisect.bisect_left(self.starts, end)
+		if not self.overlapping:
+			# disjoint and sorted, so ends are sorted too
+			lo = bisect.bisect_right(self.ends, start, 0, pos)
+			return list(range(lo, pos))
+		return [px for px in range(pos) if start < self.ends[px]]
+
+	def overlaps(self) -> list[ScheduleOverlap]:
+		"""All overlapping pairs, by sweeping the sorted intervals: O(n log n + number of overlaps)."""
+		retv = []
+		if not self.overlapping:
+			return retv
+		active:list[tuple[int,int]] = []
+		for pos, (start, end) in enumerate(zip(self.starts, self.ends)):
+			while len(active) > 0 and active[0][0] <= start:
+				heapq.heappop(active)
+			for (other_end, other) in active:
+				if self.starts[other] < end:
+					(first, second) = (other, pos) if self.order[other] < self.order[pos] else (pos, other)
+					retv.append(ScheduleOverlap(self.items[first], self.items[second], self.order[first], self.order[second], start, min(end, other_end)))
+			heapq.heappush(active, (end, pos))
+		retv.sort(key=lambda ox: (ox.first_index, ox.second_index))
+		return retv
+
+	def next_boundary(self, minute: float) -> int|None:
+		"""Smallest slot start or end offset strictly after minute."""
+		pos = bisect.bisect_right(self.boundaries, minute)
+		return self.boundaries[pos] if pos < len(self.boundaries) else None
 
 class TimedSchedule:
 	def __init__(self, id: str, name: str, items: list[SchedulableBase] = None, dc: callable = None):
 		self.id = id
 		self.name = name
+		self._compiled:CompiledSchedule = None
+		# the list (and its length) compiled from
+		self._compiled_from:tuple[list[SchedulableBase], int] = None
 		self.items = items if items is not None else []
 		self.date_controller = dc if dc is not None else lambda : datetime.now()
 
+	@property
+	def items(self) -> list[SchedulableBase]:
+		return self._items
+
+	@items.setter
+	def items(self, items: list[SchedulableBase]):
+		self._items = items
+		self.invalidate()
+
+	@property
+	def compiled(self) -> CompiledSchedule:
+		"""Index of items; rebuilt when items is assigned or resized (call invalidate() after replacing or editing an item in place)."""
+		items = self._items
+		if self._compiled is None or self._compiled_from[0] is not items or self._compiled_from[1] != len(items):
+			self._compiled = CompiledSchedule(items)
+			self._compiled_from = (items, len(items))
+		return self._compiled
+
+	def invalidate(self):
+		self._compiled = None
+		self._compiled_from = None
+
 	@property
 	def sorted_items(self) -> list[SchedulableBase]:
-		return sorted(self.items, key=lambda item: (item.start, item.end))
+		return list(self.compiled.items)
 
 	def set_date_controller(self, dc: callable):
 		if dc is None:
@@ -196,27 +381,37 @@ class TimedSchedule:
 			item.date_controller = dc
 
 	def check(self, item: SchedulableBase):
-		for existing in self.items:
-				# Check for overlap: [start1, end1) and [start2, end2) overlap if start1 < end2 and start2 < end1
-				if item.start < existing.end and existing.start < item.end:
-						return existing
-		return None
+		"""The existing item (first in items order) that item would overlap, or None."""
+		compiled = self.compiled
+		positions = compiled.overlapping_with(item.start_minutes, item.start_minutes + item.duration_minutes)
+		if len(positions) == 0:
+			return None
+		return compiled.items[min(positions, key=lambda px: compiled.order[px])]
 
 	def current(self, now: datetime):
-		for item in self.items:
-			if item.start <= now < item.end:
-				return item
-		return None
+		# items are anchored at midnight of the date controller's day
+		anchor = self.date_controller()
+		if now.day == anchor.day and now.month == anchor.month and now.year == anchor.year:
+			minute = minute_of_day(now)
+		else:
+			minute = (now - anchor.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds() / 60
+		return self.compiled.active(minute)
 
-	def validate(self):
-		overlaps = []
-		lx = len(self.items)
-		for ix in range(lx):
-				for jx in range(ix + 1, lx):
-					ox1 = self.items[ix]
-					ox2 = self.items[jx]
-					if ox1.start < ox2.end and ox2.start < ox1.end:
-						overlaps.append((ox1, ox2))
+	def at(self, ts: datetime) -> SchedulableBase|None:
+		"""The slot covering ts's time of day; unlike current() it does not consult the date controller."""
+		return self.compiled.active(minute_of_day(ts))
+
+	def next_change(self, now: datetime) -> datetime:
+		"""Earliest slot start or end after now, else the next midnight (slots are re-evaluated per day)."""
+		midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+		boundary = self.compiled.next_boundary(minute_of_day(now))
+		if boundary is None or boundary >= 24 * 60:
+			return midnight + timedelta(days=1)
+		return midnight + timedelta(minutes=boundary)
+
+	def validate(self) -> list[ScheduleOverlap]|None:
+		"""All overlapping pairs (ordered by position in items), or None."""
+		overlaps = self.compiled.overlaps()
 		if overlaps:
 			return overlaps
 		return None
@@ -230,38 +425,211 @@ class TimedSchedule:
 		}
 		return retv
 
-def generate_trigger_time(now: datetime, time: dict) -> Generator[datetime, None, None]:
+class ScheduleRender(NamedTuple):
+	render: list[dict]
+	"""{ schedule, id, start, end } per occurrence, in day order."""
+	schedules: dict[str, dict]
+	"""to_dict() of each timed schedule that occurs, by id."""
+	unmatched: datetime|None
+	"""First day the master schedule selected nothing (expansion stops there), else None."""
+
+def render_schedules(master: MasterSchedule, schedules: dict[str, TimedSchedule], start: datetime, days: int) -> ScheduleRender:
+	"""
+	Expand the timed schedules the master schedule selects (schedules is keyed by MasterScheduleItem.schedule)
+	over days days from start's midnight (tz-aware start gives tz-aware occurrences).
+	Pure: date controllers are not touched, so it is safe to run against schedules in use by other threads.
+	"""
+	start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+	# per schedule: its id and (item id, start offset, end offset) in slot order, built once for the whole range
+	templates:dict[str, tuple[str, list[tuple[str, timedelta, timedelta]]]] = {}
+	render = []
+	used = {}
+	for ix, (day, item) in enumerate(master.evaluate_range(start, days)):
+		anchor = start + timedelta(days=ix)
+		if item is None:
+			return ScheduleRender(render, used, anchor)
+		template = templates.get(item.schedule, None)
+		if template is None:
+			target = schedules.get(item.schedule, None)
+			if target is None:
+				continue
+			template = (target.id, [(xx.id, timedelta(minutes=xx.start_minutes), timedelta(minutes=xx.start_minutes + xx.duration_minutes)) for xx in target.items])
+			templates[item.schedule] = template
+			used.setdefault(target.id, target.to_dict())
+		sid, slots = template
+		render.extend({ "schedule": sid, "id": iid, "start": (anchor + offset).isoformat(), "end": (anchor + until).isoformat() } for (iid, offset, until) in slots)
+	return ScheduleRender(render, used, None)
+
+# how far next_after() searches before deciding a trigger never fires (e.g. 30 February); 8 years spans any leap day
+MAX_TRIGGER_YEARS:int = 8
+
+class TriggerSpec:
+	"""
+	Fire times as cron-style field sets: every (hour, minute) in hours x minutes on each day whose month, day of month and weekday match.
+	None means any value. weekdays uses datetime.weekday() (Monday = 0), like the "dayofweek" triggers.
+	As in cron, when both days and weekdays are restricted and day_or is set, a day matches either one.
+	Lookups bisect the sorted fields, so cost follows the number of fire times produced, not the minutes in between.
+	"""
+	__slots__ = ("minutes", "hours", "days", "months", "weekdays", "day_or", "_months", "_days")
+	def __init__(self, minutes: list[int] = None, hours: list[int] = None, days: list[int] = None, months: list[int] = None, weekdays: list[int] = None, day_or: bool = False):
+		self.minutes = tuple(sorted(set(minutes))) if minutes is not None else tuple(range(60))
+		self.hours = tuple(sorted(set(hours))) if hours is not None else tuple(range(24))
+		self.days = frozenset(days) if days is not None else None
+		self.months = frozenset(months) if months is not None else None
+		self.weekdays = frozenset(weekdays) if weekdays is not None else None
+		self.day_or = day_or
+		self._months = tuple(sorted(self.months)) if self.months is not None else None
+		self._days = tuple(sorted(self.days)) if self.days is not None else None
+		if any(mx < 0 or mx > 59 for mx in self.minutes) or any(hx < 0 or hx > 23 for hx in self.hours):
+			raise ValueError(f"Trigger time out of range: hours {self.hours} minutes {self.minutes}")
+
+	def matches_day(self, day: date) -> bool:
+		if self.months is not None and day.month not in self.months:
+			return False
+		dom = self.days is None or day.day in self.days
+		dow = self.weekdays is None or day.weekday() in self.weekdays
+		if self.day_or and self.days is not None and self.weekdays is not None:
+			return dom or dow
+		return dom and dow
+
+	def _time_from(self, hour: int, minute: int) -> tuple[int, int]|None:
+		"""First (hour, minute) of the day at or after hour:minute (minute may be 60)."""
+		if len(self.minutes) == 0:
+			return None
+		hx = bisect.bisect_left(self.hours, hour)
+		if hx < len(self.hours) and self.hours[hx] == hour:
+			mx = bisect.bisect_left(self.minutes, minute)
+			if mx < len(self.minutes):
+				return (hour, self.minutes[mx])
+			hx += 1
+		if hx < len(self.hours):
+			return (self.hours[hx], self.minutes[0])
+		return None
+
+	def _next_month(self, day: date) -> date:
+		"""First day of the next allowed month after day's month."""
+		mx = bisect.bisect_right(self._months, day.month)
+		if mx < len(self._months):
+			return date(day.year, self._months[mx], 1)
+		return date(day.year + 1, self._months[0], 1)
+
+	def _next_day(self, day: date) -> date:
+		"""
+		The next day after day that can match days/weekdays, else the first day of the next month
+		(months are checked by the caller). Jumps over days that cannot match instead of visiting them.
+		"""
+		next_month = date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+		if self.days is None and self.weekdays is None:
+			return day + timedelta(days=1)
+		dow = None
+		if self.weekdays is not None:
+			dow = day + timedelta(days=min((wx - day.weekday() - 1) % 7 + 1 for wx in self.weekdays))
+			if self.days is None:
+				return dow
+		dom = next_month
+		dx = bisect.bisect_right(self._days, day.day)
+		if dx < len(self._days):
+			# days past the end of this month land in the next one
+			dom = min(day + timedelta(days=self._days[dx] - day.day), next_month)
+		if self.weekdays is not None and self.day_or:
+			return min(dom, dow)
+		# days only, or both days and weekdays: each day-of-month candidate is checked by matches_day
+		return dom
+
+	def next_after(self, after: datetime) -> datetime|None:
+		"""Earliest fire time strictly after after (keeping its tzinfo), or None within MAX_TRIGGER_YEARS."""
+		if len(self.hours) == 0 or len(self.minutes) == 0:
+			return None
+		first = after.date()
+		day = first
+		limit = first.year + MAX_TRIGGER_YEARS
+		while day.year <= limit:
+			if self._months is not None and day.month not in self.months:
+				day = self._next_month(day)
+				continue
+			if self.matches_day(day):
+				hm = self._time_from(after.hour, after.minute + 1) if day == first else (self.hours[0], self.minutes[0])
+				if hm is not None:
+					return after.replace(year=day.year, month=day.month, day=day.day, hour=hm[0], minute=hm[1], second=0, microsecond=0)
+			day = self._next_day(day)
+		return None
+
+	def times(self, after: datetime) -> Generator[datetime, None, None]:
+		"""Fire times after after, in order, across day boundaries."""
+		current = self.next_after(after)
+		while current is not None:
+			yield current
+			current = self.next_after(current)
+
+	def next_n(self, after: datetime, count: int) -> list[datetime]:
+		retv = []
+		for ts in self.times(after):
+			if len(retv) >= count:
+				break
+			retv.append(ts)
+		return retv
+
+def _cron_field(field: str, low: int, high: int) -> list[int]|None:
+	"""One cron field: *, n, a-b, with optional /step, comma separated; None for an unrestricted *."""
+	if field == "*":
+		return None
+	values = set()
+	for part in field.split(","):
+		(span, _, step) = part.partition("/")
+		step = int(step) if step else 1
+		if step < 1:
+			raise ValueError(f"Invalid cron step '{part}'")
+		if span == "*":
+			(first, last) = (low, high)
+		elif "-" in span:
+			(first, last) = (int(xx) for xx in span.split("-", 1))
+		else:
+			first = int(span)
+			last = high if step > 1 else first
+		if first < low or last > high or first > last:
+			raise ValueError(f"Cron field '{part}' outside {low}-{high}")
+		values.update(range(first, last + 1, step))
+	return sorted(values)
+
+def parse_cron(expression: str) -> TriggerSpec:
+	"""
+	"minute hour day-of-month month day-of-week", e.g. "*/15 8-17 * * 1-5".
+	Day of week follows cron (0 or 7 = Sunday); both day fields restricted means either matches.
+	"""
+	fields = expression.split()
+	if len(fields) != 5:
+		raise ValueError(f"Cron expression '{expression}' must have 5 fields")
+	minutes = _cron_field(fields[0], 0, 59)
+	hours = _cron_field(fields[1], 0, 23)
+	days = _cron_field(fields[2], 1, 31)
+	months = _cron_field(fields[3], 1, 12)
+	cron_weekdays = _cron_field(fields[4], 0, 7)
+	weekdays = sorted({ (dx - 1) % 7 for dx in cron_weekdays }) if cron_weekdays is not None else None
+	return TriggerSpec(minutes, hours, days, months, weekdays, day_or=True)
+
+def compile_time_trigger(time: dict) -> dict:
+	"""TriggerSpec arguments for a time trigger (hourly, hourofday, specific)."""
 	time_type = time.get("type", None)
 	if time_type is None:
 		raise ValueError("Time Trigger must contain 'type' field")
 	match time_type:
 		case "hourly":
-			minutes = time.get("minutes", [0])
-			for hour in range(now.hour, 24):
-				for minute in minutes:
-					next_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-					if next_time <= now:
-						continue
-					yield next_time
+			return { "minutes": time.get("minutes", [0]) }
 		case "hourofday":
-			hours = time.get("hours", [])
-			minutes = time.get("minutes", [0])
-			for hour in hours:
-				for minute in minutes:
-					next_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-					if next_time <= now:
-						continue
-					yield next_time
+			return { "hours": time.get("hours", []), "minutes": time.get("minutes", [0]) }
 		case "specific":
-			hour = time.get("hour", 0)
-			minute = time.get("minute", 0)
-			next_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-			if next_time > now:
-				yield next_time
-		case None:
-			pass
-	pass
-def generate_schedule(now: datetime, trigger: dict) -> Generator[datetime, None, None]:
+			return { "hours": [time.get("hour", 0)], "minutes": [time.get("minute", 0)] }
+		case _:
+			raise ValueError(f"Unknown time trigger type '{time_type}'")
+
+def compile_schedule_trigger(trigger: dict) -> TriggerSpec:
+	"""
+	TriggerSpec for a { day, time } trigger (as used by timer tasks) or a { cron: "..." } expression.
+	day: dayofweek { days }, dayofmonth { days }, dayandmonth { day, month }; time: see compile_time_trigger().
+	"""
+	cron = trigger.get("cron", None)
+	if cron is not None:
+		return parse_cron(cron)
 	day = trigger.get("day", None)
 	time = trigger.get("time", None)
 	if day is None or time is None:
@@ -269,23 +637,36 @@ def generate_schedule(now: datetime, trigger: dict) -> Generator[datetime, None,
 	day_type = day.get("type", None)
 	if day_type is None:
 		raise ValueError("Day Trigger must contain 'type' field")
+	args = compile_time_trigger(time)
 	match day_type:
 		case "dayofweek":
-			days = day.get("days", [])
-			if now.weekday() in days:
-				yield from generate_trigger_time(now, time)
+			args["weekdays"] = day.get("days", [])
 		case "dayofmonth":
-			days = day.get("days", [])
-			if now.day in days:
-				yield from generate_trigger_time(now, time)
+			args["days"] = day.get("days", [])
 		case "dayandmonth":
-			day = day.get("day", None)
-			month = day.get("month", None)
-			if now.day == day and now.month == month:
-				yield from generate_trigger_time(now, time)
-		case None:
-			pass
-	pass
+			args["days"] = [day.get("day", None)]
+			args["months"] = [day.get("month", None)]
+		case _:
+			raise ValueError(f"Unknown day trigger type '{day_type}'")
+	return TriggerSpec(**args)
+
+def next_fire_times(trigger: dict, after: datetime, count: int) -> list[datetime]:
+	"""The next count fire times of trigger after after."""
+	return compile_schedule_trigger(trigger).next_n(after, count)
+
+def _same_day(now: datetime, spec: TriggerSpec) -> Generator[datetime, None, None]:
+	for ts in spec.times(now):
+		if ts.date() != now.date():
+			break
+		yield ts
+
+def generate_trigger_time(now: datetime, time: dict) -> Generator[datetime, None, None]:
+	"""Fire times of a time trigger for the rest of now's day."""
+	yield from _same_day(now, TriggerSpec(**compile_time_trigger(time)))
+
+def generate_schedule(now: datetime, trigger: dict) -> Generator[datetime, None, None]:
+	"""Fire times of a { day, time } trigger for the rest of now's day (none if the day does not match)."""
+	yield from _same_day(now, compile_schedule_trigger(trigger))
 
 class TimerTaskTask:
 	def __init__(self, plugin_name: str, title: str, duration_minutes: int, content: dict):
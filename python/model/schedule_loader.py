@@ -5,6 +5,11 @@ import uuid
 from ..model.hash_manager import HashManager
 from .schedule import MasterSchedule, MasterScheduleItem, Playlist, PlaylistSchedule, PlaylistScheduleData, TimedSchedule, PluginSchedule, PluginScheduleData, TimerTaskItem, TimerTasks
 
+SCHEMA_MASTER:str = "urn:inky:storage:schedule:master:1"
+SCHEMA_TIMED:str = "urn:inky:storage:schedule:timed:1"
+SCHEMA_PLAYLIST:str = "urn:inky:storage:schedule:playlist:1"
+SCHEMA_TASKS:str = "urn:inky:storage:schedule:tasks:1"
+
 class ScheduleLoader:
 	@staticmethod
 	def loadFile(path: str, name: str, hm: HashManager = None) -> dict:
@@ -13,26 +18,26 @@ class ScheduleLoader:
 		schema = data.get("_schema", None)
 		if schema is None:
 			raise ValueError(f"Schedule file '{path}' is missing _schema field.")
-		if schema == "urn:inky:storage:schedule:timed:1":
+		if schema == SCHEMA_TIMED:
 			if hm is not None:
 				hm.hash_document(data['id'], path, data)
 			info = ScheduleLoader.parseTimed(data)
-			return { "info": info, "name": name, "path": path, "type": schema }
-		elif schema == "urn:inky:storage:schedule:master:1":
+			return { "info": info, "name": name, "id": data.get("id", None), "path": path, "type": schema }
+		elif schema == SCHEMA_MASTER:
 			if hm is not None:
 				hm.hash_document(data['id'], path, data)
 			info = ScheduleLoader.parseMaster(data)
-			return { "info": info, "name": name, "path": path, "type": schema }
-		elif schema == "urn:inky:storage:schedule:playlist:1":
+			return { "info": info, "name": name, "id": data.get("id", None), "path": path, "type": schema }
+		elif schema == SCHEMA_PLAYLIST:
 			if hm is not None:
 				hm.hash_document(data['id'], path, data)
 			info = ScheduleLoader.parsePlaylist(data)
-			return { "info": info, "name": name, "path": path, "type": schema }
-		elif schema == "urn:inky:storage:schedule:tasks:1":
+			return { "info": info, "name": name, "id": data.get("id", None), "path": path, "type": schema }
+		elif schema == SCHEMA_TASKS:
 			if hm is not None:
 				hm.hash_document(data['id'], path, data)
 			info = ScheduleLoader.parseTimerTasks(data)
-			return { "info": info, "name": name, "path": path, "type": schema }
+			return { "info": info, "name": name, "id": data.get("id", None), "path": path, "type": schema }
 		else:
 			raise ValueError(f"Unknown schema '{schema}' in schedule file '{path}'.")
 	@staticmethod
@@ -41,16 +46,16 @@ class ScheduleLoader:
 		schema = data.get("_schema", None)
 		if schema is None:
 			raise ValueError(f"Schedule is missing _schema field.")
-		if schema == "urn:inky:storage:schedule:timed:1":
+		if schema == SCHEMA_TIMED:
 			info = ScheduleLoader.parseTimed(data)
 			return info
-		elif schema == "urn:inky:storage:schedule:master:1":
+		elif schema == SCHEMA_MASTER:
 			info = ScheduleLoader.parseMaster(data)
 			return info
-		elif schema == "urn:inky:storage:schedule:playlist:1":
+		elif schema == SCHEMA_PLAYLIST:
 			info = ScheduleLoader.parsePlaylist(data)
 			return info
-		elif schema == "urn:inky:storage:schedule:tasks:1":
+		elif schema == SCHEMA_TASKS:
 			info = ScheduleLoader.parseTimerTasks(data)
 			return info
 		else:
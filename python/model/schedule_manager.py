@@ -1,46 +1,249 @@
 import os
 import json
 import logging
-from typing import List
+import threading
+from concurrent.futures import Executor
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping
 
 from .hash_manager import HashManager
-from .schedule import MasterSchedule, Playlist, TimedSchedule
-from .schedule_loader import ScheduleLoader
+from .schedule import MasterSchedule, MasterScheduleItem, Playlist, SchedulableBase, ScheduleRender, TimedSchedule, render_schedules
+from .schedule_loader import SCHEMA_MASTER, SCHEMA_PLAYLIST, SCHEMA_TASKS, SCHEMA_TIMED, ScheduleLoader
 
 logger = logging.getLogger(__name__)
 
 MASTER:str = "master_schedule.json"
+# only these files in the schedule folder are loaded
+SCHEDULE_EXTENSIONS:tuple[str, ...] = (".json",)
+
+class ScheduleSnapshot:
+	"""
+	A loaded, validated schedule set that is never modified, so the Scheduler, PlaylistLayer and web API can share it.
+	Everything is evaluated against a timestamp argument; no date controllers are set.
+	Entries are the loader's { info, name, path, type } records (read-only views); revision is ScheduleManager.revision() at load.
+	"""
+	__slots__ = ("master", "schedules", "playlists", "tasks", "revision", "_timed")
+	def __init__(self, master: MasterSchedule, schedules: list[dict], playlists: list[dict], tasks: list[dict], revision: tuple = None):
+		if master is None:
+			raise ValueError("master is None")
+		def freeze(entries: list[dict]) -> tuple[Mapping, ...]:
+			return tuple(MappingProxyType(dict(ex)) for ex in entries)
+		timed = {}
+		for entry in schedules:
+			info = entry.get("info", None)
+			if isinstance(info, TimedSchedule):
+				# no more edits: fix the item list and build the indexes now, before other threads read them
+				info.items = tuple(info.items)
+				info.compiled
+				timed[entry.get("name", None)] = info
+		master.compiled
+		init = object.__setattr__
+		init(self, "master", master)
+		init(self, "schedules", freeze(schedules))
+		init(self, "playlists", freeze(playlists))
+		init(self, "tasks", freeze(tasks))
+		init(self, "revision", revision)
+		init(self, "_timed", MappingProxyType(timed))
+
+	def __setattr__(self, name, value):
+		raise AttributeError(f"ScheduleSnapshot is read-only ({name})")
+
+	@property
+	def timed(self) -> Mapping[str, TimedSchedule]:
+		"""Timed schedules by file name (the name MasterScheduleItem.schedule refers to)."""
+		return self._timed
+
+	def select(self, ts: datetime) -> tuple[MasterScheduleItem|None, TimedSchedule|None, SchedulableBase|None]:
+		"""The master schedule item for ts's day, the timed schedule it names and that schedule's slot at ts."""
+		item = self.master.evaluate(ts)
+		if item is None:
+			return (None, None, None)
+		target = self._timed.get(item.schedule, None)
+		if target is None:
+			return (item, None, None)
+		return (item, target, target.at(ts))
+
+	def next_change(self, ts: datetime) -> datetime:
+		"""Earliest time after ts at which select() can change."""
+		change = self.master.next_change(ts)
+		item = self.master.evaluate(ts)
+		target = self._timed.get(item.schedule, None) if item is not None else None
+		if target is not None:
+			change = min(change, target.next_change(ts))
+		return change
+
+	def render(self, start: datetime, days: int) -> ScheduleRender:
+		return render_schedules(self.master, self._timed, start, days)
+
+class ScheduleLoadResult(dict):
+	"""
+	What ScheduleManager.load() found: still the { master, schedules, playlists, tasks } dict,
+	plus the loaded entries indexed by file name, document id and schema, and the files that failed to load.
+	"""
+	def __init__(self, entries: list[dict], errors: dict[str, Exception] = None):
+		self.entries = entries
+		self.errors:dict[str, Exception] = errors if errors is not None else {}
+		self.by_name:dict[str, dict] = {}
+		self.by_id:dict[str, dict] = {}
+		self.by_schema:dict[str, list[dict]] = {}
+		for entry in entries:
+			self.by_name[entry["name"]] = entry
+			if entry.get("id", None) is not None:
+				self.by_id.setdefault(entry["id"], entry)
+			self.by_schema.setdefault(entry["type"], []).append(entry)
+		masters = self.by_schema.get(SCHEMA_MASTER, [])
+		super().__init__(
+			master=masters[0] if len(masters) > 0 else None,
+			schedules=self.by_schema.get(SCHEMA_TIMED, []),
+			playlists=self.by_schema.get(SCHEMA_PLAYLIST, []),
+			tasks=self.by_schema.get(SCHEMA_TASKS, []),
+		)
+
+class ScheduleCache:
+	"""
+	Parsed schedule files (or the error they failed with) keyed by path and validated by (mtime_ns, size), plus the last snapshot per folder.
+	Unchanged files are never re-parsed; a changed file only invalidates its own entry.
+	Shared by every ScheduleManager (they are created per use) through SCHEDULE_CACHE.
+	"""
+	def __init__(self):
+		self._files:dict[str, tuple[int, int, dict|Exception]] = {}
+		self._snapshots:dict[str, tuple[ScheduleSnapshot, tuple[str, ...]]] = {}
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, path: str, mtime_ns: int, size: int) -> dict|Exception|None:
+		with self._lock:
+			cached = self._files.get(path, None)
+			if cached is not None and cached[0] == mtime_ns and cached[1] == size:
+				self.hits += 1
+				return cached[2]
+			self.misses += 1
+			return None
+
+	def put(self, path: str, mtime_ns: int, size: int, entry: dict|Exception):
+		with self._lock:
+			self._files[path] = (mtime_ns, size, entry)
+
+	def prune(self, folder: str, present: set[str]):
+		"""Forget files of folder that are no longer there."""
+		with self._lock:
+			for path in [px for px in self._files.keys() if os.path.dirname(px) == folder and px not in present]:
+				del self._files[path]
+
+	def snapshot(self, folder: str) -> tuple[ScheduleSnapshot, tuple[str, ...]]|None:
+		"""The last snapshot of folder and the paths of the files it was built from."""
+		with self._lock:
+			return self._snapshots.get(folder, None)
+
+	def put_snapshot(self, folder: str, snapshot: ScheduleSnapshot, paths: tuple[str, ...]):
+		with self._lock:
+			self._snapshots[folder] = (snapshot, paths)
+
+	def clear(self):
+		with self._lock:
+			self._files.clear()
+			self._snapshots.clear()
+
+SCHEDULE_CACHE = ScheduleCache()
 
 class ScheduleManager:
-	def __init__(self, root_path):
+	def __init__(self, root_path, cache: ScheduleCache = None, executor: Executor = None):
 		if root_path == None:
 			raise ValueError("root_path cannot be None")
 		if not os.path.exists(root_path):
 			raise ValueError(f"root_path {root_path} does not exist.")
 		self.ROOT_PATH = root_path
+		self.cache = cache if cache is not None else SCHEDULE_CACHE
+		# files to parse are spread over this pool (e.g. the shared io pool); None parses in the caller
+		self.executor = executor
 		logger.debug(f"ROOT_PATH: {self.ROOT_PATH}")
 
-	def load(self, hm: HashManager = None):
+	def _scan(self) -> list[tuple[str, str, int, int]]:
+		"""(name, path, mtime_ns, size) of every schedule file (by extension) in the root path, by name."""
+		retv = []
+		with os.scandir(self.ROOT_PATH) as entries:
+			for entry in entries:
+				if entry.is_file() and entry.name.lower().endswith(SCHEDULE_EXTENSIONS):
+					st = entry.stat()
+					retv.append((entry.name, entry.path, st.st_mtime_ns, st.st_size))
+		retv.sort()
+		return retv
+
+	def revision(self) -> tuple[tuple[str, int, int], ...]:
+		"""(name, mtime_ns, size) of every schedule file in the root path; changes whenever a schedule is written."""
+		return tuple((name, mtime_ns, size) for (name, path, mtime_ns, size) in self._scan())
+
+	def _parse(self, name: str, path: str, hm: HashManager) -> dict|Exception:
+		try:
+			return ScheduleLoader.loadFile(path, name, hm)
+		except Exception as e:
+			return e
+
+	def load(self, hm: HashManager = None) -> ScheduleLoadResult:
 		""" Load all schedules from the root path. 
+		Files that fail to load are reported in errors (and logged) instead of failing the load.
 		Args:
 			hm (HashManager, optional): Hash manager for validating hashes. Defaults to None.
 		Returns:
-			dict: A dictionary containing the master schedule and a list of schedules.
+			ScheduleLoadResult: A dictionary containing the master schedule and a list of schedules, with indexes and errors.
 		"""
 		master_schedule_file = os.path.join(self.ROOT_PATH, MASTER)
 		if not os.path.isfile(master_schedule_file):
 			raise FileNotFoundError(f"Master schedule file '{master_schedule_file}' does not exist.")
-		item_list:List[TimedSchedule] = []
-		for schedule in os.listdir(self.ROOT_PATH):
-			logger.debug(f"Found file: {schedule}")
-			schedule_path = os.path.join(self.ROOT_PATH, schedule)
-			info = ScheduleLoader.loadFile(schedule_path, schedule, hm)
-			item_list.append(info)
-		master_schedule = next((item for item in item_list if item.get("type") == "urn:inky:storage:schedule:master:1"), None)
-		schedule_list = [item for item in item_list if item.get("type") == "urn:inky:storage:schedule:timed:1"]
-		playlist_list = [item for item in item_list if item.get("type") == "urn:inky:storage:schedule:playlist:1"]
-		tasks_list = [item for item in item_list if item.get("type") == "urn:inky:storage:schedule:tasks:1"]
-		return { "master": master_schedule, "schedules": schedule_list, "playlists": playlist_list, "tasks": tasks_list }
+		files = self._scan()
+		loaded:dict[str, dict|Exception] = {}
+		pending = []
+		for (schedule, schedule_path, mtime_ns, size) in files:
+			# with a HashManager, a file it no longer tracks is re-read so its hash gets registered again
+			info = self.cache.get(schedule_path, mtime_ns, size) if hm is None or hm.has_path(schedule_path) else None
+			if info is None:
+				logger.debug(f"Found file: {schedule}")
+				pending.append((schedule, schedule_path, mtime_ns, size))
+			else:
+				loaded[schedule] = info
+		if self.executor is not None and len(pending) > 1:
+			futures = [(px, self.executor.submit(self._parse, px[0], px[1], hm)) for px in pending]
+			parsed = [(px, fx.result()) for (px, fx) in futures]
+		else:
+			parsed = [(px, self._parse(px[0], px[1], hm)) for px in pending]
+		for ((schedule, schedule_path, mtime_ns, size), info) in parsed:
+			self.cache.put(schedule_path, mtime_ns, size, info)
+			loaded[schedule] = info
+		self.cache.prune(self.ROOT_PATH, set(fx[1] for fx in files))
+		entries = []
+		errors = {}
+		for (schedule, schedule_path, mtime_ns, size) in files:
+			info = loaded[schedule]
+			if isinstance(info, Exception):
+				logger.error(f"Schedule file '{schedule}': {info}")
+				errors[schedule] = info
+			else:
+				entries.append(dict(info))
+		return ScheduleLoadResult(entries, errors)
+
+	def snapshot(self, hm: HashManager = None) -> ScheduleSnapshot:
+		"""
+		load() and validate() into a ScheduleSnapshot.
+		While no file changes, every caller gets the same snapshot instance.
+		"""
+		revision = self.revision()
+		cached = self.cache.snapshot(self.ROOT_PATH)
+		if cached is not None and cached[0].revision == revision and (hm is None or all(hm.has_path(px) for px in cached[1])):
+			return cached[0]
+		schedule_info = self.load(hm)
+		if len(schedule_info.errors) > 0:
+			# a snapshot without some of its files would silently play the wrong thing
+			failed = "; ".join(f"{name}: {error}" for (name, error) in schedule_info.errors.items())
+			raise ValueError(f"Schedule files failed to load: {failed}")
+		self.validate(schedule_info)
+		master = schedule_info.get("master", None)
+		if master is None:
+			raise ValueError("Master schedule is missing.")
+		snapshot = ScheduleSnapshot(master["info"], schedule_info.get("schedules", []), schedule_info.get("playlists", []), schedule_info.get("tasks", []), revision)
+		self.cache.put_snapshot(self.ROOT_PATH, snapshot, tuple(ex["path"] for ex in schedule_info.entries))
+		return snapshot
 
 	def validate(self, schedule_list):
 		if schedule_list is None:
@@ -48,8 +251,9 @@ class ScheduleManager:
 		master = schedule_list.get("master", None)
 		if master is None:
 			raise ValueError("Master schedule is missing.")
-		if isinstance(master, MasterSchedule):
-			validation_error = master.validate(schedule_list)
+		master_info = master.get("info", None)
+		if isinstance(master_info, MasterSchedule):
+			validation_error = master_info.validate(schedule_list.get("schedules", []))
 			if validation_error is not None:
 				raise ValueError(f"Validation error in master schedule '{master.get('name', 'unknown')}': {validation_error}")
 		for playlist in schedule_list.get("schedules", []):
@@ -57,9 +261,9 @@ class ScheduleManager:
 			if info is None:
 				raise ValueError(f"Schedule info is None for {playlist.get('name', 'unknown')}")
 			elif isinstance(info, TimedSchedule):
-				validation_error = info.validate()
-				if validation_error is not None:
-					raise ValueError(f"Validation error in schedule '{playlist.get('name', 'unknown')}': {validation_error}")
+				overlaps = info.validate()
+				if overlaps is not None:
+					raise ValueError(f"Validation error in schedule '{playlist.get('name', 'unknown')}': {'; '.join(str(ox) for ox in overlaps)}")
 		for playlist in schedule_list.get("playlists", []):
 			info = playlist.get("info", None)
 			if info is None:
@@ -0,0 +1,97 @@
+import logging
+import threading
+from typing import Any
+
+from ..model.configuration_manager import ConfigurationManager
+
+# idle instances kept per plugin id; one is playing, one may be staged for the next track
+MAX_IDLE:int = 2
+
+class PluginRegistry:
+	"""
+	Plugin infos (from enum_plugins()) indexed by id, with each plugin class resolved (imported) once,
+	and a pool of reusable plugin instances so a track change does not import or construct anything.
+	Lifecycle of an instance: acquire(id) hands it to one user, release(plugin) after its stop() returns it
+	(calling its optional reset()), close() drops the pool (calling its optional close()).
+	"""
+	def __init__(self, cm: ConfigurationManager, infos: list[dict], max_idle: int = MAX_IDLE):
+		if cm is None:
+			raise ValueError("cm is None")
+		self.cm = cm
+		self.source = infos
+		self.infos:dict[str, dict] = { info["info"]["id"]: info for info in infos if info.get("info", None) is not None }
+		self.max_idle = max_idle
+		self._classes:dict[str, type|None] = {}
+		self._idle:dict[str, list[Any]] = {}
+		self._lock = threading.Lock()
+		self.created = 0
+		self.reused = 0
+		self.logger = logging.getLogger(__name__)
+
+	def info(self, plugin_id: str) -> dict|None:
+		return self.infos.get(plugin_id, None)
+
+	def resolve(self, plugin_id: str) -> type|None:
+		"""The plugin class, imported on first use; None (also remembered) if unknown, disabled or not importable."""
+		with self._lock:
+			if plugin_id in self._classes:
+				return self._classes[plugin_id]
+		info = self.infos.get(plugin_id, None)
+		plugin_class = self.cm.resolve_plugin(info) if info is not None else None
+		with self._lock:
+			self._classes[plugin_id] = plugin_class
+		return plugin_class
+
+	def acquire(self, plugin_id: str) -> Any|None:
+		"""An idle instance of the plugin, or a new one; None if the plugin is not available."""
+		with self._lock:
+			idle = self._idle.get(plugin_id, None)
+			if idle:
+				self.reused += 1
+				return idle.pop()
+		plugin_class = self.resolve(plugin_id)
+		if plugin_class is None:
+			return None
+		info = self.infos[plugin_id]["info"]
+		plugin = plugin_class(plugin_id, info.get("name"))
+		with self._lock:
+			self.created += 1
+		return plugin
+
+	def release(self, plugin: Any):
+		"""Return a stopped instance for reuse."""
+		if plugin is None:
+			return
+		reset = getattr(plugin, "reset", None)
+		if callable(reset):
+			try:
+				reset()
+			except Exception as e:
+				# don't reuse an instance in an unknown state
+				self.logger.error(f"Plugin '{plugin.id}' reset: {e}")
+				return
+		with self._lock:
+			idle = self._idle.setdefault(plugin.id, [])
+			if len(idle) < self.max_idle and plugin not in idle:
+				idle.append(plugin)
+				return
+		self._close(plugin)
+
+	def close(self):
+		with self._lock:
+			plugins = [px for idle in self._idle.values() for px in idle]
+			self._idle = {}
+		for plugin in plugins:
+			self._close(plugin)
+
+	def _close(self, plugin: Any):
+		close = getattr(plugin, "close", None)
+		if callable(close):
+			try:
+				close()
+			except Exception as e:
+				self.logger.error(f"Plugin '{plugin.id}' close: {e}")
+
+	def stats(self) -> dict[str, int]:
+		with self._lock:
+			return { "created": self.created, "reused": self.reused, "idle": sum(len(idle) for idle in self._idle.values()) }
@@ -1,3 +1,4 @@
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from ...task.playlist_layer import NextTrack
 from ...task.timer import TimerService
@@ -10,6 +11,7 @@ from ..plugin_base import BasicExecutionContext2, PluginProtocol
 import logging
 
 class SlideShowTimerExpired(PluginReceive):
+	__slots__ = ("remaining_state",)
 	def __init__(self, remaining_state: list, timestamp: datetime = None):
 		super().__init__(timestamp)
 		self.remaining_state = remaining_state
@@ -21,6 +23,8 @@ class SlideShow(PluginProtocol):
 		self._id = id
 		self._name = name
 		self.timer_info = None
+		# (track, Future[(state, image)]) from prepare()
+		self.prepared:tuple[PlaylistBase, Future]|None = None
 		self.logger = logging.getLogger(__name__)
 	@property
 	def id(self) -> str:
@@ -34,9 +38,89 @@ class SlideShow(PluginProtocol):
 		ftimeout = settings.get("timeoutSeconds", 10)
 		image = future2.result(timeout=ftimeout)
 		state.pop(0)
+		self._show_image(title, image, settings, state, router, timer, timer_sink)
+	def _show_image(self, title: str, image, settings: dict, state: list, router: MessageRouter, timer: TimerService, timer_sink: MessageSink):
 		router.send("display", DisplayImage(title, image))
 		slideMinutes = settings.get("slideMinutes", 15)
 		self.timer_info = timer.create_timer(timedelta(minutes=slideMinutes), timer_sink, SlideShowTimerExpired(state))
+	def prepare(self, context: BasicExecutionContext2, track: SchedulableBase|PlaylistBase) -> Future|None:
+		"""
+		Open the media list and render its first image in the background, without blocking or displaying anything.
+		start() with the same track shows the staged image instead of fetching it again; reset() cancels it.
+		Cancelling also cancels the data source's open/render future in flight; work that is already running finishes and is discarded.
+		"""
+		if not isinstance(track, PlaylistSchedule):
+			return None
+		settings = track.content.data
+		dsm = context.provider.get_service(DataSourceManager)
+		if dsm is None:
+			raise RuntimeError("DataSourceManager is not available")
+		dataSourceName = settings.get("dataSource", None)
+		if dataSourceName is None:
+			raise RuntimeError("dataSource is not specified")
+		dataSource = dsm.get_source(dataSourceName)
+		if not isinstance(dataSource, MediaList):
+			return None
+		dsec = context.create_datasource_context(dataSource)
+		staged = Future()
+		# the data source future in flight
+		inflight:list[Future] = []
+		def _track(fx: Future) -> Future:
+			inflight[:] = [fx]
+			if staged.cancelled():
+				fx.cancel()
+			return fx
+		def _cancelled(fx: Future):
+			if fx.cancelled():
+				for ix in inflight:
+					ix.cancel()
+		staged.add_done_callback(_cancelled)
+		def _failed(ex: BaseException):
+			if staged.set_running_or_notify_cancel():
+				staged.set_exception(ex)
+		def _rendered(fx: Future, state: list):
+			try:
+				image = fx.result()
+			except BaseException as ex:
+				_failed(ex)
+				return
+			if staged.set_running_or_notify_cancel():
+				state.pop(0)
+				staged.set_result((state, image))
+		def _opened(fx: Future):
+			if staged.cancelled():
+				return
+			try:
+				state = fx.result()
+				if len(state) == 0:
+					raise RuntimeError(f"{dataSourceName}: No media items found for slide show")
+				_track(dataSource.render(dsec, settings, state[0])).add_done_callback(lambda fx2: _rendered(fx2, state))
+			except BaseException as ex:
+				_failed(ex)
+		_track(dataSource.open(dsec, settings)).add_done_callback(_opened)
+		self.prepared = (track, staged)
+		return staged
+	def reset(self):
+		"""Drop staged work and timer state so the instance can be reused for another track."""
+		if self.prepared is not None:
+			self.prepared[1].cancel()
+			self.prepared = None
+		if self.timer_info is not None:
+			self.timer_info[1]()
+			self.timer_info = None
+	def _take_prepared(self, track: PlaylistBase, timeout: float) -> tuple[list, object]|None:
+		"""The staged (state, image) for track; None if not staged for it or it failed (start() then fetches as usual)."""
+		prepared = self.prepared
+		self.prepared = None
+		if prepared is None or prepared[0] is not track:
+			if prepared is not None:
+				prepared[1].cancel()
+			return None
+		try:
+			return prepared[1].result(timeout=timeout)
+		except Exception as e:
+			self.logger.warning(f"{self.id} staged '{track.title}' failed, fetching again: {e}")
+			return None
 	def start(self, context: BasicExecutionContext2, track: SchedulableBase|PlaylistBase) -> None:
 		self.logger.info(f"{self.id} start '{track.title}'")
 		if isinstance(track, PlaylistSchedule):
@@ -62,9 +146,14 @@ class SlideShow(PluginProtocol):
 			if dataSource is None:
 				raise RuntimeError(f"dataSource '{dataSourceName}' is not available")
 			if isinstance(dataSource, MediaList):
+				ftimeout = settings.get("timeoutSeconds", 10)
+				staged = self._take_prepared(track, ftimeout)
+				if staged is not None:
+					(state, image) = staged
+					self._show_image(track.title, image, settings, state, router, timer, timer_sink)
+					return
 				dsec = context.create_datasource_context(dataSource)
 				future = dataSource.open(dsec, settings)
-				ftimeout = settings.get("timeoutSeconds", 10)
 				state = future.result(timeout=ftimeout)
 				if len(state) == 0:
 					raise RuntimeError(f"{dataSourceName}: No media items found for slide show")
@@ -1,9 +1,10 @@
 from concurrent.futures import Executor, ThreadPoolExecutor
-import datetime
+from datetime import datetime
 from .messages import FutureCompleted, MessageSink
+from .tracing import TRACER, activate, current_trace
 
 class ActivePlugin:
-	def __init__(self, plugin_name:str, completion_port:MessageSink, initial_state:str="ready"):
+	def __init__(self, plugin_name:str, completion_port:MessageSink, initial_state:str="ready", executor:Executor = None):
 		if plugin_name is None:
 			raise ValueError("plugin_name is None")
 		if completion_port is None:
@@ -12,7 +13,8 @@ class ActivePlugin:
 		# ready,sleep,future,notify
 		self.state = initial_state
 		self.wakeup_ts:datetime = None
-		self.executor:Executor = None
+		# pass a lease (ExecutorService.lease) to share a pool; shutdown() only cancels this plugin's work
+		self.executor:Executor = executor
 		self.port = completion_port
 
 	def alarm_clock(self, wakeup_ts:datetime):
@@ -31,12 +33,18 @@ class ActivePlugin:
 		if self.executor is None:
 			self.executor = ThreadPoolExecutor(max_workers=1)
 
-		p_future = self.executor.submit(cx)
+		# the worker thread does not inherit the caller's trace; carry it across explicitly
+		trace_id = current_trace()
+		def _traced():
+			with TRACER.span("plugin.future", trace_id):
+				return cx()
+		p_future = self.executor.submit(_traced)
 		def _future_completed(fx):
-			if fx.exception():
-				self.port.send(FutureCompleted(self.name, token, None, fx.exception()))
-			else:
-				self.port.send(FutureCompleted(self.name, token, fx.result()))
+			with activate(trace_id):
+				if fx.exception():
+					self.port.send(FutureCompleted(self.name, token, None, fx.exception()))
+				else:
+					self.port.send(FutureCompleted(self.name, token, fx.result()))
 
 		self.state = "future"
 		p_future.add_done_callback(_future_completed)
@@ -57,6 +65,19 @@ class ActivePlugin:
 			if self.wakeup_ts is None:
 				self.state = "ready"
 			elif schedule_ts >= self.wakeup_ts:
-				self.state == "ready"
+				self.state = "ready"
 				self.wakeup_ts = None
 
+	def next_wakeup(self) -> datetime|None:
+		"""
+		When the scheduler next needs to run this plugin: its alarm time while asleep, datetime.max while a future
+		or shutdown means no tick is needed (completion arrives as a message), None while ready (every tick).
+		"""
+		match self.state:
+			case "sleep":
+				return self.wakeup_ts
+			case "future" | "notify" | "shutdown":
+				return datetime.max
+			case _:
+				return None
+
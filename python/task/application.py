@@ -6,10 +6,13 @@ from ..model.configuration_manager import ConfigurationManager
 from .messages import ConfigureNotify, StartEvent, StopEvent, QuitMessage, ConfigureOptions, ConfigureEvent
 from .scheduler import Scheduler
 from .display import Display, DisplaySettings
-from .timer_tick import TimerTick
-from .basic_task import BasicTask, ExecuteMessage, QuitMessage
-from .message_router import MessageRouter, Route
+from .timer_tick import TICK_CONTROL_ROUTE, TimerTick
+from .basic_task import BasicTask, ExecuteMessage, QuitMessage, handles
+from .message_router import DROP_OLDEST, DeliveryPolicy, MessageRouter, Route
 from .telemetry_sink import TelemetrySink
+from .async_runtime import AsyncRuntime
+from .executor_service import POOL_RENDER, ExecutorService
+from .schedule_watcher import SCHEDULE_UPDATED_ROUTE
 
 class Application(BasicTask):
 	def __init__(self, name = None, sink: TelemetrySink = None):
@@ -17,46 +20,50 @@ class Application(BasicTask):
 		self.sink = sink
 		self.started = threading.Event()
 		self.cm:ConfigurationManager = None
+		self.async_runtime:AsyncRuntime = None
+		self.executors:ExecutorService = None
 
-	def execute(self, msg: ExecuteMessage):
-		# Handle Start and Stop events
-		if isinstance(msg, StartEvent):
-			try:
-				self._handleStart(msg)
-				self.logger.info(f"'{self.name}' started.")
-				self.started.set()
-			except Exception as e:
-				self.logger.error(f"Failed to start '{self.name}': {e}", exc_info=True)
-				self.stopped.set()
-		elif isinstance(msg, StopEvent):
-			try:
-				self._handleStop()
-			except Exception as e:
-				self.logger.error(f"Failed to stop '{self.name}': {e}", exc_info=True)
-			finally:
-				self.stopped.set()
-				self.logger.info(f"'{self.name}' stopped.")
-		elif isinstance(msg, DisplaySettings):
-			# STEP 3 configure scheduler (it also receives DisplaySettings)
-			self.logger.info(f"'{self.name}' DisplaySettings {msg.name} {msg.width} {msg.height}.")
-			configs = ConfigureEvent("scheduler", ConfigureOptions(cm=self.cm.duplicate()), self)
-			self.scheduler.send(configs)
-			pass
-		elif isinstance(msg, ConfigureNotify):
-			# STEP 4 start the timer if scheduler configured successfully
-			self.logger.info(f"'{self.name}' ConfigureNotify {msg.token} {msg.error} {msg.content}.")
-			if msg.error == True and self.sink:
-				self.sink.send(msg)
+	@handles(StartEvent)
+	def _start(self, msg: StartEvent):
+		try:
+			self._handleStart(msg)
+			self.logger.info(f"'{self.name}' started.")
+			self.started.set()
+		except Exception as e:
+			self.logger.error(f"Failed to start '{self.name}': {e}", exc_info=True)
+			self.stopped.set()
 
-			if msg.token == "scheduler":
-				if msg.error == False:
-					self.logger.info(f"'{self.name}' starting timer.")
-					self.timer.start()
-				else:
-					self.logger.error(f"'{self.name}' Cannot start the timer; scheduler failed to initialize")
-					self.logger.error(f"{msg.content}")
-		else:
-			self.logger.warning(f"'{self.name}' received unknown message: {msg}")
+	@handles(StopEvent)
+	def _stop(self, msg: StopEvent):
+		try:
+			self._handleStop()
+		except Exception as e:
+			self.logger.error(f"Failed to stop '{self.name}': {e}", exc_info=True)
+		finally:
+			self.stopped.set()
+			self.logger.info(f"'{self.name}' stopped.")
+
+	@handles(DisplaySettings)
+	def _display_settings(self, msg: DisplaySettings):
+		# STEP 3 configure scheduler (it also receives DisplaySettings)
+		self.logger.info(f"'{self.name}' DisplaySettings {msg.name} {msg.width} {msg.height}.")
+		configs = ConfigureEvent("scheduler", ConfigureOptions(cm=self.cm.duplicate()), self)
+		self.scheduler.send(configs)
+
+	@handles(ConfigureNotify)
+	def _configure_notify(self, msg: ConfigureNotify):
+		# STEP 4 start the timer if scheduler configured successfully
+		self.logger.info(f"'{self.name}' ConfigureNotify {msg.token} {msg.error} {msg.content}.")
+		if msg.error == True and self.sink:
+			self.sink.send(msg)
+
+		if msg.token == "scheduler":
+			if msg.error == False:
+				self.logger.info(f"'{self.name}' starting timer.")
+				self.timer.start()
+			else:
+				self.logger.error(f"'{self.name}' Cannot start the timer; scheduler failed to initialize")
+				self.logger.error(f"{msg.content}")
 
 	def quitMsg(self, msg: QuitMessage):
 		self.logger.info(f"'{self.name}' quitting.")
@@ -87,20 +94,29 @@ class Application(BasicTask):
 		# STEP 0 assemble tasks and routes
 		self.router = MessageRouter()
 		self.display = Display("Display", self.router)
-		self.scheduler = Scheduler("Scheduler", self.router)
+		self.executors = ExecutorService()
+		self.scheduler = Scheduler("Scheduler", self.router, self.executors)
+		if msg.options is not None and msg.options.asyncRuntime:
+			self.async_runtime = AsyncRuntime(name="TaskRuntime", executor=self.executors.lease(POOL_RENDER))
+			self.async_runtime.host(self.scheduler)
+			# panel refresh blocks; keep it off the loop thread
+			self.async_runtime.host(self.display, offload=True)
 		self.router.addRoute(Route("display", [self.display]))
 		self.router.addRoute(Route("scheduler", [self.scheduler]))
 		self.router.addRoute(Route("tick", [self.scheduler, self.display]))
 		self.router.addRoute(Route("display-settings", [self, self.scheduler]))
+		self.router.addRoute(Route(SCHEDULE_UPDATED_ROUTE, [self.scheduler]))
 		if self.sink is not None:
-			self.router.addRoute(Route('telemetry', [self.sink]))
+			# nothing guarantees the sink is drained; keep only the most recent telemetry
+			self.router.addRoute(Route('telemetry', [self.sink], DeliveryPolicy(DROP_OLDEST, 64)))
 		# STEP 1 configure the Display task
 		configd = ConfigureEvent("display", ConfigureOptions(cm=self.cm.duplicate()), self)
 		self.display.send(configd)
 		self.scheduler.start()
 		self.display.start()
 		# STEP 2 create but do not start timer
-		self.timer = msg.timerTask(self.router) if msg.timerTask is not None else TimerTick(self.router, interval=60, align_to_minute=True)
+		self.timer = msg.timerTask(self.router) if msg.timerTask is not None else TimerTick(self.router, interval=60, align_to_minute=True, adaptive=True)
+		self.router.addRoute(Route(TICK_CONTROL_ROUTE, [self.timer]))
 
 	def _handleStop(self):
 		if self.timer.is_alive():
@@ -113,3 +129,10 @@ class Application(BasicTask):
 		self.display.send(QuitMessage())
 		self.display.join()
 		self.logger.info("Display stopped");
+		self.router.shutdown()
+		if self.async_runtime is not None:
+			self.async_runtime.shutdown()
+			self.async_runtime = None
+		if self.executors is not None:
+			self.executors.shutdown()
+			self.executors = None
@@ -0,0 +1,88 @@
+import asyncio
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import logging
+import threading
+import weakref
+
+from .basic_task import BasicTask
+
+class AsyncRuntime:
+	"""
+	Runs BasicTask instances as coroutines on one event loop thread instead of one thread per task.
+	Message handlers run on the loop thread, one message (or batch) at a time per task, interleaved between tasks.
+	Tasks hosted with offload=True run their handlers on the shared executor instead, still in order.
+	Pass a lease from ExecutorService to run offloaded handlers on a shared pool.
+	Usage: call runtime.host(task) before task.start(); join()/is_alive() keep working.
+	"""
+	def __init__(self, max_workers:int = 2, name:str = "AsyncRuntime", executor:Executor = None):
+		self.name = name
+		self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+		self.loop = asyncio.new_event_loop()
+		self._offload = weakref.WeakSet()
+		self._started = threading.Event()
+		self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+		self.logger = logging.getLogger(__name__)
+
+	@property
+	def executor(self) -> Executor:
+		"""Pool that runs offloaded handlers."""
+		return self._executor
+
+	def start(self):
+		if not self._thread.is_alive():
+			self._thread.start()
+			self._started.wait()
+
+	def _run_loop(self):
+		asyncio.set_event_loop(self.loop)
+		self.loop.call_soon(self._started.set)
+		try:
+			self.loop.run_forever()
+		finally:
+			self.loop.close()
+			self.logger.info(f"'{self.name}' loop closed.")
+
+	def host(self, task:BasicTask, offload:bool = False):
+		"""
+		Arrange for task to run on this runtime when it is started.
+		:param offload: Run the task's handlers on the shared executor (for tasks that block, e.g. slow display refresh).
+		"""
+		task.runtime = self
+		if offload:
+			self._offload.add(task)
+
+	def attach(self, task:BasicTask) -> Future:
+		"""Called by BasicTask.start(); the returned future completes when the task has quit."""
+		self.start()
+		return asyncio.run_coroutine_threadsafe(self._host(task, task in self._offload), self.loop)
+
+	async def _host(self, task:BasicTask, offload:bool):
+		task.logger.info(f"'{task.name}' start (hosted on '{self.name}').")
+		wake = asyncio.Event()
+		loop = asyncio.get_running_loop()
+		loop_thread = threading.get_ident()
+		# sends from another hosted task are already on the loop thread and can skip the self-pipe
+		task._wakeup = lambda: wake.set() if threading.get_ident() == loop_thread else loop.call_soon_threadsafe(wake.set)
+		# messages may have been sent before the hook was installed
+		wake.set()
+		running = True
+		try:
+			while running:
+				await wake.wait()
+				wake.clear()
+				if offload:
+					running = await loop.run_in_executor(self._executor, task._process_pending)
+				else:
+					running = task._process_pending()
+		except Exception as e:
+			task.logger.error(f"'{task.name}' hosted.unhandled: {e}", exc_info=True)
+		finally:
+			task._wakeup = None
+			task.logger.info(f"'{task.name}' end {task.msg_queue.qsize()}.")
+
+	def shutdown(self):
+		"""Stop the loop; hosted tasks should have been sent a QuitMessage first."""
+		if self._thread.is_alive():
+			self.loop.call_soon_threadsafe(self.loop.stop)
+			self._thread.join()
+		self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,16 +1,74 @@
+from concurrent.futures import Future, wait
 import threading
 import queue
 import logging
 
 from .messages import MessageSink, BasicMessage, ExecuteMessage, QuitMessage
+from .mailbox import batch_done, get_batch
+
+class TaskStopped(ValueError):
+	"""Raised by BasicTask.send() once the task has been stopped."""
+	pass
+
+def handles(*msg_types: type):
+	"""
+	Mark a BasicTask method as the handler for the given message types (and their subclasses).
+	The default BasicTask.execute() dispatches to it.
+	"""
+	def decorator(fn):
+		fn._handles = getattr(fn, "_handles", ()) + msg_types
+		return fn
+	return decorator
 
 class BasicTask(threading.Thread, MessageSink):
 	"""Task that runs in its own thread and processes messages."""
-	def __init__(self, name=None):
+	# message type -> handler method name; built per class by __init_subclass__
+	_handler_map:dict[type, str] = {}
+	# message type -> resolved handler method name (or None), filled on first use
+	_handler_cache:dict[type, str|None] = {}
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		handlers = {}
+		for base in reversed(cls.__mro__):
+			for attr, fn in vars(base).items():
+				for msg_type in getattr(fn, "_handles", ()):
+					handlers[msg_type] = attr
+		cls._handler_map = handlers
+		cls._handler_cache = {}
+
+	@classmethod
+	def resolve_handler(cls, msg_type: type) -> str|None:
+		"""Name of the method handling msg_type, using the most-derived registered type in its MRO."""
+		try:
+			return cls._handler_cache[msg_type]
+		except KeyError:
+			handler = next((cls._handler_map[mt] for mt in msg_type.__mro__ if mt in cls._handler_map), None)
+			cls._handler_cache[msg_type] = handler
+			return handler
+
+	@classmethod
+	def handled_types(cls) -> list[type]:
+		return list(cls._handler_map.keys())
+
+	def __init__(self, name=None, mailbox: queue.Queue = None, batch_size: int = 1):
+		"""
+		:param name: Task (thread) name; defaults to the class name.
+		:param mailbox: Queue used for incoming messages, e.g. a PriorityMailbox; defaults to a FIFO queue.Queue.
+		:param batch_size: If greater than 1, drain up to this many pending messages at a time and pass them to execute_batch().
+		"""
 		super().__init__()
-		self.msg_queue = queue.Queue()
+		if batch_size < 1:
+			raise ValueError("batch_size must be at least 1")
+		self.msg_queue = mailbox if mailbox is not None else queue.Queue()
+		self.batch_size = batch_size
+		# set before start() to run on a shared AsyncRuntime instead of a dedicated thread
+		self.runtime = None
+		self._hosted:Future = None
+		self._wakeup:callable = None
 		self.name = name or self.__class__.__name__
 		self.stopped = threading.Event()
+		self.unhandled_types:dict[type, int] = {}
 		self.logger = logging.getLogger(__name__)
 
 	def _dispatch(self, msg):
@@ -28,14 +86,87 @@ class BasicTask(threading.Thread, MessageSink):
 		else:
 			self.logger.warning(f"'{self.name}' received unknown message type: {msg}")
 
+	def _dispatch_batch(self, msgs: list[BasicMessage]) -> bool:
+		"""Dispatch a drained batch. Returns True if it contained a QuitMessage."""
+		quit = next((ix for ix, mx in enumerate(msgs) if isinstance(mx, QuitMessage)), None)
+		pending = msgs if quit is None else msgs[:quit]
+		if len(pending) > 0:
+			try:
+				self.execute_batch(pending)
+			except Exception as e:
+				self.logger.error(f"execute_batch.unhandled '{self.name}': {e}", exc_info=True)
+		if quit is not None:
+			self._dispatch(msgs[quit])
+			return True
+		return False
+
+	def _process_pending(self) -> bool:
+		"""
+		Dispatch what is already in the mailbox without blocking (used by AsyncRuntime).
+		Returns False once the task has quit or its mailbox is shut down.
+		"""
+		while True:
+			try:
+				msgs = get_batch(self.msg_queue, self.batch_size, block=False)
+			except queue.Empty:
+				return True
+			except queue.ShutDown:
+				return False
+			try:
+				if self._dispatch_batch(msgs):
+					self.msg_queue.shutdown(immediate=True)
+					return False
+			finally:
+				batch_done(self.msg_queue, len(msgs))
+
+	def start(self):
+		if self.runtime is None:
+			super().start()
+		else:
+			self._hosted = self.runtime.attach(self)
+
+	def join(self, timeout=None):
+		if self._hosted is None:
+			super().join(timeout)
+		else:
+			wait([self._hosted], timeout)
+
+	def is_alive(self):
+		if self._hosted is None:
+			return super().is_alive()
+		return not self._hosted.done()
+
+	def _run_batched(self):
+		running = True
+		while running:
+			try:
+				msgs = get_batch(self.msg_queue, self.batch_size)
+				try:
+					if self._dispatch_batch(msgs):
+						self.msg_queue.shutdown(immediate=True)
+				finally:
+					batch_done(self.msg_queue, len(msgs))
+			except queue.ShutDown:
+				self.logger.debug(f"Queue shut down")
+				running = False
+			except Exception as e:
+				self.logger.error(f"'{self.name}' unhandled: {e}", exc_info=True)
+
 	def run(self):
 		self.logger.info(f"'{self.name}' start.")
+		if self.batch_size > 1:
+			self._run_batched()
+			self.logger.info(f"'{self.name}' end {self.msg_queue.qsize()}.")
+			return
 		running = True
 		while running:
 			try:
 				msg = self.msg_queue.get()
 				self._dispatch(msg)
 				self.msg_queue.task_done()
+				if isinstance(msg, QuitMessage):
+					# anything still queued (e.g. behind a prioritized quit) is abandoned
+					self.msg_queue.shutdown(immediate=True)
 			except queue.ShutDown:
 				self.logger.debug(f"Queue shut down")
 				running = False
@@ -52,12 +183,34 @@ class BasicTask(threading.Thread, MessageSink):
 		self.logger.info(f"'{self.name}' Quit.")
 
 	def execute(self, msg: ExecuteMessage):
-		"""Abstract method to execute a message."""
-		pass
+		"""Dispatch to the @handles method registered for the message type. Override for custom dispatch."""
+		handler = self.resolve_handler(type(msg))
+		if handler is None:
+			self.unhandled(msg)
+			return
+		getattr(self, handler)(msg)
+
+	def unhandled(self, msg: ExecuteMessage):
+		"""Called for messages without a registered handler; each type is reported once and counted."""
+		msg_type = type(msg)
+		count = self.unhandled_types.get(msg_type, 0)
+		if count == 0 and len(self._handler_map) > 0:
+			self.logger.warning(f"'{self.name}' has no handler for {msg_type.__name__}: {msg}")
+		self.unhandled_types[msg_type] = count + 1
+
+	def execute_batch(self, msgs: list[BasicMessage]):
+		"""
+		Handle a batch of messages drained in one go (batch_size > 1); never contains a QuitMessage.
+		Default falls back to per-message dispatch; override to coalesce bursts.
+		"""
+		for msg in msgs:
+			self._dispatch(msg)
 
 	def send(self, msg: BasicMessage):
 		if self.msg_queue.is_shutdown:
-			raise ValueError("Cannot send message to stopped task.")
+			raise TaskStopped("Cannot send message to stopped task.")
 		self.msg_queue.put(msg)
 		if isinstance(msg, QuitMessage):
-			self.msg_queue.shutdown()
\ No newline at end of file
+			self.msg_queue.shutdown()
+		if self._wakeup is not None:
+			self._wakeup()
\ No newline at end of file
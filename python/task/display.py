@@ -6,12 +6,15 @@ from ..display.mock_display import MockDisplay
 from ..display.tkinter_window import TkinterWindow
 from ..display.display_base import DisplayBase
 from ..model.configuration_manager import ConfigurationManager
-from ..task.basic_task import BasicTask
+from ..task.basic_task import BasicTask, handles
 from ..task.timer_tick import TickMessage
 from ..task.messages import ConfigureEvent, ExecuteMessage, QuitMessage
 from .message_router import MessageRouter
+from .mailbox import PriorityMailbox
+from .tracing import TRACER, activate
 
 class DisplayImage(ExecuteMessage):
+	__slots__ = ("title", "img")
 	def __init__(self, title:str, img: Image):
 		super().__init__()
 		self.title = title
@@ -24,6 +27,7 @@ class DisplaySettings(ExecuteMessage):
 	"""
 	Notify tasks of the current display settings.
 	"""
+	__slots__ = ("name", "width", "height")
 	def __init__(self, name:str, width: int, height: int):
 		super().__init__()
 		self.name = name
@@ -34,7 +38,8 @@ class DisplaySettings(ExecuteMessage):
 
 class Display(BasicTask):
 	def __init__(self, name, router:MessageRouter):
-		super().__init__(name)
+		# configuration goes ahead of frames; only the newest pending frame/tick is kept
+		super().__init__(name, PriorityMailbox({ ConfigureEvent: 10 }, [DisplayImage, TickMessage]))
 		if router is None:
 			raise ValueError("router is None")
 		self.router = router
@@ -58,43 +63,57 @@ class Display(BasicTask):
 
 	def execute(self, msg: ExecuteMessage):
 		self.logger.info(f"'{self.name}' receive: {msg}")
-		if isinstance(msg, ConfigureEvent):
-			try:
-				self.cm = msg.content.cm
-				settings = self.cm.settings_manager()
-				self.display_settings = settings.load_settings("display")
-				display_type = self.display_settings.get("display_type", None)
-				if display_type == "mock":
-					self.display = MockDisplay("mock")
-				elif display_type == "tk":
-					self.display = TkinterWindow("tk")
-				else:
-					raise ValueError(f"Unrecognized display type: '{display_type}'")
-				self.resolution = self.display.initialize(self.cm)
-				self.logger.info(f"Loading display {display_type} {self.resolution[0]}x{self.resolution[1]}")
-				msg.notify()
-				self.router.send("display-settings", DisplaySettings(display_type, self.resolution[0], self.resolution[1]))
-			except Exception as e:
-				self.logger.error(f"configure.unhandled: {str(e)}")
-				msg.notify(True, e)
-		elif isinstance(msg, TickMessage):
-			self.lastTickSeen = msg
-		elif isinstance(msg, DisplayImage):
-			try:
-				self.displayImageCount += 1
-				self.logger.info(f"Display {self.displayImageCount} '{msg.title}'")
-				if self.display is None:
-					self.logger.error("No driver is loaded")
-					return
-				# Resize and adjust orientation
-				image = msg.img
-				if self.display_settings is not None:
+		super().execute(msg)
+
+	@handles(ConfigureEvent)
+	def _configure(self, msg: ConfigureEvent):
+		try:
+			self.cm = msg.content.cm
+			settings = self.cm.settings_manager()
+			self.display_settings = settings.load_settings("display")
+			display_type = self.display_settings.get("display_type", None)
+			if display_type == "mock":
+				self.display = MockDisplay("mock")
+			elif display_type == "tk":
+				self.display = TkinterWindow("tk")
+			else:
+				raise ValueError(f"Unrecognized display type: '{display_type}'")
+			self.resolution = self.display.initialize(self.cm)
+			self.logger.info(f"Loading display {display_type} {self.resolution[0]}x{self.resolution[1]}")
+			msg.notify()
+			self.router.send("display-settings", DisplaySettings(display_type, self.resolution[0], self.resolution[1]))
+		except Exception as e:
+			self.logger.error(f"configure.unhandled: {str(e)}")
+			msg.notify(True, e)
+
+	@handles(TickMessage)
+	def _tick(self, msg: TickMessage):
+		self.lastTickSeen = msg
+
+	@handles(DisplayImage)
+	def _display_image(self, msg: DisplayImage):
+		with activate(msg.trace_id):
+			self._render_image(msg)
+		TRACER.complete(msg.trace_id)
+
+	def _render_image(self, msg: DisplayImage):
+		try:
+			self.displayImageCount += 1
+			self.logger.info(f"Display {self.displayImageCount} '{msg.title}'")
+			if self.display is None:
+				self.logger.error("No driver is loaded")
+				return
+			# Resize and adjust orientation
+			image = msg.img
+			if self.display_settings is not None:
+				with TRACER.span("resize"):
 					image = change_orientation(image, self.display_settings.get("orientation", "landscape"))
 					image = resize_image(image, self.resolution)
 					if self.display_settings.get("rotate180", False): image = image.rotate(180)
 					image = apply_image_enhancement(image, self.display_settings)
 
+			with TRACER.span("panel"):
 				self.display.render(image, msg.title)
-			except Exception as e:
-				self.logger.error("displayimage.unhandled", e)
-				pass
\ No newline at end of file
+		except Exception as e:
+			self.logger.error("displayimage.unhandled", e)
+			pass
\ No newline at end of file
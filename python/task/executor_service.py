@@ -0,0 +1,162 @@
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import logging
+import threading
+import time
+
+POOL_IO:str = "io"
+POOL_CPU:str = "cpu"
+POOL_RENDER:str = "render"
+
+# sized for a small board; the sum is the process-wide cap on pool threads
+DEFAULT_POOLS:dict[str,int] = { POOL_IO: 3, POOL_CPU: 1, POOL_RENDER: 1 }
+DEFAULT_MAX_WORKERS:int = 6
+
+class MeteredPool:
+	"""A named ThreadPoolExecutor that tracks queue depth and wait/run latency."""
+	def __init__(self, name:str, max_workers:int):
+		self.name = name
+		self.max_workers = max_workers
+		self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"pool-{name}")
+		self._lock = threading.Lock()
+		self.submitted = 0
+		self.completed = 0
+		self.failed = 0
+		self.cancelled = 0
+		self.pending = 0
+		self.active = 0
+		self.wait_total = 0.0
+		self.wait_max = 0.0
+		self.run_total = 0.0
+		self.run_max = 0.0
+
+	def submit(self, fn, /, *args, **kwargs) -> Future:
+		queued = time.monotonic()
+		def _metered():
+			started = time.monotonic()
+			waited = started - queued
+			with self._lock:
+				self.pending -= 1
+				self.active += 1
+				self.wait_total += waited
+				self.wait_max = max(self.wait_max, waited)
+			ok = False
+			try:
+				retv = fn(*args, **kwargs)
+				ok = True
+				return retv
+			finally:
+				ran = time.monotonic() - started
+				with self._lock:
+					self.active -= 1
+					self.completed += 1
+					if not ok:
+						self.failed += 1
+					self.run_total += ran
+					self.run_max = max(self.run_max, ran)
+		with self._lock:
+			self.submitted += 1
+			self.pending += 1
+		future = self._pool.submit(_metered)
+		future.add_done_callback(self._on_done)
+		return future
+
+	def _on_done(self, future:Future):
+		if future.cancelled():
+			with self._lock:
+				self.pending -= 1
+				self.cancelled += 1
+
+	def stats(self) -> dict[str,any]:
+		with self._lock:
+			started = self.completed + self.active
+			return {
+				"workers": self.max_workers,
+				"submitted": self.submitted,
+				"completed": self.completed,
+				"failed": self.failed,
+				"cancelled": self.cancelled,
+				"pending": self.pending,
+				"active": self.active,
+				"wait_avg_ms": (self.wait_total / started) * 1000 if started > 0 else 0.0,
+				"wait_max_ms": self.wait_max * 1000,
+				"run_avg_ms": (self.run_total / self.completed) * 1000 if self.completed > 0 else 0.0,
+				"run_max_ms": self.run_max * 1000,
+			}
+
+	def shutdown(self, wait:bool = True, cancel_futures:bool = False):
+		self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+class PoolLease(Executor):
+	"""
+	One consumer's view of a shared pool.
+	shutdown() only affects futures submitted through this lease; the pool itself keeps running.
+	"""
+	def __init__(self, pool:MeteredPool):
+		self._pool = pool
+		self._futures:set[Future] = set()
+		self._lock = threading.Lock()
+		self._shutdown = False
+
+	@property
+	def pool_name(self) -> str:
+		return self._pool.name
+
+	def submit(self, fn, /, *args, **kwargs) -> Future:
+		with self._lock:
+			if self._shutdown:
+				raise RuntimeError(f"cannot schedule new futures after shutdown (pool '{self._pool.name}')")
+			future = self._pool.submit(fn, *args, **kwargs)
+			self._futures.add(future)
+		future.add_done_callback(self._release)
+		return future
+
+	def _release(self, future:Future):
+		with self._lock:
+			self._futures.discard(future)
+
+	def shutdown(self, wait:bool = True, *, cancel_futures:bool = False):
+		with self._lock:
+			self._shutdown = True
+			futures = list(self._futures)
+		if cancel_futures:
+			for fx in futures:
+				fx.cancel()
+		if wait:
+			for fx in futures:
+				if not fx.cancelled():
+					try:
+						fx.exception()
+					except Exception:
+						pass
+
+class ExecutorService:
+	"""
+	Process-wide registry of named, bounded thread pools (io, cpu, render by default).
+	Consumers take a lease() instead of creating their own ThreadPoolExecutor, so threads are reused and
+	total concurrency is capped. Register it in a ServiceContainer to share it with plugins.
+	"""
+	def __init__(self, pools:dict[str,int] = None, max_workers:int = DEFAULT_MAX_WORKERS):
+		pools = pools if pools is not None else DEFAULT_POOLS
+		total = sum(pools.values())
+		if total > max_workers:
+			raise ValueError(f"pools request {total} workers; cap is {max_workers}")
+		self.max_workers = max_workers
+		self._pools = { name: MeteredPool(name, size) for name, size in pools.items() }
+		self.logger = logging.getLogger(__name__)
+
+	def pool(self, name:str) -> MeteredPool:
+		pool = self._pools.get(name, None)
+		if pool is None:
+			raise ValueError(f"Unknown pool '{name}'")
+		return pool
+
+	def lease(self, name:str = POOL_IO) -> Executor:
+		return PoolLease(self.pool(name))
+
+	def stats(self) -> dict[str, dict[str,any]]:
+		return { name: pool.stats() for name, pool in self._pools.items() }
+
+	def shutdown(self, cancel_futures:bool = True):
+		self.logger.debug(f"Shutting down pools {list(self._pools.keys())}")
+		for pool in self._pools.values():
+			pool.shutdown(wait=True, cancel_futures=cancel_futures)
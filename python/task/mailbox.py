@@ -0,0 +1,93 @@
+import heapq
+import itertools
+import queue
+
+from .messages import BasicMessage, QuitMessage
+
+PRIORITY_QUIT:int = 0
+PRIORITY_DEFAULT:int = 100
+
+def _lookup(table: dict[type, any], msg: BasicMessage):
+	"""Find the entry for the most-derived class of msg present in table (honours MRO)."""
+	for cls in type(msg).__mro__:
+		if cls in table:
+			return (cls, table[cls])
+	return (None, None)
+
+class PriorityMailbox(queue.Queue):
+	"""
+	Drop-in replacement for queue.Queue as a BasicTask mailbox.
+	Messages are delivered lowest priority value first, FIFO within the same priority.
+	QuitMessage always has PRIORITY_QUIT so shutdown is not delayed by a backlog.
+	Coalesced types keep at most one pending message; a newer one replaces the pending one in place.
+	"""
+	def __init__(self, priorities: dict[type, int] = None, coalesce: list[type] = None, default_priority: int = PRIORITY_DEFAULT):
+		self.priorities = { QuitMessage: PRIORITY_QUIT }
+		if priorities is not None:
+			self.priorities.update(priorities)
+		self.coalesce_types = { cx: True for cx in coalesce } if coalesce is not None else {}
+		self.default_priority = default_priority
+		self.coalesced = 0
+		super().__init__()
+
+	def priority_of(self, msg: BasicMessage) -> int:
+		(_, priority) = _lookup(self.priorities, msg)
+		return priority if priority is not None else self.default_priority
+
+	# queue.Queue overrides; these are called with self.mutex held
+	def _init(self, maxsize):
+		self._heap = []
+		self._pending:dict[type, list] = {}
+		self._seq = itertools.count()
+
+	def _qsize(self):
+		return len(self._heap)
+
+	def _put(self, msg: BasicMessage):
+		(key, _) = _lookup(self.coalesce_types, msg)
+		if key is not None:
+			entry = self._pending.get(key, None)
+			if entry is not None:
+				# superseded: keep the queue position, swap the payload
+				entry[2] = msg
+				self.coalesced += 1
+				# put() counts this as a new unfinished task; the replaced one will never be get()
+				self.unfinished_tasks -= 1
+				return
+		entry = [self.priority_of(msg), next(self._seq), msg, key]
+		if key is not None:
+			self._pending[key] = entry
+		heapq.heappush(self._heap, entry)
+
+	def _get(self):
+		entry = heapq.heappop(self._heap)
+		key = entry[3]
+		if key is not None and self._pending.get(key, None) is entry:
+			del self._pending[key]
+		return entry[2]
+
+def get_batch(mailbox: queue.Queue, limit: int, block: bool = True) -> list[BasicMessage]:
+	"""
+	Get the next message, then take up to limit-1 more that are already pending, under a single lock acquisition.
+	Raises queue.ShutDown like queue.Queue.get(), and queue.Empty if not block and nothing is pending.
+	Each returned message must be acknowledged, e.g. with batch_done().
+	"""
+	batch = [mailbox.get(block=block)]
+	with mailbox.mutex:
+		while len(batch) < limit and mailbox._qsize() > 0:
+			batch.append(mailbox._get())
+		if len(batch) > 1:
+			mailbox.not_full.notify(len(batch) - 1)
+	return batch
+
+def batch_done(mailbox: queue.Queue, count: int) -> None:
+	"""Equivalent to calling task_done() count times."""
+	if count <= 0:
+		return
+	with mailbox.all_tasks_done:
+		unfinished = mailbox.unfinished_tasks - count
+		if unfinished < 0:
+			raise ValueError('task_done() called too many times')
+		if unfinished == 0:
+			mailbox.all_tasks_done.notify_all()
+		mailbox.unfinished_tasks = unfinished
@@ -1,34 +1,251 @@
+from collections import deque
 from queue import ShutDown
+from types import MappingProxyType
 import threading
 import logging
-from typing import List
+import time
+from typing import List, Mapping
 
-from .basic_task import MessageSink
-from .messages import BasicMessage
+from .basic_task import MessageSink, TaskStopped
+from .messages import BasicMessage, Telemetry
+from .tracing import TRACER
+
+DROP_OLDEST:str = "drop-oldest"
+DROP_NEWEST:str = "drop-newest"
+BLOCK:str = "block"
+LATEST:str = "latest"
+
+class DeliveryPolicy:
+	"""
+	Asynchronous, bounded delivery for a Route.
+	Each receiver gets an outbox of at most capacity messages, drained by its own delivery thread.
+	When the outbox is full:
+	 drop-oldest  discard the oldest pending message
+	 drop-newest  discard the incoming message
+	 block        wait up to timeout seconds for room, then discard the incoming message
+	 latest       keep only the most recent message (capacity is 1)
+	If the receiver has a msg_queue (e.g. BasicTask) delivery also waits while that queue holds capacity or more messages,
+	so a stalled consumer is bounded as well.
+	"""
+	def __init__(self, mode:str = DROP_OLDEST, capacity:int = 16, timeout:float = 1.0):
+		if mode not in (DROP_OLDEST, DROP_NEWEST, BLOCK, LATEST):
+			raise ValueError(f"Unknown delivery mode '{mode}'")
+		if capacity < 1:
+			raise ValueError("capacity must be at least 1")
+		self.mode = mode
+		self.capacity = 1 if mode == LATEST else capacity
+		self.timeout = timeout
+
+class RouteOutbox(MessageSink):
+	"""Bounded buffer in front of one receiver, applying a DeliveryPolicy."""
+	def __init__(self, name:str, receiver:MessageSink, policy:DeliveryPolicy):
+		self.receiver = receiver
+		self.policy = policy
+		self.pending = deque()
+		self.dropped = 0
+		self.overflow = 0
+		self.delivered = 0
+		self.errors = 0
+		self.closed = False
+		self.cv = threading.Condition()
+		self.logger = logging.getLogger(__name__)
+		self.thread = threading.Thread(target=self._run, name=f"outbox-{name}", daemon=True)
+		self.thread.start()
+
+	def send(self, msg: BasicMessage):
+		with self.cv:
+			if self.closed:
+				raise ShutDown
+			if len(self.pending) >= self.policy.capacity:
+				self.overflow += 1
+				match self.policy.mode:
+					case "drop-newest":
+						self.dropped += 1
+						return
+					case "block":
+						if not self.cv.wait_for(lambda: self.closed or len(self.pending) < self.policy.capacity, self.policy.timeout) or self.closed:
+							self.dropped += 1
+							return
+					case _:
+						self.pending.popleft()
+						self.dropped += 1
+			self.pending.append(msg)
+			self.cv.notify_all()
+
+	def close(self):
+		with self.cv:
+			self.closed = True
+			self.pending.clear()
+			self.cv.notify_all()
+
+	def stats(self) -> dict[str,int]:
+		with self.cv:
+			return { "pending": len(self.pending), "dropped": self.dropped, "overflow": self.overflow }
+
+	def _wait_for_receiver(self):
+		mailbox = getattr(self.receiver, "msg_queue", None)
+		if mailbox is None or not hasattr(mailbox, "not_full"):
+			return
+		# queue.Queue notifies not_full after every get(); the timeout covers missed notifications
+		with mailbox.not_full:
+			while not self.closed and not mailbox.is_shutdown and mailbox._qsize() >= self.policy.capacity:
+				mailbox.not_full.wait(0.5)
+
+	def _run(self):
+		while True:
+			with self.cv:
+				self.cv.wait_for(lambda: self.closed or len(self.pending) > 0)
+				if self.closed:
+					return
+			self._wait_for_receiver()
+			with self.cv:
+				if self.closed or len(self.pending) == 0:
+					continue
+				msg = self.pending.popleft()
+				self.cv.notify_all()
+			# counters are shared with send() on other threads
+			try:
+				self.receiver.send(msg)
+				with self.cv:
+					self.delivered += 1
+			except (ShutDown, TaskStopped):
+				with self.cv:
+					self.dropped += 1
+			except Exception as e:
+				with self.cv:
+					self.errors += 1
+				self.logger.error(f"outbox.unexpected: {str(e)}")
 
 class Route:
-	def __init__(self, name:str, receivers:List[MessageSink]):
+	def __init__(self, name:str, receivers:List[MessageSink], policy:DeliveryPolicy = None):
 		self.name = name
-		self.receivers = receivers
+		# receivers are fixed once the route is created; the router shares this tuple between threads
+		self.receivers = tuple(receivers)
+		self.policy = policy
+		# with a policy, send() only hands off to the per-receiver outboxes
+		self.outboxes = tuple(RouteOutbox(f"{name}-{ix}", rx, policy) for ix, rx in enumerate(receivers)) if policy is not None else ()
+		self.sent = 0
+		self.delivered = 0
+		self.rejected = 0
+		self.errors = 0
+		self._counter_lock = threading.Lock()
+
+	@property
+	def targets(self) -> tuple[MessageSink, ...]:
+		return self.outboxes if self.policy is not None else self.receivers
+
+	def close(self):
+		for ox in self.outboxes:
+			ox.close()
+
+	def count(self, delivered:int, rejected:int, errors:int):
+		with self._counter_lock:
+			self.sent += 1
+			self.delivered += delivered
+			self.rejected += rejected
+			self.errors += errors
+
+	def stats(self) -> dict[str,int]:
+		# for a policy route "delivered" counts hand-offs to the outboxes; "dropped" covers what they discarded
+		with self._counter_lock:
+			retv = { "sent": self.sent, "delivered": self.delivered, "rejected": self.rejected, "errors": self.errors }
+		if self.policy is not None:
+			retv["pending"] = 0
+			retv["dropped"] = 0
+			retv["overflow"] = 0
+			for ox in self.outboxes:
+				for key, value in ox.stats().items():
+					retv[key] += value
+		return retv
+
+TELEMETRY_ROUTE:str = "telemetry"
 
 class MessageRouter:
-	def __init__(self):
-		self.routes = {}
+	def __init__(self, telemetry_interval:float = 60):
+		"""
+		:param telemetry_interval: Minimum seconds between drop/overflow reports on the telemetry route.
+		"""
+		# immutable snapshot; replaced (never mutated) by addRoute/removeRoute so send() can read it without locking
+		self.routes:Mapping[str, Route] = MappingProxyType({})
 		self.logger = logging.getLogger(__name__)
+		# serializes writers only
 		self.lock = threading.Lock()
+		self.telemetry_interval = telemetry_interval
+		self._last_report = {}
+		self._report_lock = threading.Lock()
 
 	def addRoute(self, route:Route):
+		"""Add route; the first registration of a name wins (a duplicate is closed, stopping its delivery threads)."""
 		with self.lock:
-			self.routes.setdefault(route.name, route)
+			duplicate = route.name in self.routes
+			if not duplicate:
+				routes = dict(self.routes)
+				routes[route.name] = route
+				self.routes = MappingProxyType(routes)
+		if duplicate:
+			self.logger.warning(f"Route '{route.name}' already exists; ignoring the new one.")
+			route.close()
 
-	def send(self, route:str, msg: BasicMessage):
+	def removeRoute(self, name:str) -> Route|None:
+		with self.lock:
+			if name not in self.routes:
+				return None
+			routes = dict(self.routes)
+			route = routes.pop(name)
+			self.routes = MappingProxyType(routes)
+		route.close()
+		return route
+
+	def shutdown(self):
+		"""Remove all routes and stop their delivery threads."""
 		with self.lock:
-			rroute = self.routes.get(route, None)
-			if rroute is not None:
-				for kx in rroute.receivers:
-					try:
-						kx.send(msg)
-					except ShutDown:
-						pass
-					except Exception as e:
-						self.logger.error(f"send.unexpected: {str(e)}")
+			routes = self.routes
+			self.routes = MappingProxyType({})
+		for route in routes.values():
+			route.close()
+
+	def route_stats(self) -> dict[str, dict[str,int]]:
+		routes = self.routes
+		return { name: route.stats() for name, route in routes.items() }
+
+	def send(self, route:str, msg: BasicMessage):
+		rroute = self.routes.get(route, None)
+		if rroute is None:
+			return
+		if msg.trace_id is not None:
+			with TRACER.span(f"route:{route}", msg.trace_id):
+				self._deliver(rroute, msg)
+		else:
+			self._deliver(rroute, msg)
+		if rroute.policy is not None and route != TELEMETRY_ROUTE:
+			self._report_drops(rroute)
+
+	def _deliver(self, rroute:Route, msg: BasicMessage):
+		delivered = 0
+		rejected = 0
+		errors = 0
+		for kx in rroute.targets:
+			try:
+				kx.send(msg)
+				delivered += 1
+			except (ShutDown, TaskStopped):
+				# receiver has stopped
+				rejected += 1
+			except Exception as e:
+				errors += 1
+				self.logger.error(f"send.unexpected: {str(e)}")
+		rroute.count(delivered, rejected, errors)
+
+	def _report_drops(self, route:Route):
+		"""Publish delivery statistics for a policy route when it has dropped messages, at most once per interval."""
+		now = time.monotonic()
+		with self._report_lock:
+			last = self._last_report.get(route.name, None)
+			if last is not None and now - last < self.telemetry_interval:
+				return
+			stats = route.stats()
+			if stats["dropped"] == 0 and stats["overflow"] == 0:
+				return
+			# claimed under the lock so concurrent senders report once
+			self._last_report[route.name] = now
+		self.send(TELEMETRY_ROUTE, Telemetry(f"route:{route.name}", stats))
@@ -1,15 +1,37 @@
 from typing import Protocol
 from typing import Generic, TypeVar
 from datetime import datetime
+import time
 
 from ..model.configuration_manager import ConfigurationManager
+from ..model.schedule_manager import ScheduleSnapshot
+from .tracing import current_trace
 
 T = TypeVar('T')
 
 class BasicMessage:
-	"""Base class for all messages."""
-	def __init__(self, timestamp: datetime = datetime.now()):
-		self.timestamp = timestamp
+	"""
+	Base class for all messages.
+	Subclasses declare __slots__ so messages stay small; subclasses without __slots__ still work (with a __dict__).
+	created is the time.monotonic() at construction; use it for latencies.
+	The wall clock is read per message too (as a float), so timestamps follow clock steps and suspend/resume.
+	trace_id is inherited from the trace being handled when the message is created (see tracing).
+	"""
+	__slots__ = ("created", "_wall", "_timestamp", "trace_id")
+	def __init__(self, timestamp: datetime = None):
+		self.created = time.monotonic()
+		self._wall = time.time() if timestamp is None else None
+		self._timestamp = timestamp
+		self.trace_id = current_trace()
+	@property
+	def timestamp(self) -> datetime:
+		"""The explicit timestamp, else the wall-clock time of construction (derived on first use)."""
+		if self._timestamp is None:
+			self._timestamp = datetime.fromtimestamp(self._wall)
+		return self._timestamp
+	@timestamp.setter
+	def timestamp(self, value: datetime):
+		self._timestamp = value
 
 class MessageSink(Protocol):
 	def send(self, msg: BasicMessage):
@@ -17,36 +39,43 @@ class MessageSink(Protocol):
 
 class QuitMessage(BasicMessage):
 	"""Message to signal the thread to quit."""
-	def __init__(self, timestamp: datetime = datetime.now()):
+	__slots__ = ()
+	def __init__(self, timestamp: datetime = None):
 		super().__init__(timestamp)
 
 class ExecuteMessage(BasicMessage):
 	"""Message to execute a command."""
-	def __init__(self, timestamp: datetime = datetime.now()):
+	__slots__ = ()
+	def __init__(self, timestamp: datetime = None):
 		super().__init__(timestamp)
 
 class ExecuteMessageWithContent(ExecuteMessage, Generic[T]):
 	"""Message to execute a command with content."""
-	def __init__(self, content: T, timestamp: datetime = datetime.now()):
+	__slots__ = ("content",)
+	def __init__(self, content: T, timestamp: datetime = None):
 		super().__init__(timestamp)
 		self.content = content
 
 class StartOptions:
 	"""Options for starting the application."""
-	def __init__(self, basePath: str = None, storagePath: str = None, hardReset: bool = False):
+	def __init__(self, basePath: str = None, storagePath: str = None, hardReset: bool = False, asyncRuntime: bool = False):
 		self.basePath = basePath
 		self.storagePath = storagePath
 		self.hardReset = hardReset
+		# host Scheduler and Display on a shared AsyncRuntime instead of a thread each
+		self.asyncRuntime = asyncRuntime
 class StartEvent(ExecuteMessage):
 	"""Event to start the application with given options and timer task."""
-	def __init__(self, options: StartOptions = None, timerTask: callable = None, timestamp: datetime = datetime.now()):
+	__slots__ = ("options", "timerTask")
+	def __init__(self, options: StartOptions = None, timerTask: callable = None, timestamp: datetime = None):
 		super().__init__(timestamp)
 		self.options = options
 		self.timerTask = timerTask
 
 class StopEvent(ExecuteMessage):
 	"""Event to stop the application."""
-	def __init__(self, timestamp: datetime = datetime.now()):
+	__slots__ = ()
+	def __init__(self, timestamp: datetime = None):
 		super().__init__(timestamp)
 
 class ConfigureOptions:
@@ -58,7 +87,8 @@ class ConfigureOptions:
 
 class ConfigureEvent(ExecuteMessageWithContent[ConfigureOptions]):
 	"""Event to configure tasks with given options."""
-	def __init__(self, token: str, content = None, notifyTo: MessageSink = None, timestamp: datetime = datetime.now()):
+	__slots__ = ("token", "notifyTo")
+	def __init__(self, token: str, content = None, notifyTo: MessageSink = None, timestamp: datetime = None):
 		super().__init__(content, timestamp)
 		self.token = token
 		self.notifyTo = notifyTo
@@ -68,14 +98,26 @@ class ConfigureEvent(ExecuteMessageWithContent[ConfigureOptions]):
 			self.notifyTo.send(ConfigureNotify(self.token, error, content))
 
 class ConfigureNotify(ExecuteMessage):
-	def __init__(self, token: str, error: bool = False, content = None, timestamp: datetime = datetime.now()):
+	__slots__ = ("token", "error", "content")
+	def __init__(self, token: str, error: bool = False, content = None, timestamp: datetime = None):
 		super().__init__(timestamp)
 		self.token = token
 		self.error = error
 		self.content = content
 
+class ScheduleUpdated(ExecuteMessage):
+	"""Schedule files changed on disk; swap to snapshot (already validated). changed: the file names that triggered it."""
+	__slots__ = ("snapshot", "changed")
+	def __init__(self, snapshot: ScheduleSnapshot, changed: list[str] = None, timestamp: datetime = None):
+		super().__init__(timestamp)
+		self.snapshot = snapshot
+		self.changed = changed if changed is not None else []
+	def __repr__(self):
+		return f"ScheduleUpdated(changed={self.changed})"
+
 class FutureCompleted(ExecuteMessage):
-	def __init__(self, plugin_name: str, token: str, result, error = None, timestamp: datetime = datetime.now()):
+	__slots__ = ("plugin_name", "token", "result", "error", "is_success")
+	def __init__(self, plugin_name: str, token: str, result, error = None, timestamp: datetime = None):
 		super().__init__(timestamp)
 		self.plugin_name = plugin_name
 		self.token = token
@@ -86,11 +128,13 @@ class FutureCompleted(ExecuteMessage):
 		return f" plugin_name='{self.plugin_name}' token='{self.token}' is_success={self.is_success} error={self.error} result={self.result}"
 
 class PluginReceive(ExecuteMessage):
+	__slots__ = ()
 	def __init__(self, timestamp: datetime = None):
 		super().__init__(timestamp)
 
 class Telemetry(BasicMessage):
-	def __init__(self, name: str, values: dict[str,any], timestamp: datetime = datetime.now()):
+	__slots__ = ("_name", "_values")
+	def __init__(self, name: str, values: dict[str,any], timestamp: datetime = None):
 		super().__init__(timestamp)
 		self._name = name
 		self._values = values
@@ -2,51 +2,78 @@ from datetime import datetime
 import logging
 
 from ..datasources.data_source import DataSourceManager
-from ..model.schedule import MasterSchedule, Playlist, PlaylistBase
+from ..model.schedule import Playlist, PlaylistBase
+from ..model.schedule_manager import ScheduleSnapshot
 from ..model.service_container import ServiceContainer
 from ..plugins.plugin_base import BasicExecutionContext2, PluginBase, PluginProtocol
+from ..plugins.plugin_registry import PluginRegistry
 from ..task.timer import TimerService
 from ..model.configuration_manager import ConfigurationManager, SettingsConfigurationManager, StaticConfigurationManager
 from .display import DisplaySettings
-from .messages import ConfigureEvent, ExecuteMessage, MessageSink, PluginReceive, QuitMessage, Telemetry
+from .messages import ConfigureEvent, ExecuteMessage, MessageSink, PluginReceive, QuitMessage, ScheduleUpdated, Telemetry
 from .message_router import MessageRouter
-from .basic_task import BasicTask
+from .executor_service import POOL_IO, ExecutorService
+from .basic_task import BasicTask, handles
 
 class PlaylistLayerMessage(ExecuteMessage):
+	__slots__ = ()
 	def __init__(self, timestamp=None):
 		super().__init__(timestamp)
 class StartPlayback(PlaylistLayerMessage):
+	__slots__ = ()
 	def __init__(self, timestamp=None):
 		super().__init__(timestamp)
 class NextTrack(PlaylistLayerMessage):
+	__slots__ = ()
 	def __init__(self, timestamp=None):
 		super().__init__(timestamp)
 
+PLAYLIST_BATCH_SIZE:int = 16
+# upcoming tracks prepared (opened and rendered, not displayed) while the current one plays; 0 disables
+LOOKAHEAD_DEPTH:int = 1
+
+# (playlist_index, playlist, track_index, track)
+type TrackPosition = tuple[int, Playlist, int, PlaylistBase]
+
 class PlaylistLayer(BasicTask):
-	def __init__(self, name, router: MessageRouter):
-		super().__init__(name)
+	def __init__(self, name, router: MessageRouter, executors: ExecutorService = None, lookahead: int = LOOKAHEAD_DEPTH):
+		super().__init__(name, batch_size=PLAYLIST_BATCH_SIZE)
 		if router is None:
 			raise ValueError("router is None")
 		self.router = router
+		# shared pools outlive configure/track changes; only shut down here if created here
+		self.executors = executors
+		self.owns_executors = executors is None
 		self.cm:ConfigurationManager = None
 		self.playlists = []
-		self.master_schedule:MasterSchedule = None
+		self.snapshot:ScheduleSnapshot = None
 		self.plugin_info = None
+		self.plugins:PluginRegistry = None
 		self.datasources: DataSourceManager = None
 		self.timer: TimerService = None
 		self.dimensions = [800,480]
 		self.playlist_state = None
 		self.active_plugin: PluginProtocol = None
 		self.active_context: BasicExecutionContext2 = None
+		self.lookahead = lookahead
+		# in play order: { "position", "plugin", "context", "future" }
+		self.staged:list[dict] = []
 		self.state = 'uninitialized'
 		self.logger = logging.getLogger(__name__)
+	def _registry(self) -> PluginRegistry:
+		"""The plugin registry for the current plugin_info (rebuilt if plugin_info is replaced)."""
+		if self.plugins is None or self.plugins.source is not self.plugin_info:
+			if self.plugins is not None:
+				self.plugins.close()
+			self.plugins = PluginRegistry(self.cm, self.plugin_info)
+		return self.plugins
 	def _evaluate_plugin(self, track:PlaylistBase):
-		pinfo = next((px for px in self.plugin_info if px["info"]["id"] == track.plugin_name), None)
-		if pinfo is None:
+		registry = self._registry()
+		if registry.info(track.plugin_name) is None:
 			errormsg = f"Plugin info for '{track.plugin_name}' not found."
 			self.logger.error(errormsg)
 			return { "plugin": None, "track": track, "error": errormsg }
-		plugin = self.cm.create_plugin(pinfo)
+		plugin = registry.acquire(track.plugin_name)
 		if plugin is not None:
 #						self.logger.debug(f"selecting plugin '{timeslot.plugin_name}' with args {timeslot.content}")
 			if isinstance(plugin, PluginBase):
@@ -69,8 +96,81 @@ class PlaylistLayer(BasicTask):
 		root.add_service(DataSourceManager, self.datasources)
 		root.add_service(MessageRouter, self.router)
 		root.add_service(TimerService, self.timer)
+		root.add_service(ExecutorService, self.executors)
 		root.add_service(MessageSink, self)
 		return BasicExecutionContext2(root, self.dimensions, datetime.now())
+	def _position_after(self, position: TrackPosition) -> TrackPosition|None:
+		"""The track that plays after position: the next one in its playlist, else the first of the next playlist."""
+		(playlist_index, playlist, track_index, track) = position
+		if track_index + 1 < len(playlist.items):
+			return (playlist_index, playlist, track_index + 1, playlist.items[track_index + 1])
+		if len(self.playlists) == 0:
+			return None
+		next_playlist_index = (playlist_index + 1) % len(self.playlists)
+		next_playlist:Playlist = self.playlists[next_playlist_index].get("info")
+		if next_playlist is None or len(next_playlist.items) == 0:
+			return None
+		return (next_playlist_index, next_playlist, 0, next_playlist.items[0])
+	def _current_position(self) -> TrackPosition:
+		return (
+			self.playlist_state['current_playlist_index'],
+			self.playlist_state['current_playlist'],
+			self.playlist_state['current_track_index'],
+			self.playlist_state['current_track'],
+		)
+	@staticmethod
+	def _same_position(a: TrackPosition, b: TrackPosition) -> bool:
+		return a[0] == b[0] and a[1] is b[1] and a[2] == b[2] and a[3] is b[3]
+	def _cancel_staged(self, entries: list[dict] = None):
+		"""Cancel staged work (all of it by default) and return its plugin instances to the registry."""
+		if entries is None:
+			entries = self.staged
+			self.staged = []
+		for entry in entries:
+			if entry["future"] is not None:
+				entry["future"].cancel()
+			self._registry().release(entry["plugin"])
+	def _stage(self):
+		"""
+		Keep the next lookahead tracks prepared while the current one plays: each gets its own plugin instance and context,
+		and plugins that implement prepare(context, track) fetch and render their first frame in the background.
+		Staged entries that no longer match what plays next (e.g. after a schedule update) are cancelled.
+		"""
+		if self.state != 'playing' or self.playlist_state is None:
+			self._cancel_staged()
+			return
+		wanted:list[TrackPosition] = []
+		position = self._current_position()
+		while len(wanted) < self.lookahead:
+			position = self._position_after(position)
+			if position is None:
+				break
+			wanted.append(position)
+		keep = 0
+		while keep < len(self.staged) and keep < len(wanted) and self._same_position(self.staged[keep]["position"], wanted[keep]):
+			keep += 1
+		self._cancel_staged(self.staged[keep:])
+		self.staged = self.staged[:keep]
+		for position in wanted[keep:]:
+			track:PlaylistBase = position[3]
+			plugin_eval = self._evaluate_plugin(track)
+			plugin:PluginProtocol = plugin_eval.get("plugin", None)
+			if plugin is None:
+				# _next_track reports it when it gets there
+				break
+			context = self._create_context()
+			future = None
+			prepare = getattr(plugin, "prepare", None)
+			if callable(prepare):
+				try:
+					future = prepare(context, track)
+				except Exception as e:
+					self.logger.warning(f"Cannot prepare track '{track.title}' with plugin '{track.plugin_name}': {e}")
+					self._registry().release(plugin)
+					break
+			self.logger.debug(f"'{self.name}' staged track '{track.title}'")
+			self.staged.append({ "position": position, "plugin": plugin, "context": context, "future": future })
+	@handles(StartPlayback)
 	def _start_playback(self, msg: StartPlayback):
 		self.logger.info(f"'{self.name}' StartPlayback {self.state}")
 		if self.state != 'loaded':
@@ -107,9 +207,11 @@ class PlaylistLayer(BasicTask):
 				"current_playlist_index": self.playlist_state["current_playlist_index"],
 				"current_track_index": self.playlist_state["current_track_index"]
 			}))
+			self._stage()
 		except Exception as e:
 			self.logger.error(f"Error starting playback with plugin '{current_track.plugin_name}' for track '{current_track.title}': {e}", exc_info=True)
 			self.state = 'error'
+	@handles(PluginReceive)
 	def _plugin_receive(self, msg: PluginReceive):
 		if self.state != 'playing':
 			self.logger.error(f"Cannot handle PluginReceive message, state is '{self.state}'")
@@ -161,117 +263,145 @@ class PlaylistLayer(BasicTask):
 		except Exception as e:
 			self.state = "error"
 			self.logger.error(f"Error invoke stop with plugin '{current_track.plugin_name}' for track '{current_track.title}': {e}", exc_info=True)
+	@handles(NextTrack)
 	def _next_track(self, msg: NextTrack):
 		# Logic to move to the next track in the playlist
 		self.logger.info(f"'{self.name}' NextTrack")
 		if self.active_plugin is not None:
 			self.logger.info(f"Stopping current plugin '{self.active_plugin.name}'")
 			self._plugin_stop()
+			self._registry().release(self.active_plugin)
 			self.active_plugin = None
 			self.active_context = None
 		# start next track logic
 		if self.playlist_state is None:
 			self.logger.error(f"No active playlist state to move to next track.")
 			return
-		current_track_index = self.playlist_state.get('current_track_index')
-		current_playlist:Playlist = self.playlist_state.get('current_playlist')
-		if current_track_index + 1 < len(current_playlist.items):
-			# Move to next track in the same playlist
-			next_track_index = current_track_index + 1
-			next_track:PlaylistBase = current_playlist.items[next_track_index]
-			plugin_eval = self._evaluate_plugin(next_track)
-			active_plugin:PluginProtocol = plugin_eval.get("plugin", None)
-			if active_plugin is None:
-				self.logger.error(f"Cannot start next track, plugin '{next_track.plugin_name}' for track '{next_track.title}' is not available.")
-				return
-			self.active_plugin = active_plugin
-			self.active_context = self._create_context()
-			self.playlist_state['current_track_index'] = next_track_index
-			self.playlist_state['current_track'] = next_track
-			self._plugin_start()
-			self.router.send("telemetry", Telemetry("playlist_layer", {
-				"state": self.state,
-				"current_playlist_index": self.playlist_state["current_playlist_index"],
-				"current_track_index": self.playlist_state["current_track_index"]
-			}))
+		current = self._current_position()
+		position = self._position_after(current)
+		if position is None:
+			self._cancel_staged()
+			self.logger.error(f"No next track after '{current[3].title}' in playlist '{current[1].name}'.")
+			return
+		(next_playlist_index, next_playlist, next_track_index, next_track) = position
+		if next_playlist is not current[1] or next_track_index <= current[2]:
+			self.logger.info(f"End of playlist '{current[1].name}' reached.")
+		if len(self.staged) > 0 and self._same_position(self.staged[0]["position"], position):
+			staged = self.staged.pop(0)
+			active_plugin:PluginProtocol = staged["plugin"]
+			active_context = staged["context"]
 		else:
-			self.logger.info(f"End of playlist '{current_playlist.name}' reached.")
-			current_playlist_index = self.playlist_state.get('current_playlist_index')
-			next_playlist_index = (current_playlist_index + 1) % len(self.playlists)
-			next_playlist:Playlist = self.playlists[next_playlist_index]
-			next_track_index = 0
-			next_track:PlaylistBase = next_playlist.items[next_track_index]
+			self._cancel_staged()
 			plugin_eval = self._evaluate_plugin(next_track)
 			active_plugin:PluginProtocol = plugin_eval.get("plugin", None)
 			if active_plugin is None:
 				self.logger.error(f"Cannot start next track, plugin '{next_track.plugin_name}' for track '{next_track.title}' is not available.")
 				return
-			self.active_plugin = active_plugin
-			self.active_context = self._create_context()
-			self.playlist_state['current_playlist_index'] = next_playlist_index
-			self.playlist_state['current_playlist'] = next_playlist
-			self.playlist_state['current_track_index'] = next_track_index
-			self.playlist_state['current_track'] = next_track
-			self._plugin_start()
-			self.router.send("telemetry", Telemetry("playlist_layer", {
-				"state": self.state,
-				"current_playlist_index": self.playlist_state["current_playlist_index"],
-				"current_track_index": self.playlist_state["current_track_index"]
-			}))
+			active_context = self._create_context()
+		self.active_plugin = active_plugin
+		self.active_context = active_context
+		self.playlist_state['current_playlist_index'] = next_playlist_index
+		self.playlist_state['current_playlist'] = next_playlist
+		self.playlist_state['current_track_index'] = next_track_index
+		self.playlist_state['current_track'] = next_track
+		self._plugin_start()
+		self.router.send("telemetry", Telemetry("playlist_layer", {
+			"state": self.state,
+			"current_playlist_index": self.playlist_state["current_playlist_index"],
+			"current_track_index": self.playlist_state["current_track_index"]
+		}))
+		self._stage()
+	@handles(ScheduleUpdated)
+	def _schedule_updated(self, msg: ScheduleUpdated):
+		if self.state not in ('loaded', 'playing') or msg.snapshot is self.snapshot:
+			return
+		self.snapshot = msg.snapshot
+		self.playlists = msg.snapshot.playlists
+		self.logger.info(f"'{self.name}' schedule updated {msg.changed}")
+		if self.playlist_state is None:
+			return
+		# the current track keeps playing; later tracks come from the new version of its playlist
+		current_playlist:Playlist = self.playlist_state.get('current_playlist')
+		index = next((ix for ix, px in enumerate(self.playlists) if px.get("info") is not None and px["info"].id == current_playlist.id), None)
+		if index is None:
+			self.logger.info(f"Playlist '{current_playlist.name}' was removed; continuing with the next one after this track.")
+			# the playlist that took its place plays next; -1 (no playlists left) is handled by _position_after
+			self.playlist_state['current_playlist_index'] = min(self.playlist_state['current_playlist_index'], len(self.playlists)) - 1
+			# an empty playlist makes the next NextTrack move on to the next playlist
+			self.playlist_state['current_playlist'] = Playlist(current_playlist.id, current_playlist.name, [])
+		else:
+			updated:Playlist = self.playlists[index]["info"]
+			current_track:PlaylistBase = self.playlist_state.get('current_track')
+			track_index = next((ix for ix, tx in enumerate(updated.items) if tx.id == current_track.id), None)
+			if track_index is None:
+				# removed: the first of the tracks that followed it that is still there plays next
+				indexes = { tx.id: ix for ix, tx in enumerate(updated.items) }
+				following = current_playlist.items[self.playlist_state['current_track_index'] + 1:]
+				track_index = next((indexes[tx.id] - 1 for tx in following if tx.id in indexes), len(updated.items) - 1)
+			self.playlist_state['current_playlist_index'] = index
+			self.playlist_state['current_playlist'] = updated
+			self.playlist_state['current_track_index'] = track_index
+		# what plays next may have changed
+		self._stage()
 	def execute(self, msg: ExecuteMessage):
-		# Handle scheduling messages here
 		self.logger.info(f"'{self.name}' receive: {msg}")
-		if isinstance(msg, ConfigureEvent):
-			self.cm = msg.content.cm
-			try:
-				plugin_info = self.cm.enum_plugins()
-				self.plugin_info = plugin_info
-				datasource_info = self.cm.enum_datasources()
-				datasources = self.cm.load_datasources(datasource_info)
-				self.datasources = DataSourceManager(None, datasources)
-				self.logger.info(f"Datasources loaded: {list(datasources.keys())}")
-				sm = self.cm.schedule_manager()
-				schedule_info = sm.load()
-				sm.validate(schedule_info)
-				self.master_schedule = schedule_info.get("master", None)
-				self.playlists = schedule_info.get("playlists", [])
-				self.timer = TimerService(None)
-				self.logger.info(f"schedule loaded")
-				self.state = 'loaded'
-				msg.notify()
-				self.send(StartPlayback("SystemStart"))
-			except Exception as e:
-				self.logger.error(f"Failed to load/validate schedules: {e}", exc_info=True)
-				self.state = 'error'
-				msg.notify(True, e)
-		elif isinstance(msg, DisplaySettings):
-			self.logger.info(f"'{self.name}' DisplaySettings {msg.name} {msg.width} {msg.height}.")
-			self.dimensions = [msg.width, msg.height]
-		elif isinstance(msg, StartPlayback):
-			self._start_playback(msg)
-		elif isinstance(msg, NextTrack):
-			self._next_track(msg)
-		elif isinstance(msg, PluginReceive):
-			self._plugin_receive(msg)
+		super().execute(msg)
+	@handles(ConfigureEvent)
+	def _configure(self, msg: ConfigureEvent):
+		self.cm = msg.content.cm
+		try:
+			plugin_info = self.cm.enum_plugins()
+			self.plugin_info = plugin_info
+			datasource_info = self.cm.enum_datasources()
+			datasources = self.cm.load_datasources(datasource_info)
+			if self.executors is None:
+				self.executors = ExecutorService()
+			self.datasources = DataSourceManager(self.executors.lease(POOL_IO), datasources)
+			self.logger.info(f"Datasources loaded: {list(datasources.keys())}")
+			sm = self.cm.schedule_manager(self.executors.pool(POOL_IO))
+			self.snapshot = sm.snapshot()
+			self.playlists = self.snapshot.playlists
+			self.timer = TimerService(self.executors.lease(POOL_IO))
+			self.logger.info(f"schedule loaded")
+			self.state = 'loaded'
+			msg.notify()
+			self.send(StartPlayback("SystemStart"))
+		except Exception as e:
+			self.logger.error(f"Failed to load/validate schedules: {e}", exc_info=True)
+			self.state = 'error'
+			msg.notify(True, e)
+	@handles(DisplaySettings)
+	def _display_settings(self, msg: DisplaySettings):
+		self.logger.info(f"'{self.name}' DisplaySettings {msg.name} {msg.width} {msg.height}.")
+		self.dimensions = [msg.width, msg.height]
 	def quitMsg(self, msg: QuitMessage):
 		self.logger.info(f"'{self.name}' quitting playback.")
 		try:
+			self._cancel_staged()
 			if self.active_plugin is not None:
 				try:
 					self._plugin_stop()
 				except Exception as e:
 					self.logger.error(f"Error stopping active plugin during quit: {e}", exc_info=True)
 				finally:
+					if self.plugins is not None:
+						self.plugins.release(self.active_plugin)
 					self.active_plugin = None
 					self.active_context = None
 					self.playlist_state = None
 					self.state = 'stopped'
+			if self.plugins is not None:
+				self.plugins.close()
+				self.plugins = None
 			if self.timer is not None:
 				self.timer.shutdown()
 				self.timer = None
 			if self.datasources is not None:
 				self.datasources.shutdown()
 				self.datasources = None
+			if self.executors is not None and self.owns_executors:
+				self.executors.shutdown()
+				self.executors = None
 		except Exception as e:
 			self.logger.error(f"quit.unexpected: {e}", exc_info=True)
 		finally:
@@ -0,0 +1,160 @@
+from collections import Counter
+from datetime import datetime
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+# leaf frames that mean "parked", not "on CPU"; skipped unless include_idle
+IDLE_FILES:tuple[str, ...] = ("threading.py", "queue.py", "selectors.py", "thread.py", "base_events.py")
+IDLE_FUNCTIONS:frozenset[str] = frozenset(["wait", "wait_for", "get", "select", "poll", "_worker", "run_forever", "_run_once", "sleep", "acquire"])
+# seconds between samples; each sample walks every thread's stack, so keep it coarse enough for Pi-class CPUs
+DEFAULT_INTERVAL:float = 0.05
+MAX_DEPTH:int = 64
+MAX_STACKS:int = 20000
+
+class SamplingProfiler:
+	"""
+	Samples the Python stacks of all threads (tasks, executor workers, timers) every interval seconds
+	and writes them as collapsed stacks ("thread;outer;...;leaf count"), the input format of flamegraph.pl and speedscope.
+	Nothing runs or is hooked until start(); stop() writes profile-<timestamp>.collapsed into output_dir.
+	"""
+	def __init__(self, output_dir:str, interval:float = DEFAULT_INTERVAL, include_idle:bool = False):
+		if output_dir is None:
+			raise ValueError("output_dir is None")
+		self.output_dir = output_dir
+		self.interval = interval
+		self.include_idle = include_idle
+		self.stacks:Counter[str] = Counter()
+		self.samples = 0
+		self.idle = 0
+		self.overflow = 0
+		self.started_at:datetime = None
+		self.last_output:str = None
+		self._thread:threading.Thread = None
+		self._stop = threading.Event()
+		self._lock = threading.Lock()
+		self._toggle_requested = threading.Event()
+		self._toggler:threading.Thread = None
+		self.logger = logging.getLogger(__name__)
+
+	@property
+	def running(self) -> bool:
+		return self._thread is not None
+
+	def start(self, interval:float = None) -> bool:
+		"""Start sampling; False if already running."""
+		with self._lock:
+			if self._thread is not None:
+				return False
+			if interval is not None:
+				self.interval = interval
+			self.stacks = Counter()
+			self.samples = 0
+			self.idle = 0
+			self.overflow = 0
+			self.started_at = datetime.now()
+			self._stop.clear()
+			self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+			self._thread.start()
+		self.logger.info(f"Profiler started, interval {self.interval * 1000:.1f}ms")
+		return True
+
+	def stop(self) -> str|None:
+		"""Stop sampling and write the collapsed stacks; returns the file path (None if not running)."""
+		with self._lock:
+			if self._thread is None:
+				return None
+			self._stop.set()
+			self._thread.join()
+			self._thread = None
+			path = self._write()
+			self.last_output = path
+		self.logger.info(f"Profiler stopped, {self.samples} samples written to {path}")
+		return path
+
+	def toggle(self) -> str|None:
+		if self.running:
+			return self.stop()
+		self.start()
+		return None
+
+	def toggle_on_signal(self, signum:int):
+		"""
+		Toggle when signum arrives (e.g. kill -USR2 <pid>).
+		The handler only sets an Event; a daemon thread does the start/stop, which joins threads and writes the file.
+		"""
+		if self._toggler is None:
+			self._toggler = threading.Thread(target=self._run_toggles, name="SamplingProfilerToggle", daemon=True)
+			self._toggler.start()
+		signal.signal(signum, lambda signum, frame: self._toggle_requested.set())
+
+	def _run_toggles(self):
+		while True:
+			self._toggle_requested.wait()
+			self._toggle_requested.clear()
+			try:
+				self.toggle()
+			except Exception as e:
+				self.logger.error(f"profiler.toggle: {e}")
+
+	def status(self) -> dict[str,any]:
+		return {
+			"running": self.running,
+			"interval_ms": self.interval * 1000,
+			"started_at": self.started_at.isoformat() if self.started_at is not None else None,
+			"samples": self.samples,
+			"idle": self.idle,
+			"stacks": len(self.stacks),
+			"last_output": self.last_output,
+		}
+
+	def _is_idle(self, frame) -> bool:
+		return frame.f_code.co_name in IDLE_FUNCTIONS and frame.f_code.co_filename.endswith(IDLE_FILES)
+
+	def _sample(self):
+		me = threading.get_ident()
+		names = { tx.ident: tx.name for tx in threading.enumerate() }
+		for ident, frame in sys._current_frames().items():
+			if ident == me:
+				continue
+			self.samples += 1
+			if not self.include_idle and self._is_idle(frame):
+				self.idle += 1
+				continue
+			parts = []
+			while frame is not None and len(parts) < MAX_DEPTH:
+				code = frame.f_code
+				parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+				frame = frame.f_back
+			parts.append(names.get(ident, str(ident)))
+			key = ";".join(reversed(parts))
+			if key in self.stacks or len(self.stacks) < MAX_STACKS:
+				self.stacks[key] += 1
+			else:
+				self.overflow += 1
+
+	def _run(self):
+		next_sample = time.monotonic()
+		while not self._stop.is_set():
+			try:
+				self._sample()
+			except Exception as e:
+				self.logger.error(f"profiler.sample: {e}")
+			next_sample += self.interval
+			delay = next_sample - time.monotonic()
+			if delay < 0:
+				# fell behind (e.g. GIL contention); don't burst to catch up
+				next_sample = time.monotonic()
+				delay = 0
+			self._stop.wait(delay)
+
+	def _write(self) -> str:
+		os.makedirs(self.output_dir, exist_ok=True)
+		path = os.path.join(self.output_dir, f"profile-{self.started_at.strftime('%Y%m%d-%H%M%S')}.collapsed")
+		with open(path, "w", encoding="utf-8") as fx:
+			for stack, count in self.stacks.most_common():
+				fx.write(f"{stack} {count}\n")
+		return path
@@ -0,0 +1,91 @@
+from datetime import timedelta
+import logging
+import os
+import threading
+
+from ..model.hash_manager import HashManager
+from ..model.schedule_manager import SCHEDULE_EXTENSIONS, ScheduleManager, ScheduleSnapshot
+from .message_router import MessageRouter
+from .messages import BasicMessage, ExecuteMessage, MessageSink, ScheduleUpdated, Telemetry
+from .timer import TimerService
+
+SCHEDULE_UPDATED_ROUTE:str = "schedule-updated"
+# editors and the API write a file in several events; reload once they settle
+DEBOUNCE:timedelta = timedelta(milliseconds=500)
+
+class _ReloadSchedules(ExecuteMessage):
+	__slots__ = ()
+	def __init__(self):
+		super().__init__()
+
+class ScheduleWatcher(MessageSink):
+	"""
+	Change feed for the schedule folder: listens to the HashManager's file events, and once they settle
+	re-loads (only changed files are re-parsed, see ScheduleCache) and validates the schedules,
+	then sends ScheduleUpdated with the new snapshot on SCHEDULE_UPDATED_ROUTE.
+	If the result does not load or validate, the running tasks keep their snapshot and the error goes to telemetry.
+	"""
+	def __init__(self, router: MessageRouter, schedule_path: str, hm: HashManager = None, debounce: timedelta = DEBOUNCE):
+		if router is None:
+			raise ValueError("router is None")
+		if schedule_path is None:
+			raise ValueError("schedule_path is None")
+		self.router = router
+		self.schedule_path = os.path.abspath(schedule_path)
+		self.hm = hm
+		self.debounce = debounce
+		self.timer = TimerService()
+		self.last:ScheduleSnapshot = None
+		self.reloads = 0
+		self._changed:set[str] = set()
+		self._cancel = None
+		self._lock = threading.Lock()
+		self.logger = logging.getLogger(__name__)
+
+	def start(self):
+		if self.hm is not None:
+			self.hm.add_listener(self.file_changed)
+
+	def stop(self):
+		if self.hm is not None:
+			self.hm.remove_listener(self.file_changed)
+		self.timer.shutdown()
+
+	def file_changed(self, path: str):
+		"""HashManager listener; ignores anything but schedule files."""
+		path = os.path.abspath(path)
+		if os.path.dirname(path) != self.schedule_path or not path.lower().endswith(SCHEDULE_EXTENSIONS):
+			return
+		with self._lock:
+			self._changed.add(os.path.basename(path))
+			if self._cancel is not None:
+				self._cancel()
+			try:
+				(future, self._cancel) = self.timer.create_timer(self.debounce, self, _ReloadSchedules())
+			except RuntimeError:
+				# stopped
+				self._cancel = None
+
+	def send(self, msg: BasicMessage):
+		if isinstance(msg, _ReloadSchedules):
+			self.reload()
+
+	def reload(self) -> ScheduleSnapshot|None:
+		"""Re-load now; returns the snapshot sent, or None if nothing changed or it failed."""
+		with self._lock:
+			changed = sorted(self._changed)
+			self._changed = set()
+			self._cancel = None
+		try:
+			snapshot = ScheduleManager(self.schedule_path).snapshot(self.hm)
+		except Exception as e:
+			self.logger.error(f"Schedule reload failed, keeping the current schedules: {e}")
+			self.router.send("telemetry", Telemetry("schedule_watcher", { "error": str(e), "changed": ",".join(changed) }))
+			return None
+		if snapshot is self.last:
+			return None
+		self.last = snapshot
+		self.reloads += 1
+		self.logger.info(f"Schedules reloaded: {changed}")
+		self.router.send(SCHEDULE_UPDATED_ROUTE, ScheduleUpdated(snapshot, changed))
+		return snapshot
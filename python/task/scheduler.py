@@ -2,25 +2,31 @@ from concurrent.futures import Executor, ThreadPoolExecutor
 import logging
 from datetime import datetime, timedelta
 
-from .messages import MessageSink, FutureCompleted
+from .messages import ConfigureEvent, MessageSink, FutureCompleted, ScheduleUpdated, Telemetry
 from ..plugins.plugin_base import PluginBase, PluginExecutionContext
 from ..model.configuration_manager import ConfigurationManager
-from ..model.schedule import MasterSchedule, TimedSchedule
-from .application import ConfigureEvent
+from ..model.schedule import PluginSchedule, PluginScheduleData, TimerTaskItem, TimerTasks, minute_of_day
+from ..model.schedule_manager import ScheduleSnapshot
 from .active_plugin import ActivePlugin
+from .executor_service import POOL_CPU, POOL_IO, ExecutorService
 from .display import DisplaySettings
-from .timer_tick import TickMessage
-from .basic_task import BasicTask, ExecuteMessage
+from .timer_tick import TICK_CONTROL_ROUTE, NextWakeup, TickMessage
+from .basic_task import BasicTask, ExecuteMessage, QuitMessage, handles
+from .timer import TimerService
+from .timer_tasks import TimerTaskFired, TimerTaskRunner
+from .tracing import TRACER, activate
 from .message_router import MessageRouter
 
+SCHEDULER_BATCH_SIZE:int = 32
+
 class Scheduler(BasicTask):
-	def __init__(self, name, router: MessageRouter):
-		super().__init__(name)
+	def __init__(self, name, router: MessageRouter, executors: ExecutorService = None):
+		super().__init__(name, batch_size=SCHEDULER_BATCH_SIZE)
 		if router is None:
 			raise ValueError("router is None")
 		self.router = router
-		self.schedules = []
-		self.master_schedule:MasterSchedule = None
+		self.executors = executors
+		self.snapshot:ScheduleSnapshot = None
 		self.cm:ConfigurationManager = None
 		self.plugin_info = None
 		self.plugin_map = None
@@ -29,19 +35,43 @@ class Scheduler(BasicTask):
 		self.resolution = [800,480]
 		self.state = 'uninitialized'
 		self.lastTickSeen:TickMessage = None
+		self.timer:TimerService = None
+		self.timer_tasks:TimerTaskRunner = None
+		# fired timer task that takes over from the timed schedule: { "item", "schedule", "timeslot", "until" }
+		self.timer_task_state = None
 		self.logger = logging.getLogger(__name__)
 
+	def _timer_task_state(self, schedule_ts: datetime, tick: TickMessage):
+		"""Schedule state for the fired timer task while it lasts, else None."""
+		override = self.timer_task_state
+		if override is None:
+			return None
+		if schedule_ts >= override["until"]:
+			self.logger.info(f"timer task '{override['item'].id}' ended")
+			self.timer_task_state = None
+			return None
+		timeslot = override["timeslot"]
+		state = { "plugin": None, "timeslot": timeslot, "schedule": override["schedule"], "tick": tick, "schedulets": schedule_ts }
+		plugin = self.plugin_map.get(timeslot.plugin_name, None) if self.plugin_map is not None else None
+		if plugin is None:
+			state["error"] = f"Plugin '{timeslot.plugin_name}' is not available."
+			self.logger.error(state["error"])
+		else:
+			state["plugin"] = plugin
+			if not isinstance(plugin, PluginBase):
+				state["error"] = f"Plugin '{timeslot.plugin_name}' is not a valid PluginBase instance."
+				self.logger.error(state["error"])
+		return state
+
 	def calculate_current_state(self, schedule_ts: datetime, tick: TickMessage):
-		current = self.master_schedule.evaluate(schedule_ts)
+		override = self._timer_task_state(schedule_ts, tick)
+		if override is not None:
+			return override
+		(current, target, timeslot) = self.snapshot.select(schedule_ts)
 #		self.logger.info(f"Current schedule {tick.tick_ts}[{tick.tick_number}]{schedule_ts}: {current}")
 		if current:
-			# locate schedule from items
 			self.logger.info(f"Selecting schedule: {current.name} ({current.schedule})")
-			schedule = next((sx for sx in self.schedules if sx.get("name", None) and sx["name"] == current.schedule), None)
-			if schedule and "info" in schedule and isinstance(schedule["info"], TimedSchedule):
-				# get the active time slot
-				target:TimedSchedule = schedule["info"]
-				timeslot = target.current(schedule_ts)
+			if target is not None:
 #				self.logger.info(f"Current slot {timeslot}")
 				if timeslot:
 					if self.plugin_map.get(timeslot.plugin_name, None):
@@ -73,12 +103,13 @@ class Scheduler(BasicTask):
 				if self.active_plugin is not None:
 					self.active_plugin.shutdown(True)
 					self.active_plugin = None
-				self.active_plugin = ActivePlugin(timeslot.plugin_name, self)
+				self.active_plugin = ActivePlugin(timeslot.plugin_name, self, executor=self.executors.lease(POOL_CPU) if self.executors is not None else None)
 				try:
 					(plugin,ctx) = self.create_context(schedule_ts, schedule_state)
 					plugin.timeslot_start(ctx)
 					if self.active_plugin.state == "ready":
-						plugin.schedule(ctx)
+						with TRACER.span("plugin.schedule"):
+							plugin.schedule(ctx)
 				except Exception as e:
 					self.logger.error(f"Error executing plugin '{timeslot.plugin_name}': {e}", exc_info=True)
 			else:
@@ -100,7 +131,8 @@ class Scheduler(BasicTask):
 						if self.active_plugin.state == "ready":
 							try:
 								(plugin,ctx) = self.create_context(schedule_ts, schedule_state)
-								plugin.schedule(ctx)
+								with TRACER.span("plugin.schedule"):
+									plugin.schedule(ctx)
 							except Exception as e:
 								self.logger.error(f"Error executing plugin '{timeslot.plugin_name}': {e}", exc_info=True)
 				else:
@@ -113,12 +145,13 @@ class Scheduler(BasicTask):
 					except Exception as e:
 						self.logger.error(f"Error executing plugin '{timeslot.plugin_name}': {e}", exc_info=True)
 					self.logger.debug(f"timeslot starting {selected}")
-					self.active_plugin = ActivePlugin(timeslot.plugin_name, self)
+					self.active_plugin = ActivePlugin(timeslot.plugin_name, self, executor=self.executors.lease(POOL_CPU) if self.executors is not None else None)
 					try:
 						(plugin,ctx) = self.create_context(schedule_ts, schedule_state)
 						plugin.timeslot_start(ctx)
 						if self.active_plugin.state == "ready":
-							plugin.schedule(ctx)
+							with TRACER.span("plugin.schedule"):
+								plugin.schedule(ctx)
 					except Exception as e:
 						self.logger.error(f"Error executing plugin '{timeslot.plugin_name}': {e}", exc_info=True)
 			else:
@@ -127,6 +160,15 @@ class Scheduler(BasicTask):
 			pass
 		self.current_schedule_state = schedule_state
 
+	def next_interesting(self, schedule_ts: datetime) -> datetime|None:
+		"""Earliest time the schedule or the active plugin needs another tick; None if the plugin wants every tick."""
+		wakeup = self.active_plugin.next_wakeup() if self.active_plugin is not None else datetime.max
+		if wakeup is None:
+			return None
+		if self.timer_task_state is not None:
+			wakeup = min(wakeup, self.timer_task_state["until"])
+		return min(wakeup, self.snapshot.next_change(schedule_ts))
+
 	def create_context(self, schedule_ts: datetime, schedule_state) -> tuple[PluginBase, PluginExecutionContext]:
 		if self.active_plugin is None:
 			raise ValueError(f"active_plugin is None")
@@ -144,66 +186,143 @@ class Scheduler(BasicTask):
 		ctx = PluginExecutionContext(timeslot, stm, scm, psm, self.active_plugin, self.resolution, schedule_ts, self.router)
 		return (plugin, ctx)
 
+	def execute_batch(self, msgs):
+		# a run of back-to-back ticks (e.g. catch-up after a suspend) only needs the latest one evaluated
+		collapsed = [mx for ix, mx in enumerate(msgs) if not (isinstance(mx, TickMessage) and ix + 1 < len(msgs) and isinstance(msgs[ix + 1], TickMessage))]
+		if len(collapsed) < len(msgs):
+			self.logger.debug(f"'{self.name}' collapsed {len(msgs) - len(collapsed)} tick(s)")
+		super().execute_batch(collapsed)
+
 	def execute(self, msg: ExecuteMessage):
-		# Handle scheduling messages here
 		self.logger.info(f"'{self.name}' receive: {msg}")
-		if isinstance(msg, ConfigureEvent):
-			self.cm = msg.content.cm
-			try:
-				plugin_info = self.cm.enum_plugins()
-				plugins = self.cm.load_plugins(plugin_info)
-				self.logger.info(f"Plugins loaded: {list(plugins.keys())}")
-				self.plugin_info = plugin_info
-				self.plugin_map = plugins
-				sm = self.cm.schedule_manager()
-				schedule_info = sm.load()
-				sm.validate(schedule_info)
-				self.master_schedule = schedule_info.get("master", None)
-				self.schedules = schedule_info.get("schedules", [])
-				self.logger.info(f"schedule loaded")
-				self.state = 'loaded'
-				msg.notify()
-			except Exception as e:
-				self.logger.error(f"Failed to load/validate schedules: {e}", exc_info=True)
-				self.state = 'error'
-				msg.notify(True, e)
-		elif isinstance(msg, DisplaySettings):
-			self.logger.info(f"'{self.name}' DisplaySettings {msg.name} {msg.width} {msg.height}.")
-			self.resolution = [msg.width, msg.height]
-		elif isinstance(msg, FutureCompleted):
-			# make sure the active plugin is same as what generated this message
-			self.logger.info(f"'{self.name}' FutureCompleted {msg.plugin_name}:{msg.token} {msg.is_success}.")
-			if self.active_plugin is None:
-				self.logger.warning(f"Message arrived late, discarded. No active plugin")
-			else:
-				if self.active_plugin.name == msg.plugin_name:
-					if self.active_plugin.state != "future":
-						self.logger.warning(f"Active plugin state mismatch. expected 'future' actual '{self.active_plugin.state}'")
-					self.active_plugin.state = "notify"
-					try:
-						(plugin,ctx) = self.create_context(self.lastTickSeen.tick_ts, self.current_schedule_state)
+		super().execute(msg)
+
+	@handles(ConfigureEvent)
+	def _configure(self, msg: ConfigureEvent):
+		self.cm = msg.content.cm
+		try:
+			plugin_info = self.cm.enum_plugins()
+			plugins = self.cm.load_plugins(plugin_info)
+			self.logger.info(f"Plugins loaded: {list(plugins.keys())}")
+			self.plugin_info = plugin_info
+			self.plugin_map = plugins
+			sm = self.cm.schedule_manager(self.executors.pool(POOL_IO) if self.executors is not None else None)
+			self.snapshot = sm.snapshot()
+			self.logger.info(f"schedule loaded")
+			self.state = 'loaded'
+			self._start_timer_tasks()
+			# new configuration: back to regular ticks until the next evaluation
+			self.router.send(TICK_CONTROL_ROUTE, NextWakeup(None))
+			msg.notify()
+		except Exception as e:
+			self.logger.error(f"Failed to load/validate schedules: {e}", exc_info=True)
+			self.state = 'error'
+			msg.notify(True, e)
+
+	@handles(ScheduleUpdated)
+	def _schedule_updated(self, msg: ScheduleUpdated):
+		if self.state != 'loaded' or msg.snapshot is self.snapshot:
+			return
+		# the active plugin keeps running; the next tick evaluates against the new snapshot and only
+		# switches if a different timeslot is selected
+		self.snapshot = msg.snapshot
+		self.logger.info(f"'{self.name}' schedule updated {msg.changed}")
+		# a running timer task finishes; triggers come from the new snapshot
+		self._start_timer_tasks()
+		self.router.send(TICK_CONTROL_ROUTE, NextWakeup(None))
+
+	def _timer_task_items(self) -> list[tuple[TimerTasks, TimerTaskItem]]:
+		return [(entry["info"], item) for entry in self.snapshot.tasks if isinstance(entry.get("info", None), TimerTasks) for item in entry["info"].items]
+
+	def _start_timer_tasks(self):
+		"""(Re)arm the timer tasks of the current snapshot; TimerTaskFired comes back to this task."""
+		if self.timer_tasks is None:
+			self.timer = TimerService(self.executors.lease(POOL_IO) if self.executors is not None else None)
+			self.timer_tasks = TimerTaskRunner(self.timer, self)
+		self.timer_tasks.start([item for (tasks, item) in self._timer_task_items()])
+		self.logger.info(f"'{self.name}' timer tasks armed: {self.timer_tasks.next_fire()}")
+
+	@handles(TimerTaskFired)
+	def _timer_task_fired(self, msg: TimerTaskFired):
+		item = msg.item
+		# loaded task files keep the task as a dict
+		task = item.task if isinstance(item.task, dict) else item.task.to_dict()
+		plugin_name = task.get("plugin_name", None)
+		duration = task.get("duration_minutes", 0)
+		self.logger.info(f"'{self.name}' timer task '{item.id}' fired {msg.fire_ts}: '{plugin_name}' for {duration} minute(s)")
+		self.router.send("telemetry", Telemetry("timer_task", { "id": item.id, "plugin_name": plugin_name, "fire_ts": msg.fire_ts.isoformat() }))
+		if self.state != 'loaded' or plugin_name is None or duration <= 0:
+			return
+		owner = next((tasks for (tasks, ix) in self._timer_task_items() if ix is item), None)
+		if owner is None:
+			self.logger.warning(f"'{self.name}' timer task '{item.id}' is no longer scheduled")
+			return
+		# runs like a timeslot that takes precedence over the timed schedule until it ends
+		timeslot = PluginSchedule(plugin_name, item.id, task.get("title", item.name), int(minute_of_day(msg.fire_ts)), duration, PluginScheduleData(task.get("content", {})))
+		self.timer_task_state = { "item": item, "schedule": owner, "timeslot": timeslot, "until": msg.fire_ts + timedelta(minutes=duration) }
+		if self.lastTickSeen is not None:
+			# switch now instead of at the next tick
+			schedule_ts = msg.fire_ts.replace(second=0, microsecond=0)
+			self.evaluate_schedule_state(schedule_ts, self.calculate_current_state(schedule_ts, self.lastTickSeen))
+			self.router.send(TICK_CONTROL_ROUTE, NextWakeup(self.next_interesting(schedule_ts)))
+
+	def quitMsg(self, msg: QuitMessage):
+		if self.timer_tasks is not None:
+			self.timer_tasks.stop()
+			self.timer_tasks = None
+		if self.timer is not None:
+			self.timer.shutdown()
+			self.timer = None
+		super().quitMsg(msg)
+
+	@handles(DisplaySettings)
+	def _display_settings(self, msg: DisplaySettings):
+		self.logger.info(f"'{self.name}' DisplaySettings {msg.name} {msg.width} {msg.height}.")
+		self.resolution = [msg.width, msg.height]
+
+	@handles(FutureCompleted)
+	def _future_completed(self, msg: FutureCompleted):
+		with activate(msg.trace_id):
+			self._receive_future(msg)
+
+	def _receive_future(self, msg: FutureCompleted):
+		# make sure the active plugin is same as what generated this message
+		self.logger.info(f"'{self.name}' FutureCompleted {msg.plugin_name}:{msg.token} {msg.is_success}.")
+		if self.active_plugin is None:
+			self.logger.warning(f"Message arrived late, discarded. No active plugin")
+		else:
+			if self.active_plugin.name == msg.plugin_name:
+				if self.active_plugin.state != "future":
+					self.logger.warning(f"Active plugin state mismatch. expected 'future' actual '{self.active_plugin.state}'")
+				self.active_plugin.state = "notify"
+				try:
+					(plugin,ctx) = self.create_context(self.lastTickSeen.tick_ts, self.current_schedule_state)
+					with TRACER.span("plugin.receive"):
 						plugin.receive(ctx, msg)
-						self.active_plugin.notify_complete()
-					except Exception as e:
-						self.logger.error(f"Error executing plugin '{self.active_plugin.name}': {e}", exc_info=True)
-				else:
-					self.logger.warning(f"Message arrived late, discarded. Active plugin is {self.active_plugin.name}")
-		elif isinstance(msg, TickMessage):
-			self.lastTickSeen = msg
-			# Perform scheduled tasks
-			if self.state != 'loaded':
-				self.logger.warning(f"'{self.name}' waiting for configuration. Current state: {self.state}")
-				return
-			if self.master_schedule is None:
-				self.logger.error(f"'{self.name}' has no schedule loaded.")
-				return
-			schedule_ts = msg.tick_ts.replace(second=0,microsecond=0)
-			for schedule in self.schedules:
-				info = schedule.get("info", None)
-				if info is not None and isinstance(info, TimedSchedule):
-					info.set_date_controller(lambda: schedule_ts)
-			self.logger.info(f"schedule {msg.tick_ts}[{msg.tick_number}]: {schedule_ts}")
-			schedule_state = self.calculate_current_state(schedule_ts, msg)
-#			self.logger.info(f"schedule state {schedule_state}")
-			self.evaluate_schedule_state(schedule_ts, schedule_state)
-			pass
+					self.active_plugin.notify_complete()
+					self.router.send(TICK_CONTROL_ROUTE, NextWakeup(self.next_interesting(self.lastTickSeen.tick_ts)))
+				except Exception as e:
+					self.logger.error(f"Error executing plugin '{self.active_plugin.name}': {e}", exc_info=True)
+			else:
+				self.logger.warning(f"Message arrived late, discarded. Active plugin is {self.active_plugin.name}")
+
+	@handles(TickMessage)
+	def _tick(self, msg: TickMessage):
+		with activate(msg.trace_id), TRACER.span("schedule"):
+			self._schedule_tick(msg)
+
+	def _schedule_tick(self, msg: TickMessage):
+		self.lastTickSeen = msg
+		# Perform scheduled tasks
+		if self.state != 'loaded':
+			self.logger.warning(f"'{self.name}' waiting for configuration. Current state: {self.state}")
+			return
+		if self.snapshot is None:
+			self.logger.error(f"'{self.name}' has no schedule loaded.")
+			return
+		schedule_ts = msg.tick_ts.replace(second=0,microsecond=0)
+		self.logger.info(f"schedule {msg.tick_ts}[{msg.tick_number}]: {schedule_ts}")
+		schedule_state = self.calculate_current_state(schedule_ts, msg)
+#		self.logger.info(f"schedule state {schedule_state}")
+		self.evaluate_schedule_state(schedule_ts, schedule_state)
+		self.router.send(TICK_CONTROL_ROUTE, NextWakeup(self.next_interesting(schedule_ts)))
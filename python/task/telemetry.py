@@ -0,0 +1,148 @@
+from collections import deque
+import bisect
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+import threading
+
+from .messages import BasicMessage, MessageSink, Telemetry
+
+# upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS:tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+class Histogram:
+	"""Fixed-bucket latency histogram; constant size regardless of the number of observations."""
+	__slots__ = ("buckets", "count", "total", "max")
+	def __init__(self):
+		self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+	def observe(self, value_ms:float):
+		self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+		self.count += 1
+		self.total += value_ms
+		self.max = max(self.max, value_ms)
+	def percentile(self, pct:float) -> float|None:
+		"""Upper bound of the bucket holding the pct-th observation (None if empty or beyond the last bound)."""
+		if self.count == 0:
+			return None
+		rank = pct / 100 * self.count
+		seen = 0
+		for ix, count in enumerate(self.buckets):
+			seen += count
+			if seen >= rank:
+				return LATENCY_BUCKETS_MS[ix] if ix < len(LATENCY_BUCKETS_MS) else None
+		return None
+	def to_dict(self) -> dict[str,any]:
+		return {
+			"count": self.count,
+			"avg_ms": self.total / self.count if self.count > 0 else 0.0,
+			"max_ms": self.max,
+			"p50_ms": self.percentile(50),
+			"p95_ms": self.percentile(95),
+			"buckets": { (str(LATENCY_BUCKETS_MS[ix]) if ix < len(LATENCY_BUCKETS_MS) else "inf"): cx for ix, cx in enumerate(self.buckets) if cx > 0 },
+		}
+
+class TelemetryAggregator(MessageSink):
+	"""
+	Aggregates Telemetry messages in process, with bounded memory.
+	Each value of a Telemetry(name, values) becomes metric "<name>.<key>":
+	 numbers        gauge (last/min/max); keys ending in _ms also feed a latency histogram
+	 anything else  label (last value, as a short string)
+	and counter "<name>.reports" counts the messages. count() and observe() record directly.
+	The most recent messages are kept in a ring buffer; metrics beyond max_metrics are not tracked (see dropped_metrics).
+	If log_path is set, every message is also appended as a JSON line to a size-rotated log.
+	"""
+	def __init__(self, max_metrics:int = 512, events:int = 256, log_path:str = None, log_bytes:int = 1024*1024, log_backups:int = 3):
+		self.max_metrics = max_metrics
+		self.counters:dict[str,int] = {}
+		self.gauges:dict[str,dict[str,float]] = {}
+		self.labels:dict[str,str] = {}
+		self.histograms:dict[str,Histogram] = {}
+		self.events:deque[dict] = deque(maxlen=events)
+		self.dropped_metrics = 0
+		self._lock = threading.Lock()
+		self.logger = logging.getLogger(__name__)
+		self._log:logging.Logger = None
+		if log_path is not None:
+			self._log = logging.getLogger(f"{__name__}.log")
+			self._log.propagate = False
+			self._log.setLevel(logging.INFO)
+			handler = RotatingFileHandler(log_path, maxBytes=log_bytes, backupCount=log_backups)
+			handler.setFormatter(logging.Formatter("%(message)s"))
+			self._log.addHandler(handler)
+
+	def _metric_count(self) -> int:
+		return len(self.counters) + len(self.gauges) + len(self.labels) + len(self.histograms)
+
+	def _admit(self, table:dict, name:str) -> bool:
+		"""Called with _lock held; False if name is new and the metric budget is spent."""
+		if name in table:
+			return True
+		if self._metric_count() >= self.max_metrics:
+			self.dropped_metrics += 1
+			return False
+		return True
+
+	def count(self, name:str, value:int = 1):
+		with self._lock:
+			if self._admit(self.counters, name):
+				self.counters[name] = self.counters.get(name, 0) + value
+
+	def observe(self, name:str, value_ms:float):
+		with self._lock:
+			if self._admit(self.histograms, name):
+				self.histograms.setdefault(name, Histogram()).observe(value_ms)
+
+	def _gauge(self, name:str, value:float):
+		if self._admit(self.gauges, name):
+			gauge = self.gauges.get(name, None)
+			if gauge is None:
+				self.gauges[name] = { "last": value, "min": value, "max": value }
+			else:
+				gauge["last"] = value
+				gauge["min"] = min(gauge["min"], value)
+				gauge["max"] = max(gauge["max"], value)
+
+	def send(self, msg: BasicMessage):
+		if not isinstance(msg, Telemetry):
+			return
+		values = msg.values if isinstance(msg.values, dict) else {}
+		with self._lock:
+			reports = f"{msg.name}.reports"
+			if self._admit(self.counters, reports):
+				self.counters[reports] = self.counters.get(reports, 0) + 1
+			for key, value in values.items():
+				metric = f"{msg.name}.{key}"
+				if isinstance(value, (int, float)) and not isinstance(value, bool):
+					self._gauge(metric, value)
+					if key.endswith("_ms") and self._admit(self.histograms, metric):
+						self.histograms.setdefault(metric, Histogram()).observe(value)
+				elif self._admit(self.labels, metric):
+					self.labels[metric] = str(value)[:128]
+			event = { "ts": msg.timestamp.isoformat(), "name": msg.name, "values": { kx: (vx if isinstance(vx, (int, float, bool)) else str(vx)[:128]) for kx, vx in values.items() } }
+			self.events.append(event)
+		if self._log is not None:
+			try:
+				self._log.info(json.dumps(event))
+			except Exception as e:
+				self.logger.error(f"telemetry.log: {e}")
+
+	def snapshot(self, events:int = 50) -> dict[str,any]:
+		with self._lock:
+			return {
+				"counters": dict(self.counters),
+				"gauges": { kx: dict(vx) for kx, vx in self.gauges.items() },
+				"labels": dict(self.labels),
+				"histograms": { kx: hx.to_dict() for kx, hx in self.histograms.items() },
+				"events": list(self.events)[-events:] if events > 0 else [],
+				"dropped_metrics": self.dropped_metrics,
+			}
+
+	def close(self):
+		if self._log is not None:
+			for handler in list(self._log.handlers):
+				handler.close()
+				self._log.removeHandler(handler)
+			self._log = None
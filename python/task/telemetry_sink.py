@@ -1,9 +1,17 @@
 import queue
-from .messages import BasicMessage, MessageSink
+from .messages import BasicMessage, MessageSink, Telemetry
+from .telemetry import TelemetryAggregator
 
 class TelemetrySink(MessageSink):
-	def __init__(self):
-		self.msg_queue = queue.Queue()
+	"""
+	Receives the application's telemetry route.
+	Telemetry goes to the aggregator (if any); other messages (e.g. failed ConfigureNotify) wait for receive().
+	The queue is bounded; when full the oldest message is discarded.
+	"""
+	def __init__(self, aggregator: TelemetryAggregator = None, maxsize: int = 256):
+		self.aggregator = aggregator
+		self.msg_queue = queue.Queue(maxsize)
+		self.discarded = 0
 
 	def receive(self):
 		try:
@@ -14,7 +22,18 @@ class TelemetrySink(MessageSink):
 			return None
 
 	def send(self, msg: BasicMessage):
-		try:
-			self.msg_queue.put_nowait(msg)
-		except Exception as e:
-			pass
+		if self.aggregator is not None and isinstance(msg, Telemetry):
+			self.aggregator.send(msg)
+			return
+		while True:
+			try:
+				self.msg_queue.put_nowait(msg)
+				return
+			except queue.Full:
+				try:
+					self.msg_queue.get_nowait()
+					self.discarded += 1
+				except queue.Empty:
+					pass
+			except Exception as e:
+				return
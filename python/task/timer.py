@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
-from concurrent.futures import Executor, ThreadPoolExecutor, Future
+from concurrent.futures import Executor, Future
 from datetime import timedelta
+import heapq
+import itertools
 import threading
 import logging
+import time
 
 from .messages import ExecuteMessage, MessageSink
 from .timer_tick import TickMessage
@@ -29,35 +32,129 @@ class Timer(ABC):
 	def timer_expired(self):
 		pass
 
+class _TimerEntry:
+	__slots__ = ("deadline", "seq", "sink", "completed", "future", "cancelled")
+	def __init__(self, deadline:float, seq:int, sink:MessageSink|None, completed:ExecuteMessage, future:Future):
+		self.deadline = deadline
+		self.seq = seq
+		self.sink = sink
+		self.completed = completed
+		self.future = future
+		self.cancelled = False
+	def __lt__(self, other:"_TimerEntry") -> bool:
+		return (self.deadline, self.seq) < (other.deadline, other.seq)
+
 class TimerService:
+	"""
+	One dispatcher thread serves every timer from a min-heap of monotonic deadlines, so pending timers do not occupy pool workers.
+	Cancel is O(1): the entry is marked and its future resolved; the heap drops it lazily.
+	If es is given, expired timers send their message from it so a slow sink cannot delay other timers.
+	"""
 	def __init__(self, es: Executor = None):
-		self._es = es if es is not None else ThreadPoolExecutor(max_workers=4)
+		self._es = es
+		self._heap:list[_TimerEntry] = []
+		self._seq = itertools.count()
+		self._stale = 0
+		self._cv = threading.Condition()
+		self._closed = False
+		self._thread:threading.Thread = None
 		self.logger = logging.getLogger(__name__)
+	@property
+	def pending(self) -> int:
+		with self._cv:
+			return len(self._heap) - self._stale
 	def create_timer(self, deltatime: timedelta, sink: MessageSink|None, completed: ExecuteMessage) -> tuple[Future[ExecuteMessage|None], callable]:
 		"""
 		Creates a timer that waits for deltatime and then sends the completed message to the sink.
 		Returns a tuple of (future, cancel_function). The future completes with the completed message when the timer expires, or None if cancelled.
 		"""
-		stopped = threading.Event()
-		def fx() -> ExecuteMessage|None:
-			try:
-				self.logger.debug(f"Sleep {deltatime}")
-				timeout = stopped.wait(deltatime.total_seconds())
-				self.logger.debug(f"Stopped {timeout}")
-				if not timeout:
-					if sink is not None:
-						self.logger.debug(f"sending message {completed}")
-						sink.send(completed)
-					return completed
-				else:
-					return None
-			except Exception as ex:
-				self.logger.error(f"Timer exception: {ex}")
+		future = Future()
+		# the timer counts as running from creation; use the cancel function, not future.cancel()
+		future.set_running_or_notify_cancel()
+		with self._cv:
+			if self._closed:
+				raise RuntimeError("cannot create timer after shutdown")
+			entry = _TimerEntry(time.monotonic() + max(deltatime.total_seconds(), 0), next(self._seq), sink, completed, future)
+			heapq.heappush(self._heap, entry)
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._run, name="TimerService", daemon=True)
+				self._thread.start()
+			elif self._heap[0] is entry:
+				self._cv.notify()
+		self.logger.debug(f"Timer {entry.seq} in {deltatime}")
 		def cancel() -> None:
 			self.logger.debug("Timer cancel requested.")
-			stopped.set()
-		future = self._es.submit(fx)
+			with self._cv:
+				if entry.cancelled or future.done():
+					return
+				entry.cancelled = True
+				self._stale += 1
+				self._compact()
+			future.set_result(None)
 		return (future, cancel)
+	def _compact(self):
+		"""Rebuild the heap without cancelled entries once they dominate it; called with _cv held."""
+		if self._stale > 64 and self._stale * 2 > len(self._heap):
+			self._heap = [ex for ex in self._heap if not ex.cancelled]
+			heapq.heapify(self._heap)
+			self._stale = 0
+	def _run(self):
+		while True:
+			expired:list[_TimerEntry] = []
+			with self._cv:
+				while not self._closed:
+					while len(self._heap) > 0 and self._heap[0].cancelled:
+						heapq.heappop(self._heap)
+						self._stale -= 1
+					if len(self._heap) == 0:
+						self._cv.wait()
+						continue
+					now = time.monotonic()
+					if self._heap[0].deadline > now:
+						self._cv.wait(self._heap[0].deadline - now)
+						continue
+					while len(self._heap) > 0 and self._heap[0].deadline <= now:
+						entry = heapq.heappop(self._heap)
+						if entry.cancelled:
+							self._stale -= 1
+						else:
+							# from here on cancel() is a no-op
+							entry.cancelled = True
+							expired.append(entry)
+					break
+				if self._closed and len(expired) == 0:
+					return
+			for entry in expired:
+				if self._es is not None:
+					try:
+						self._es.submit(self._expire, entry)
+						continue
+					except RuntimeError:
+						pass
+				self._expire(entry)
+	def _expire(self, entry:_TimerEntry):
+		try:
+			if entry.sink is not None:
+				self.logger.debug(f"sending message {entry.completed}")
+				entry.sink.send(entry.completed)
+		except Exception as ex:
+			self.logger.error(f"Timer exception: {ex}")
+		finally:
+			entry.future.set_result(entry.completed)
 	def shutdown(self):
+		"""Stop the dispatcher; timers still pending complete with None."""
+		with self._cv:
+			self._closed = True
+			pending = [ex for ex in self._heap if not ex.cancelled]
+			for entry in pending:
+				entry.cancelled = True
+			self._heap = []
+			self._stale = 0
+			self._cv.notify()
+		for entry in pending:
+			entry.future.set_result(None)
+		if self._thread is not None and self._thread is not threading.current_thread():
+			self._thread.join()
 		if self._es is not None:
-			self._es.shutdown(wait=True, cancel_futures=True)
\ No newline at end of file
+			# let expiries already handed off finish so their futures resolve
+			self._es.shutdown(wait=True)
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+import logging
+import threading
+from typing import Callable, Iterable
+
+from ..model.schedule import TimerTaskItem, TriggerSpec, compile_schedule_trigger
+from .messages import BasicMessage, ExecuteMessage, MessageSink
+from .timer import TimerService
+
+class TimerTaskFired(ExecuteMessage):
+	"""A timer task's trigger fired at fire_ts."""
+	__slots__ = ("item", "fire_ts")
+	def __init__(self, item: TimerTaskItem, fire_ts: datetime, timestamp: datetime = None):
+		super().__init__(timestamp)
+		self.item = item
+		self.fire_ts = fire_ts
+	def __repr__(self) -> str:
+		return f"TimerTaskFired({self.item.id}, {self.fire_ts.isoformat()})"
+
+class _TaskDue(ExecuteMessage):
+	__slots__ = ("item_id", "fire_ts", "generation")
+	def __init__(self, item_id: str, fire_ts: datetime, generation: int):
+		super().__init__()
+		self.item_id = item_id
+		self.fire_ts = fire_ts
+		self.generation = generation
+
+# a timer that expires this far ahead of its wall-clock fire time (e.g. after a clock step) is re-armed instead
+EARLY_TOLERANCE:timedelta = timedelta(seconds=1)
+
+class TimerTaskRunner(MessageSink):
+	"""
+	Fires enabled TimerTaskItems at their trigger times (see compile_schedule_trigger).
+	Each task keeps exactly one pending timer in the shared TimerService heap, armed for its next fire time;
+	on expiry TimerTaskFired goes to sink and the task is re-armed. No thread or poll loop per task.
+	"""
+	def __init__(self, timer: TimerService, sink: MessageSink, clock: Callable[[], datetime] = None):
+		if timer is None:
+			raise ValueError("timer is None")
+		if sink is None:
+			raise ValueError("sink is None")
+		self.timer = timer
+		self.sink = sink
+		self.clock = clock if clock is not None else datetime.now
+		self._tasks:dict[str, tuple[TimerTaskItem, TriggerSpec]] = {}
+		self._cancel:dict[str, Callable[[], None]] = {}
+		self._next:dict[str, datetime] = {}
+		self._generation = 0
+		self._lock = threading.Lock()
+		self.logger = logging.getLogger(__name__)
+
+	def start(self, items: Iterable[TimerTaskItem]):
+		"""Replace the running set with the enabled items; invalid triggers are logged and skipped."""
+		self.stop()
+		with self._lock:
+			self._generation += 1
+			now = self.clock()
+			for item in items:
+				if not item.enabled:
+					continue
+				try:
+					spec = compile_schedule_trigger(item.trigger)
+				except Exception as e:
+					self.logger.error(f"Timer task '{item.id}' trigger: {e}")
+					continue
+				self._tasks[item.id] = (item, spec)
+				self._arm(item.id, spec.next_after(now), now)
+
+	def stop(self):
+		with self._lock:
+			self._generation += 1
+			cancels = list(self._cancel.values())
+			self._tasks = {}
+			self._cancel = {}
+			self._next = {}
+		for cancel in cancels:
+			cancel()
+
+	def next_fire(self) -> dict[str, datetime]:
+		"""Next fire time by task id."""
+		with self._lock:
+			return dict(self._next)
+
+	def _arm(self, item_id: str, fire_ts: datetime|None, now: datetime):
+		"""Called with _lock held."""
+		if fire_ts is None:
+			self._next.pop(item_id, None)
+			self._cancel.pop(item_id, None)
+			return
+		self._next[item_id] = fire_ts
+		(future, cancel) = self.timer.create_timer(fire_ts - now, self, _TaskDue(item_id, fire_ts, self._generation))
+		self._cancel[item_id] = cancel
+
+	def send(self, msg: BasicMessage):
+		if not isinstance(msg, _TaskDue):
+			return
+		with self._lock:
+			if msg.generation != self._generation or msg.item_id not in self._tasks:
+				return
+			(item, spec) = self._tasks[msg.item_id]
+			now = self.clock()
+			if now + EARLY_TOLERANCE < msg.fire_ts:
+				# wall clock moved back while waiting; wait out the rest
+				self._arm(msg.item_id, msg.fire_ts, now)
+				return
+			self._arm(msg.item_id, spec.next_after(max(now, msg.fire_ts)), now)
+		try:
+			self.sink.send(TimerTaskFired(item, msg.fire_ts))
+		except Exception as e:
+			self.logger.error(f"Timer task '{item.id}' send: {e}")
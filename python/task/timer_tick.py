@@ -1,19 +1,51 @@
 import threading
 import logging
+import time
 from datetime import datetime, timedelta
 
 from .message_router import MessageRouter
-from .messages import ExecuteMessage
+from .messages import ExecuteMessage, Telemetry
+from .tracing import TRACER
 
 class TickMessage(ExecuteMessage):
 	"""Message indicating a timer tick."""
-	def __init__(self, tick_ts:datetime, tick_number:int):
+	__slots__ = ("tick_ts", "tick_number", "catch_up")
+	def __init__(self, tick_ts:datetime, tick_number:int, catch_up:bool = False):
 		super().__init__()
 		self.tick_ts = tick_ts
 		self.tick_number = tick_number
+		# True when sent late for a boundary that was missed
+		self.catch_up = catch_up
 	def __repr__(self):
 		return f"(tick_ts={self.tick_ts}, tick_number={self.tick_number})"
 
+class TickGap(TickMessage):
+	"""
+	Tick for the current boundary that also reports skipped boundaries (suspend, clock step, stalled sender).
+	Handlers that only know TickMessage treat it as an ordinary tick.
+	"""
+	__slots__ = ("missed", "gap_start")
+	def __init__(self, tick_ts:datetime, tick_number:int, missed:int, gap_start:datetime):
+		super().__init__(tick_ts, tick_number)
+		self.missed = missed
+		self.gap_start = gap_start
+	def __repr__(self):
+		return f"(tick_ts={self.tick_ts}, tick_number={self.tick_number}, missed={self.missed}, gap_start={self.gap_start})"
+
+class NextWakeup(ExecuteMessage):
+	"""
+	Hint for an adaptive TimerTick: nothing needs a tick before wakeup_ts.
+	None returns to the regular interval; a time at or before the next boundary changes nothing.
+	"""
+	__slots__ = ("wakeup_ts",)
+	def __init__(self, wakeup_ts:datetime|None):
+		super().__init__()
+		self.wakeup_ts = wakeup_ts
+	def __repr__(self):
+		return f"(wakeup_ts={self.wakeup_ts})"
+
+TICK_CONTROL_ROUTE:str = "tick-control"
+
 class BasicTimer(threading.Thread):
 	def __init__(self, router: MessageRouter):
 		super().__init__()
@@ -23,61 +55,178 @@ class BasicTimer(threading.Thread):
 	def stop(self):
 		self.stopped.set()
 		self.logger.info("Stopping BasicTimer thread.")
+	def send(self, msg: ExecuteMessage):
+		"""Control messages (e.g. NextWakeup); ignored unless the timer supports them."""
+		pass
+
+# wall clock moving this much more (or less) than the monotonic clock is treated as a step
+CLOCK_STEP_THRESHOLD:float = 1.0
 
 class TimerTick(BasicTimer):
-	def __init__(self, router: MessageRouter, interval=60, align_to_minute=True):
+	def __init__(self, router: MessageRouter, interval=60, align_to_minute=True, catch_up=False, max_catch_up=5, report_interval=60, adaptive=False, max_idle=3600):
 		"""
-		:param tasks: List of BasicTask instances to send TickMessage to.
+		Ticks are due on wall-clock boundaries (anchor + n * interval) and waited for with the monotonic clock,
+		re-anchoring to the wall clock every tick, so sleeps never accumulate drift and tick_ts is the boundary itself.
+		:param router: Router receiving TickMessage on the "tick" route.
 		:param interval: Time in seconds between ticks.
 		:param align_to_minute: If True, align second (and later) tick to the next minute.
+		:param catch_up: If True, send a catch_up TickMessage for each missed boundary (up to max_catch_up), otherwise one TickGap.
+		:param report_interval: Send jitter statistics on the "telemetry" route every report_interval ticks (0 disables).
+		:param adaptive: If True, accept NextWakeup hints (route this timer on TICK_CONTROL_ROUTE) and skip boundaries before the hinted time.
+		:param max_idle: Upper bound in seconds on a hinted sleep.
 		"""
 		super().__init__(router)
 		self.interval = interval
 		self.align_to_minute = align_to_minute
+		self.catch_up = catch_up
+		self.max_catch_up = max_catch_up
+		self.report_interval = report_interval
 		self.tick_count = 0
+		self.next_tick_ts:datetime = None
+		self.jitter_count = 0
+		self.jitter_total = 0.0
+		self.jitter_max = 0.0
+		self.jitter_last = 0.0
+		self.missed_ticks = 0
+		self.gaps = 0
+		self.clock_steps = 0
+		self.adaptive = adaptive
+		self.max_idle = max_idle
+		self.wakeup_hint:datetime = None
+		self.skipped_ticks = 0
+		# interrupts the sleep on stop() or a new hint
+		self.rearm = threading.Event()
 		self.logger = logging.getLogger(__name__)
 
+	def stop(self):
+		super().stop()
+		self.rearm.set()
+
+	def send(self, msg: ExecuteMessage):
+		"""MessageSink for NextWakeup hints (usually sent by the Scheduler on TICK_CONTROL_ROUTE)."""
+		if not self.adaptive or not isinstance(msg, NextWakeup):
+			return
+		self.logger.debug(f"NextWakeup {msg.wakeup_ts}")
+		self.wakeup_hint = msg.wakeup_ts
+		self.rearm.set()
+
+	def _wakeup_target(self) -> datetime:
+		"""The boundary to sleep until: next_tick_ts, or the first boundary at or after the hint (bounded by max_idle)."""
+		hint = self.wakeup_hint
+		if hint is None or hint <= self.next_tick_ts:
+			return self.next_tick_ts
+		step = timedelta(seconds=self.interval)
+		hint = min(hint, self.next_tick_ts + timedelta(seconds=self.max_idle))
+		skip = -((self.next_tick_ts - hint) // step)
+		return self.next_tick_ts + step * skip
+
+	def _skip_until(self, ts:datetime):
+		"""Advance next_tick_ts to the first boundary at or after ts; the boundaries passed were skipped on purpose, not missed."""
+		if ts <= self.next_tick_ts:
+			return
+		step = timedelta(seconds=self.interval)
+		skip = -((self.next_tick_ts - ts) // step)
+		self.skipped_ticks += skip
+		self.next_tick_ts += step * skip
+
+	def _first_boundary(self, now:datetime) -> datetime:
+		if self.align_to_minute or self.interval >= 60:
+			return (now + timedelta(minutes=1)).replace(second=0, microsecond=0)
+		if self.interval >= 1:
+			return (now + timedelta(seconds=1)).replace(microsecond=0)
+		return now + timedelta(seconds=self.interval)
+
+	def _next_tick(self, tick_ts:datetime, catch_up:bool = False) -> TickMessage:
+		tick = TickMessage(tick_ts, self.tick_count, catch_up)
+		tick.trace_id = TRACER.begin("tick")
+		self.tick_count += 1
+		return tick
+
+	def _collect(self, now:datetime) -> list[TickMessage]:
+		"""
+		Ticks owed at wall time now, advancing next_tick_ts past now.
+		Empty if the next boundary has not been reached yet.
+		"""
+		if now < self.next_tick_ts - timedelta(seconds=CLOCK_STEP_THRESHOLD):
+			# wall clock stepped back; resume from the next boundary after now
+			self.logger.warning(f"Wall clock stepped back to {now}, expected {self.next_tick_ts}; re-anchoring.")
+			self.next_tick_ts = self._first_boundary(now)
+			return []
+		if now < self.next_tick_ts:
+			return []
+		step = timedelta(seconds=self.interval)
+		due = int((now - self.next_tick_ts) / step) + 1
+		first = self.next_tick_ts
+		last = first + step * (due - 1)
+		self.next_tick_ts = last + step
+		missed = due - 1
+		lateness = (now - last).total_seconds()
+		self.jitter_count += 1
+		self.jitter_total += lateness
+		self.jitter_max = max(self.jitter_max, lateness)
+		self.jitter_last = lateness
+		if missed == 0:
+			return [self._next_tick(last)]
+		self.missed_ticks += missed
+		self.logger.warning(f"Missed {missed} tick(s) from {first} to {last}.")
+		if self.catch_up and missed <= self.max_catch_up:
+			ticks = [self._next_tick(first + step * ix, True) for ix in range(missed)]
+			ticks.append(self._next_tick(last))
+			return ticks
+		self.gaps += 1
+		tick = TickGap(last, self.tick_count, missed, first)
+		tick.trace_id = TRACER.begin("tick")
+		self.tick_count += 1
+		return [tick]
+
+	def stats(self) -> dict[str,any]:
+		return {
+			"ticks": self.tick_count,
+			"jitter_avg_ms": (self.jitter_total / self.jitter_count) * 1000 if self.jitter_count > 0 else 0.0,
+			"jitter_max_ms": self.jitter_max * 1000,
+			"jitter_last_ms": self.jitter_last * 1000,
+			"missed_ticks": self.missed_ticks,
+			"gaps": self.gaps,
+			"clock_steps": self.clock_steps,
+			"skipped_ticks": self.skipped_ticks,
+		}
+
+	def _send(self, tick:TickMessage):
+		self.logger.info(f"Tick {tick.tick_number}: {tick.tick_ts}")
+		self.router.send("tick", tick)
+		if self.report_interval > 0 and self.tick_count % self.report_interval == 0:
+			self.router.send("telemetry", Telemetry("timer_tick", self.stats()))
+
 	def run(self):
 		self.logger.info("TimerTick thread starting.")
 		try:
-			if self.align_to_minute:
-				self.logger.info("Aligning to next minute.")
-				# TODO get the system-settings.timeZone
-				now = datetime.now()
-				next_minute = (now + timedelta(minutes=1)).replace(second=0, microsecond=0)
-				sleep_seconds = (next_minute - now).total_seconds()
-				tick = TickMessage(now, self.tick_count)
-				self.logger.info(f"Pre-align Tick {tick.tick_number}: {tick.tick_ts}")
-				self.tick_count += 1
-				self.router.send("tick", tick)
-				self.logger.debug(f"Sleeping for {sleep_seconds:.2f} seconds to align to minute {next_minute}.")
-				if self.stopped.wait(timeout=sleep_seconds):
-					return  # Exit if stop event is set
-
+			now = datetime.now()
+			self.next_tick_ts = self._first_boundary(now)
+			self._send(self._next_tick(now))
 			while not self.stopped.is_set():
+				self.rearm.clear()
+				target = self._wakeup_target()
+				wall = datetime.now()
+				mono = time.monotonic()
+				sleep_time = max(0, (target - wall).total_seconds())
+				self.logger.debug(f"Sleeping for {sleep_time:.4f} seconds until {target}.")
+				if self.rearm.wait(timeout=sleep_time):
+					# stopped, or a new hint: recompute the target
+					if target > self.next_tick_ts:
+						# boundaries passed while sleeping toward the old hint were skipped, not missed
+						self._skip_until(datetime.now())
+					continue
 				now = datetime.now()
-				tick = TickMessage(now, self.tick_count)
-				self.tick_count += 1
-				self.logger.info(f"Tick {tick.tick_number}: {tick.tick_ts}")
-				self.router.send("tick", tick)
-				# Align to next interval boundary
-				if self.interval >= 60:
-					overage = now - now.replace(second=0, microsecond=0)
-					sleep_time = max(0, self.interval - overage.total_seconds())
-					self.logger.debug(f"Sleeping for {sleep_time:.4f} seconds (interval={self.interval}, now={now}).")
-					if self.stopped.wait(timeout=sleep_time):
-						break
-				elif self.interval >= 1:
-					overage = now - now.replace(microsecond=0)
-					sleep_time = max(0, self.interval - overage.total_seconds())
-					self.logger.debug(f"Sleeping for {sleep_time:.4f} seconds (interval={self.interval}, now={now}).")
-					if self.stopped.wait(timeout=sleep_time):
-						break
-				else:
-					self.logger.debug(f"Sleeping for {self.interval:.2f}.")
-					if self.stopped.wait(timeout=self.interval):
-						break
-
+				if target > self.next_tick_ts:
+					# boundaries before the hint were skipped on purpose, not missed
+					self._skip_until(target)
+				# wall and monotonic should advance together; a difference is a clock step or suspend/resume
+				skew = (now - wall).total_seconds() - (time.monotonic() - mono)
+				if abs(skew) > CLOCK_STEP_THRESHOLD:
+					self.clock_steps += 1
+					self.logger.warning(f"Wall clock moved {skew:+.3f}s relative to monotonic clock.")
+				for tick in self._collect(now):
+					self._send(tick)
 		except Exception as e:
 			self.logger.error(f"Exception in TimerTick thread: {e}", exc_info=True)
 		finally:
@@ -0,0 +1,99 @@
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import itertools
+import threading
+import time
+from typing import Callable
+
+# trace of the message currently being handled on this thread/coroutine; new messages inherit it
+_current:ContextVar[int|None] = ContextVar("trace_id", default=None)
+
+def current_trace() -> int|None:
+	return _current.get()
+
+@contextmanager
+def activate(trace_id:int|None):
+	"""Make trace_id current for the enclosed block (e.g. while handling a traced message)."""
+	token = _current.set(trace_id)
+	try:
+		yield trace_id
+	finally:
+		_current.reset(token)
+
+class Tracer:
+	"""
+	Records per-stage spans of traced work (tick -> schedule -> plugin -> display -> panel) in a ring buffer.
+	A trace starts with begin(), collects span() records from any thread, and ends with complete(),
+	which adds an end-to-end span measured from begin().
+	"""
+	def __init__(self, capacity:int = 2048, open_traces:int = 64):
+		self.enabled = True
+		self.spans:deque[tuple] = deque(maxlen=capacity)
+		# origin of traces still in flight; most never reach the display, so this is bounded too
+		self._origins:OrderedDict[int, tuple[str, float]] = OrderedDict()
+		self._open_traces = open_traces
+		self._ids = itertools.count(1)
+		self._lock = threading.Lock()
+		# optional callback(stage, duration_ms) per span, e.g. TelemetryAggregator.observe
+		self.observer:Callable[[str, float], None] = None
+
+	def begin(self, origin:str) -> int|None:
+		if not self.enabled:
+			return None
+		trace_id = next(self._ids)
+		with self._lock:
+			self._origins[trace_id] = (origin, time.monotonic())
+			while len(self._origins) > self._open_traces:
+				self._origins.popitem(last=False)
+		return trace_id
+
+	def record(self, trace_id:int, stage:str, start:float, end:float):
+		self.spans.append((trace_id, stage, start, end, threading.current_thread().name))
+		observer = self.observer
+		if observer is not None:
+			observer(f"trace.{stage}", (end - start) * 1000)
+
+	@contextmanager
+	def span(self, stage:str, trace_id:int|None = None):
+		"""Time the enclosed block as a stage of trace_id (default: the current trace); no-op if untraced."""
+		trace_id = trace_id if trace_id is not None else _current.get()
+		if trace_id is None or not self.enabled:
+			yield
+			return
+		start = time.monotonic()
+		try:
+			yield
+		finally:
+			self.record(trace_id, stage, start, time.monotonic())
+
+	def complete(self, trace_id:int|None, stage:str = "end-to-end"):
+		if trace_id is None:
+			return
+		with self._lock:
+			origin = self._origins.pop(trace_id, None)
+		if origin is not None:
+			self.record(trace_id, f"{origin[0]}:{stage}", origin[1], time.monotonic())
+
+	def snapshot(self, limit:int = 50) -> list[dict]:
+		"""The most recent limit traces (newest first) with their spans in ms, relative to the first span."""
+		traces:dict[int, list[tuple]] = {}
+		for span in list(self.spans):
+			traces.setdefault(span[0], []).append(span)
+		retv = []
+		for trace_id in sorted(traces.keys(), reverse=True)[:limit]:
+			spans = sorted(traces[trace_id], key=lambda sx: sx[2])
+			t0 = spans[0][2]
+			retv.append({
+				"trace_id": trace_id,
+				"spans": [{
+					"stage": sx[1],
+					"start_ms": round((sx[2] - t0) * 1000, 3),
+					"duration_ms": round((sx[3] - sx[2]) * 1000, 3),
+					"thread": sx[4],
+				} for sx in spans],
+			})
+		return retv
+
+# process-wide, like logging; tasks record into it and the API reads it
+TRACER = Tracer()
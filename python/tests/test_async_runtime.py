@@ -0,0 +1,118 @@
+import os
+import statistics
+import threading
+import time
+import unittest
+import logging
+
+import psutil
+
+from ..task.async_runtime import AsyncRuntime
+from ..task.basic_task import BasicTask
+from ..task.messages import ExecuteMessage, ExecuteMessageWithContent, QuitMessage
+
+class RecordingTask(BasicTask):
+	def __init__(self, name, batch_size=1):
+		super().__init__(name, batch_size=batch_size)
+		self.received = []
+		self.threads = set()
+
+	def execute(self, msg: ExecuteMessage):
+		self.threads.add(threading.current_thread().name)
+		self.received.append(msg.content)
+
+class PingTask(BasicTask):
+	"""Forwards each message to the next task; the last one records round-trip latency."""
+	def __init__(self, name, next_task=None, done:threading.Event=None):
+		super().__init__(name)
+		self.next_task = next_task
+		self.done = done
+		self.latencies = []
+
+	def execute(self, msg: ExecuteMessage):
+		if self.next_task is not None:
+			self.next_task.send(msg)
+		else:
+			self.latencies.append(time.perf_counter() - msg.content)
+			if self.done is not None:
+				self.done.set()
+
+class TestAsyncRuntime(unittest.TestCase):
+	def test_hosted_tasks_share_loop_thread(self):
+		runtime = AsyncRuntime(name="test-runtime")
+		tasks = [RecordingTask(f"task-{ix}") for ix in range(5)]
+		for task in tasks:
+			runtime.host(task)
+			task.start()
+		for ix in range(20):
+			for task in tasks:
+				task.send(ExecuteMessageWithContent(ix))
+		for task in tasks:
+			task.send(QuitMessage())
+		for task in tasks:
+			task.join(timeout=2)
+			self.assertFalse(task.is_alive())
+			self.assertTrue(task.stopped.is_set())
+			self.assertEqual(task.received, list(range(20)))
+			self.assertEqual(task.threads, { "test-runtime" })
+		runtime.shutdown()
+
+	def test_offload_and_batch(self):
+		runtime = AsyncRuntime(max_workers=1, name="test-runtime")
+		task = RecordingTask("offloaded", batch_size=8)
+		runtime.host(task, offload=True)
+		for ix in range(10):
+			task.send(ExecuteMessageWithContent(ix))
+		task.start()
+		task.send(QuitMessage())
+		task.join(timeout=2)
+		self.assertFalse(task.is_alive())
+		self.assertEqual(task.received, list(range(10)))
+		self.assertNotIn("test-runtime", task.threads)
+		runtime.shutdown()
+
+CHAIN = 50
+ROUNDS = 200
+@unittest.skipUnless(os.environ.get("RUN_BENCHMARKS"), "Set RUN_BENCHMARKS=1 to compare threaded and async runtimes.")
+class BenchmarkRuntime(unittest.TestCase):
+	def run_chain(self, runtime:AsyncRuntime|None):
+		process = psutil.Process()
+		rss_before = process.memory_info().rss
+		done = threading.Event()
+		last = PingTask(f"ping-{CHAIN - 1}", None, done)
+		chain = [last]
+		for ix in range(CHAIN - 2, -1, -1):
+			chain.insert(0, PingTask(f"ping-{ix}", chain[0]))
+		for task in chain:
+			if runtime is not None:
+				runtime.host(task)
+			task.start()
+		rss_started = process.memory_info().rss
+		threads = threading.active_count()
+		for _ in range(ROUNDS):
+			done.clear()
+			chain[0].send(ExecuteMessageWithContent(time.perf_counter()))
+			done.wait(timeout=5)
+		for task in chain:
+			task.send(QuitMessage())
+		for task in chain:
+			task.join()
+		latencies = sorted(last.latencies)
+		return {
+			"rss_delta_kb": (rss_started - rss_before) // 1024,
+			"threads": threads,
+			"median_ms": statistics.median(latencies) * 1000,
+			"p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+		}
+
+	def test_compare(self):
+		logger = logging.getLogger(__name__)
+		threaded = self.run_chain(None)
+		runtime = AsyncRuntime(name="bench-runtime")
+		hosted = self.run_chain(runtime)
+		runtime.shutdown()
+		logger.info(f"threaded {threaded}")
+		logger.info(f"async    {hosted}")
+
+if __name__ == "__main__":
+	unittest.main()
@@ -1,6 +1,7 @@
+import threading
 import unittest
 import logging
-from ..task.basic_task import BasicTask
+from ..task.basic_task import BasicTask, handles
 from ..task.messages import ExecuteMessage, ExecuteMessageWithContent, QuitMessage
 
 class RecordingTask(BasicTask):
@@ -11,6 +12,41 @@ class RecordingTask(BasicTask):
 	def execute(self, msg: ExecuteMessage):
 		self.received.append(msg.content)
 
+class BatchRecordingTask(BasicTask):
+	def __init__(self, batch_size):
+		super().__init__(batch_size=batch_size)
+		self.gate = threading.Event()
+		self.batches = []
+		self.received = []
+
+	def execute_batch(self, msgs):
+		self.gate.wait(timeout=2)
+		self.batches.append(len(msgs))
+		super().execute_batch(msgs)
+
+	def execute(self, msg: ExecuteMessage):
+		self.received.append(msg.content)
+
+class BaseCommand(ExecuteMessage):
+	pass
+class DerivedCommand(BaseCommand):
+	pass
+class SpecialCommand(DerivedCommand):
+	pass
+class OrphanCommand(ExecuteMessage):
+	pass
+
+class HandlerTask(BasicTask):
+	def __init__(self):
+		super().__init__()
+		self.handled = []
+	@handles(BaseCommand)
+	def _base(self, msg):
+		self.handled.append(("base", type(msg)))
+	@handles(SpecialCommand)
+	def _special(self, msg):
+		self.handled.append(("special", type(msg)))
+
 class TestBasicTask(unittest.TestCase):
 	def test_execute_message(self):
 		task = RecordingTask()
@@ -30,5 +66,41 @@ class TestBasicTask(unittest.TestCase):
 		self.assertFalse(task.is_alive())
 		self.assertEqual(task.received, [])
 
+	def test_batch_mode(self):
+		task = BatchRecordingTask(4)
+		task.start()
+		for ix in range(10):
+			task.send(ExecuteMessageWithContent(ix))
+		task.gate.set()
+		task.msg_queue.join()
+		task.send(QuitMessage())
+		task.join(timeout=1)
+		self.assertFalse(task.is_alive())
+		self.assertEqual(task.received, list(range(10)), 'Batched messages must arrive in order')
+		self.assertTrue(all(bx <= 4 for bx in task.batches), 'Batch size exceeded')
+		self.assertLess(len(task.batches), 10, 'Pending messages should have been batched')
+
+	def test_batch_mode_quit(self):
+		task = BatchRecordingTask(8)
+		task.start()
+		task.send(QuitMessage())
+		task.join(timeout=1)
+		self.assertFalse(task.is_alive())
+		self.assertTrue(task.stopped.is_set())
+		self.assertEqual(task.batches, [])
+
+	def test_handler_registry(self):
+		task = HandlerTask()
+		task.execute(BaseCommand())
+		task.execute(DerivedCommand())
+		task.execute(SpecialCommand())
+		task.execute(OrphanCommand())
+		task.execute(OrphanCommand())
+		self.assertEqual(task.handled, [("base", BaseCommand), ("base", DerivedCommand), ("special", SpecialCommand)])
+		self.assertEqual(task.unhandled_types, { OrphanCommand: 2 })
+		self.assertEqual(HandlerTask.resolve_handler(DerivedCommand), "_base")
+		self.assertIn(DerivedCommand, HandlerTask._handler_cache)
+		self.assertCountEqual(HandlerTask.handled_types(), [BaseCommand, SpecialCommand])
+
 if __name__ == "__main__":
 	unittest.main()
\ No newline at end of file
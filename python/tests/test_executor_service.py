@@ -0,0 +1,68 @@
+import threading
+import unittest
+
+from ..task.executor_service import POOL_CPU, POOL_IO, ExecutorService
+from ..task.future_source import FutureSource
+from ..task.messages import BasicMessage
+
+class RecordingPort:
+	def __init__(self):
+		self.messages = []
+		self.event = threading.Event()
+	def send(self, msg: BasicMessage):
+		self.messages.append(msg)
+		self.event.set()
+
+class TestExecutorService(unittest.TestCase):
+	def test_worker_cap(self):
+		with self.assertRaises(ValueError):
+			ExecutorService({ POOL_IO: 4, POOL_CPU: 4 }, max_workers=6)
+		es = ExecutorService()
+		with self.assertRaises(ValueError):
+			es.lease("missing")
+		es.shutdown()
+
+	def test_metrics(self):
+		es = ExecutorService({ POOL_IO: 1 }, max_workers=1)
+		lease = es.lease(POOL_IO)
+		gate = threading.Event()
+		first = lease.submit(gate.wait, 2)
+		second = lease.submit(lambda: 1 / 0)
+		stats = es.stats()[POOL_IO]
+		self.assertEqual(stats["submitted"], 2)
+		self.assertEqual(stats["pending"], 1)
+		gate.set()
+		self.assertTrue(first.result(timeout=2))
+		with self.assertRaises(ZeroDivisionError):
+			second.result(timeout=2)
+		stats = es.stats()[POOL_IO]
+		self.assertEqual(stats["pending"], 0)
+		self.assertEqual(stats["active"], 0)
+		self.assertEqual(stats["completed"], 2)
+		self.assertEqual(stats["failed"], 1)
+		self.assertGreater(stats["wait_max_ms"], 0)
+		es.shutdown()
+
+	def test_lease_shutdown_leaves_pool_running(self):
+		es = ExecutorService({ POOL_IO: 1 }, max_workers=1)
+		gate = threading.Event()
+		first = es.lease(POOL_IO)
+		blocker = first.submit(gate.wait, 2)
+		queued = first.submit(lambda: "never")
+		# what FutureSource/DataSourceManager/TimerService do on their shutdown
+		first.shutdown(wait=False, cancel_futures=True)
+		self.assertTrue(queued.cancelled())
+		with self.assertRaises(RuntimeError):
+			first.submit(lambda: None)
+		gate.set()
+		blocker.result(timeout=2)
+		port = RecordingPort()
+		fs = FutureSource(port, es.lease(POOL_IO))
+		fs.submit_future(lambda _: 42, lambda cancelled, result, ex: BasicMessage())
+		self.assertTrue(port.event.wait(timeout=2))
+		fs.shutdown()
+		self.assertEqual(es.stats()[POOL_IO]["cancelled"], 1)
+		es.shutdown()
+
+if __name__ == "__main__":
+	unittest.main()
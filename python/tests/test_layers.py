@@ -1,15 +1,18 @@
 from collections.abc import Callable
+from concurrent.futures import Future
 import os
 from threading import Event
 import time
+from types import SimpleNamespace
 import unittest
 
 from .test_plugin import RecordingTask
 from ..datasources.data_source import DataSourceManager
 from ..task.display import DisplaySettings
+from ..task.executor_service import ExecutorService
 from ..task.timer import TimerService
-from ..task.messages import BasicMessage, ConfigureEvent, ConfigureOptions, MessageSink, QuitMessage, Telemetry
-from ..task.playlist_layer import PlaylistLayer, StartPlayback
+from ..task.messages import BasicMessage, ConfigureEvent, ConfigureOptions, MessageSink, QuitMessage, ScheduleUpdated, Telemetry
+from ..task.playlist_layer import NextTrack, PlaylistLayer, StartPlayback
 from ..task.message_router import MessageRouter, Route
 from ..plugins.plugin_base import BasicExecutionContext2, PluginBase, PluginProtocol
 from ..model.schedule import Playlist, PlaylistBase, PlaylistSchedule, PlaylistScheduleData, SchedulableBase
@@ -36,6 +39,34 @@ class TestPlugin(PluginProtocol):
 		self.started = True
 		self.start_args = (track, context)
 
+class StagedPlugin(PluginProtocol):
+	def __init__(self, id, name):
+		self._id = id
+		self._name = name
+		self.prepared:tuple[PlaylistBase, Future] = None
+		self.started_with = None
+		self.resets = 0
+	@property
+	def id(self) -> str:
+		return self._id
+	@property
+	def name(self) -> str:
+		return self._name
+	def prepare(self, context: BasicExecutionContext2, track: SchedulableBase|PlaylistBase):
+		self.prepared = (track, Future())
+		return self.prepared[1]
+	def reset(self):
+		self.resets += 1
+		if self.prepared is not None:
+			self.prepared[1].cancel()
+			self.prepared = None
+	def start(self, context: BasicExecutionContext2, track: SchedulableBase|PlaylistBase):
+		self.started_with = "prepared" if self.prepared is not None and self.prepared[0] is track else "cold"
+	def receive(self, context: BasicExecutionContext2, track: SchedulableBase|PlaylistBase, msg: BasicMessage):
+		pass
+	def stop(self, context: BasicExecutionContext2, track: SchedulableBase|PlaylistBase):
+		pass
+
 class MessageTriggerSink(MessageSink):
 	def __init__(self, trigger: Callable[[BasicMessage], bool]):
 		self.trigger = trigger
@@ -134,6 +165,93 @@ class PlaylistLayerTests(unittest.TestCase):
 		self.assertNotEqual(self.layer.state, 'playing')
 		self.assertIsNone(self.layer.playlist_state)
 
+class PlaylistLayerLookaheadTests(unittest.TestCase):
+	def setUp(self):
+		self.router = MessageRouter()
+		self.executors = ExecutorService()
+		self.layer = PlaylistLayer("testlayer", self.router, self.executors, lookahead=2)
+		self.layer.cm = create_configuration_manager()
+		self.layer.datasources = DataSourceManager(None, {})
+		self.layer.timer = TimerService(None)
+		self.layer.plugin_info = [
+			{
+				"info": {
+					"id": "staged", "name": "Staged Plugin",
+					"module":"python.tests.test_layers",
+					"class":"StagedPlugin",
+					"file":"test_layers.py"
+				},
+				"path": os.path.dirname(os.path.abspath(__file__))
+			}
+		]
+	def tearDown(self):
+		# quitMsg already released these
+		if self.layer.timer is not None:
+			self.layer.timer.shutdown()
+		if self.layer.datasources is not None:
+			self.layer.datasources.shutdown()
+		self.executors.shutdown()
+	def playlist(self, id:str, count:int):
+		tracks = [PlaylistSchedule("staged", f"{id}-t{ix}", f"Track {ix}", PlaylistScheduleData({})) for ix in range(count)]
+		return { "info": Playlist(id, id, items=tracks) }
+	def test_next_track_uses_staged(self):
+		self.layer.playlists = [self.playlist("pl1", 2), self.playlist("pl2", 1)]
+		self.layer.state = 'loaded'
+		self.layer.execute(StartPlayback("start"))
+		self.assertEqual(self.layer.state, 'playing')
+		self.assertEqual(self.layer.active_plugin.started_with, "cold")
+		# the rest of this playlist, then the first track of the next one
+		staged = self.layer.staged
+		self.assertEqual([sx["position"][3].id for sx in staged], ["pl1-t1", "pl2-t0"])
+		self.assertTrue(all(isinstance(sx["future"], Future) for sx in staged))
+		next_plugin = staged[0]["plugin"]
+		self.layer.execute(NextTrack())
+		self.assertIs(self.layer.active_plugin, next_plugin)
+		self.assertEqual(self.layer.active_plugin.started_with, "prepared")
+		self.assertEqual(self.layer.playlist_state["current_track"].id, "pl1-t1")
+		# the staged entry still valid is kept, the window moves on (wraps around)
+		self.assertEqual([sx["position"][3].id for sx in self.layer.staged], ["pl2-t0", "pl1-t0"])
+	def test_schedule_update_cancels_staged(self):
+		self.layer.playlists = [self.playlist("pl1", 3)]
+		self.layer.state = 'loaded'
+		self.layer.execute(StartPlayback("start"))
+		old = list(self.layer.staged)
+		self.assertEqual(len(old), 2)
+		snapshot = SimpleNamespace(playlists=[self.playlist("pl1", 3)])
+		self.layer.execute(ScheduleUpdated(snapshot, ["playlists.json"]))
+		for entry in old:
+			self.assertTrue(entry["future"].cancelled())
+			self.assertEqual(entry["plugin"].resets, 1)
+		updated = snapshot.playlists[0]["info"]
+		self.assertEqual([sx["position"][3] for sx in self.layer.staged], updated.items[1:3])
+		# quitting cancels the rest
+		staged = list(self.layer.staged)
+		self.layer.quitMsg(QuitMessage())
+		self.assertTrue(all(sx["future"].cancelled() for sx in staged))
+		self.assertEqual(self.layer.staged, [])
+	def test_schedule_update_relocates_track(self):
+		self.layer.playlists = [self.playlist("pl1", 3)]
+		self.layer.state = 'loaded'
+		self.layer.execute(StartPlayback("start"))
+		self.layer.execute(NextTrack())
+		self.assertEqual(self.layer.playlist_state["current_track"].id, "pl1-t1")
+		# a track inserted before the current one does not repeat or skip anything
+		updated = self.playlist("pl1", 3)
+		updated["info"].items.insert(0, PlaylistSchedule("staged", "new", "New", PlaylistScheduleData({})))
+		self.layer.execute(ScheduleUpdated(SimpleNamespace(playlists=[updated]), ["playlists.json"]))
+		self.assertEqual(self.layer.playlist_state["current_track_index"], 2)
+		self.assertEqual(self.layer.staged[0]["position"][3].id, "pl1-t2")
+		# the current track removed: the one that took its place plays next
+		updated = self.playlist("pl1", 3)
+		del updated["info"].items[1]
+		self.layer.execute(ScheduleUpdated(SimpleNamespace(playlists=[updated]), ["playlists.json"]))
+		self.assertEqual(self.layer.staged[0]["position"][3].id, "pl1-t2")
+		# every playlist removed: playback stops at the end of this track
+		self.layer.execute(ScheduleUpdated(SimpleNamespace(playlists=[]), ["playlists.json"]))
+		self.assertEqual(self.layer.playlist_state["current_playlist_index"], -1)
+		self.assertEqual(self.layer.staged, [])
+		self.layer.execute(NextTrack())
+		self.assertIsNone(self.layer.active_plugin)
 
 if __name__ == '__main__':
 	unittest.main()
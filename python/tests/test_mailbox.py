@@ -0,0 +1,70 @@
+import threading
+import unittest
+
+from ..task.basic_task import BasicTask
+from ..task.mailbox import PriorityMailbox
+from ..task.messages import ExecuteMessage, ExecuteMessageWithContent, QuitMessage
+
+class UrgentMessage(ExecuteMessageWithContent[str]):
+	def __init__(self, content: str):
+		super().__init__(content)
+
+class FrameMessage(ExecuteMessageWithContent[int]):
+	def __init__(self, content: int):
+		super().__init__(content)
+
+class GatedTask(BasicTask):
+	"""Blocks on the first message until released, so the mailbox can fill up."""
+	def __init__(self, mailbox):
+		super().__init__("gated", mailbox)
+		self.gate = threading.Event()
+		self.received = []
+	def execute(self, msg: ExecuteMessage):
+		self.gate.wait(timeout=2)
+		self.received.append(msg.content)
+
+class TestPriorityMailbox(unittest.TestCase):
+	def test_priority_order(self):
+		mb = PriorityMailbox({ UrgentMessage: 10 })
+		mb.put(ExecuteMessageWithContent("a"))
+		mb.put(UrgentMessage("u"))
+		mb.put(ExecuteMessageWithContent("b"))
+		mb.put(QuitMessage())
+		self.assertIsInstance(mb.get(), QuitMessage)
+		self.assertEqual(mb.get().content, "u")
+		self.assertEqual(mb.get().content, "a")
+		self.assertEqual(mb.get().content, "b")
+		self.assertEqual(mb.qsize(), 0)
+
+	def test_coalesce_latest_wins(self):
+		mb = PriorityMailbox(None, [FrameMessage])
+		mb.put(FrameMessage(1))
+		mb.put(ExecuteMessageWithContent("x"))
+		mb.put(FrameMessage(2))
+		mb.put(FrameMessage(3))
+		self.assertEqual(mb.qsize(), 2)
+		self.assertEqual(mb.coalesced, 2)
+		self.assertEqual(mb.get().content, 3)
+		mb.task_done()
+		self.assertEqual(mb.get().content, "x")
+		mb.task_done()
+		# unfinished task accounting must balance
+		mb.join()
+		mb.put(FrameMessage(4))
+		self.assertEqual(mb.get().content, 4)
+
+	def test_quit_skips_backlog(self):
+		task = GatedTask(PriorityMailbox())
+		task.start()
+		for ix in range(100):
+			task.send(ExecuteMessageWithContent(ix))
+		task.send(QuitMessage())
+		task.gate.set()
+		task.join(timeout=2)
+		self.assertFalse(task.is_alive())
+		self.assertTrue(task.stopped.is_set())
+		# at most the message in flight when quit arrived was executed
+		self.assertLessEqual(len(task.received), 1)
+
+if __name__ == "__main__":
+	unittest.main()
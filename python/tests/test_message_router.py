@@ -0,0 +1,207 @@
+import threading
+import time
+import unittest
+
+from ..task.basic_task import BasicTask
+from ..task.message_router import BLOCK, DROP_NEWEST, DROP_OLDEST, LATEST, DeliveryPolicy, MessageRouter, Route
+from ..task.messages import BasicMessage, ExecuteMessage, ExecuteMessageWithContent, MessageSink, QuitMessage, Telemetry
+
+class CountingSink(MessageSink):
+	def __init__(self):
+		self.received = []
+	def send(self, msg: BasicMessage):
+		self.received.append(msg)
+
+class BlockingSink(MessageSink):
+	def __init__(self):
+		self.entered = threading.Event()
+		self.release = threading.Event()
+	def send(self, msg: BasicMessage):
+		self.entered.set()
+		self.release.wait(timeout=2)
+
+class FailingSink(MessageSink):
+	def send(self, msg: BasicMessage):
+		raise RuntimeError("deliberate failure for testing")
+
+class TestMessageRouter(unittest.TestCase):
+	def test_route_counters(self):
+		router = MessageRouter()
+		sink = CountingSink()
+		router.addRoute(Route("test", [sink, FailingSink()]))
+		router.send("test", ExecuteMessage())
+		router.send("test", ExecuteMessage())
+		router.send("missing", ExecuteMessage())
+		self.assertEqual(len(sink.received), 2)
+		stats = router.route_stats()
+		self.assertEqual(stats, { "test": { "sent": 2, "delivered": 2, "rejected": 0, "errors": 2 } })
+
+	def test_stopped_task_rejected(self):
+		router = MessageRouter()
+		task = BasicTask("stopped")
+		task.start()
+		task.send(QuitMessage())
+		task.join(timeout=2)
+		router.addRoute(Route("test", [task]))
+		router.send("test", ExecuteMessage())
+		self.assertEqual(router.route_stats()["test"], { "sent": 1, "delivered": 0, "rejected": 1, "errors": 0 })
+
+	def test_add_remove_route(self):
+		router = MessageRouter()
+		first = CountingSink()
+		router.addRoute(Route("test", [first]))
+		# first registration wins
+		router.addRoute(Route("test", [CountingSink()]))
+		router.send("test", ExecuteMessage())
+		self.assertEqual(len(first.received), 1)
+		removed = router.removeRoute("test")
+		self.assertIsNotNone(removed)
+		self.assertIsNone(router.removeRoute("test"))
+		router.send("test", ExecuteMessage())
+		self.assertEqual(len(first.received), 1)
+
+	def test_slow_receiver_does_not_block_other_routes(self):
+		router = MessageRouter()
+		slow = BlockingSink()
+		fast = CountingSink()
+		router.addRoute(Route("slow", [slow]))
+		router.addRoute(Route("fast", [fast]))
+		sender = threading.Thread(target=lambda: router.send("slow", ExecuteMessage()))
+		sender.start()
+		self.assertTrue(slow.entered.wait(timeout=1))
+		# while the slow send is in progress, other routes (and route changes) proceed
+		router.send("fast", ExecuteMessage())
+		router.addRoute(Route("late", [fast]))
+		router.send("late", ExecuteMessage())
+		self.assertEqual(len(fast.received), 2)
+		slow.release.set()
+		sender.join(timeout=1)
+		self.assertFalse(sender.is_alive())
+
+class GatedSink(MessageSink):
+	"""Stalls on the first message until released."""
+	def __init__(self):
+		self.entered = threading.Event()
+		self.release = threading.Event()
+		self.received = []
+	def send(self, msg: BasicMessage):
+		self.entered.set()
+		self.release.wait(timeout=2)
+		self.received.append(msg.content)
+
+class TestDeliveryPolicy(unittest.TestCase):
+	def test_drop_oldest(self):
+		router = MessageRouter()
+		sink = GatedSink()
+		router.addRoute(Route("test", [sink], DeliveryPolicy(DROP_OLDEST, 2)))
+		router.send("test", ExecuteMessageWithContent(0))
+		self.assertTrue(sink.entered.wait(timeout=1))
+		for ix in range(1, 6):
+			router.send("test", ExecuteMessageWithContent(ix))
+		stats = router.route_stats()["test"]
+		self.assertEqual(stats["pending"], 2)
+		self.assertEqual(stats["dropped"], 3)
+		self.assertEqual(stats["overflow"], 3)
+		outbox = router.routes["test"].outboxes[0]
+		self.assertEqual([mx.content for mx in outbox.pending], [4, 5])
+		sink.release.set()
+		router.shutdown()
+
+	def test_drop_newest(self):
+		router = MessageRouter()
+		sink = GatedSink()
+		router.addRoute(Route("test", [sink], DeliveryPolicy(DROP_NEWEST, 2)))
+		router.send("test", ExecuteMessageWithContent(0))
+		self.assertTrue(sink.entered.wait(timeout=1))
+		for ix in range(1, 6):
+			router.send("test", ExecuteMessageWithContent(ix))
+		outbox = router.routes["test"].outboxes[0]
+		self.assertEqual([mx.content for mx in outbox.pending], [1, 2])
+		self.assertEqual(outbox.dropped, 3)
+		sink.release.set()
+		router.shutdown()
+
+	def test_latest(self):
+		router = MessageRouter()
+		sink = GatedSink()
+		router.addRoute(Route("test", [sink], DeliveryPolicy(LATEST)))
+		router.send("test", ExecuteMessageWithContent(0))
+		self.assertTrue(sink.entered.wait(timeout=1))
+		for ix in range(1, 6):
+			router.send("test", ExecuteMessageWithContent(ix))
+		outbox = router.routes["test"].outboxes[0]
+		self.assertEqual([mx.content for mx in outbox.pending], [5])
+		self.assertEqual(outbox.dropped, 4)
+		sink.release.set()
+		router.shutdown()
+
+	def test_block_timeout(self):
+		router = MessageRouter()
+		sink = GatedSink()
+		router.addRoute(Route("test", [sink], DeliveryPolicy(BLOCK, 1, timeout=0.05)))
+		router.send("test", ExecuteMessageWithContent(0))
+		self.assertTrue(sink.entered.wait(timeout=1))
+		router.send("test", ExecuteMessageWithContent(1))
+		# outbox is full; this one waits for the timeout and is then dropped
+		router.send("test", ExecuteMessageWithContent(2))
+		stats = router.route_stats()["test"]
+		self.assertEqual(stats["dropped"], 1)
+		self.assertEqual(stats["overflow"], 1)
+		sink.release.set()
+		router.shutdown()
+
+	def test_drops_reported_as_telemetry(self):
+		router = MessageRouter(telemetry_interval=0)
+		sink = GatedSink()
+		telemetry = CountingSink()
+		router.addRoute(Route("test", [sink], DeliveryPolicy(DROP_NEWEST, 1)))
+		router.addRoute(Route("telemetry", [telemetry]))
+		router.send("test", ExecuteMessageWithContent(0))
+		self.assertTrue(sink.entered.wait(timeout=1))
+		router.send("test", ExecuteMessageWithContent(1))
+		router.send("test", ExecuteMessageWithContent(2))
+		reports = [mx for mx in telemetry.received if isinstance(mx, Telemetry)]
+		self.assertGreater(len(reports), 0)
+		self.assertEqual(reports[-1].name, "route:test")
+		self.assertEqual(reports[-1].values["dropped"], 1)
+		sink.release.set()
+		router.shutdown()
+	def test_duplicate_route_closed(self):
+		router = MessageRouter()
+		first = CountingSink()
+		router.addRoute(Route("test", [first], DeliveryPolicy(DROP_OLDEST, 4)))
+		duplicate = Route("test", [CountingSink()], DeliveryPolicy(DROP_OLDEST, 4))
+		router.addRoute(duplicate)
+		# its delivery thread stops instead of leaking
+		duplicate.outboxes[0].thread.join(timeout=1)
+		self.assertFalse(duplicate.outboxes[0].thread.is_alive())
+		self.assertIs(router.routes["test"].receivers[0], first)
+		router.shutdown()
+
+	def test_counters_under_concurrent_senders(self):
+		router = MessageRouter()
+		sink = CountingSink()
+		router.addRoute(Route("test", [sink], DeliveryPolicy(DROP_NEWEST, 4)))
+		def sender():
+			for ix in range(500):
+				router.send("test", ExecuteMessageWithContent(ix))
+		threads = [threading.Thread(target=sender) for _ in range(4)]
+		for tx in threads:
+			tx.start()
+		for tx in threads:
+			tx.join()
+		outbox = router.routes["test"].outboxes[0]
+		# every message is accounted for exactly once (the last delivery may still be in flight)
+		deadline = time.monotonic() + 2
+		while time.monotonic() < deadline:
+			with outbox.cv:
+				if outbox.delivered + outbox.dropped == 2000:
+					break
+			time.sleep(0.01)
+		with outbox.cv:
+			self.assertEqual(outbox.delivered + outbox.dropped, 2000)
+			self.assertEqual(outbox.delivered, len(sink.received))
+		router.shutdown()
+
+if __name__ == "__main__":
+	unittest.main()
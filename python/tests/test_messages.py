@@ -0,0 +1,69 @@
+from datetime import datetime
+import logging
+import os
+import time
+import tracemalloc
+import unittest
+from unittest import mock
+
+from ..task.messages import ExecuteMessage, ExecuteMessageWithContent, FutureCompleted, Telemetry
+from ..task.timer_tick import TickMessage
+
+class TestMessages(unittest.TestCase):
+	def test_timestamp_per_instance(self):
+		first = ExecuteMessage()
+		time.sleep(0.01)
+		second = ExecuteMessage()
+		self.assertLess(first.created, second.created)
+		self.assertLess(first.timestamp, second.timestamp)
+		self.assertLess(abs((datetime.now() - second.timestamp).total_seconds()), 1)
+		explicit = datetime(2025, 1, 1)
+		self.assertEqual(ExecuteMessageWithContent("x", explicit).timestamp, explicit)
+
+	def test_timestamp_follows_clock_step(self):
+		# e.g. NTP stepping the clock after boot: later messages carry the corrected time
+		stepped = time.time() + 3600
+		with mock.patch("time.time", return_value=stepped):
+			msg = ExecuteMessage()
+		self.assertEqual(msg.timestamp, datetime.fromtimestamp(stepped))
+
+	def test_slots(self):
+		for msg in [ExecuteMessage(), ExecuteMessageWithContent(1), TickMessage(datetime.now(), 0), FutureCompleted("p", "t", None), Telemetry("t", {})]:
+			with self.subTest(type(msg).__name__):
+				self.assertFalse(hasattr(msg, "__dict__"))
+
+class DictMessage:
+	"""The previous, dict-backed message layout (timestamp taken at construction here)."""
+	def __init__(self, tick_ts, tick_number, timestamp=None):
+		self.timestamp = timestamp if timestamp is not None else datetime.now()
+		self.tick_ts = tick_ts
+		self.tick_number = tick_number
+
+COUNT = 100000
+@unittest.skipUnless(os.environ.get("RUN_BENCHMARKS"), "Set RUN_BENCHMARKS=1 to compare message layouts.")
+class BenchmarkMessages(unittest.TestCase):
+	def measure(self, factory):
+		now = datetime.now()
+		tracemalloc.start()
+		started = time.perf_counter()
+		keep = [factory(now, ix) for ix in range(COUNT)]
+		elapsed = time.perf_counter() - started
+		(current, _) = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		del keep
+		return {
+			# includes the list slot (8 bytes) per message
+			"bytes_per_msg": current // COUNT,
+			"ns_per_msg": int(elapsed / COUNT * 1e9),
+		}
+
+	def test_compare(self):
+		logger = logging.getLogger(__name__)
+		before = self.measure(DictMessage)
+		after = self.measure(TickMessage)
+		logger.info(f"dict  {before}")
+		logger.info(f"slots {after}")
+		self.assertLess(after["bytes_per_msg"], before["bytes_per_msg"])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -1,3 +1,4 @@
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 import queue
 import threading
@@ -6,7 +7,7 @@ import time
 import logging
 
 from ..datasources.comic.comic_feed import ComicFeed
-from ..datasources.data_source import DataSourceManager
+from ..datasources.data_source import DataSource, DataSourceManager
 from ..datasources.image_folder.image_folder import ImageFolder
 from ..datasources.newspaper.newspaper import Newspaper
 from ..datasources.openai_image.openai_image import OpenAI
@@ -63,6 +64,19 @@ class RecordingTask(BasicTask):
 		self.logger.debug(f"{self.name}: {msg}")
 		self.msgs.append(msg)
 
+class PendingMediaList(DataSource):
+	"""MediaList whose futures stay pending until the test resolves them."""
+	def __init__(self, id, name):
+		super().__init__(id, name)
+		self.opened:list[Future] = []
+		self.rendered:list[Future] = []
+	def open(self, dsec, params):
+		self.opened.append(Future())
+		return self.opened[-1]
+	def render(self, dsec, params, state):
+		self.rendered.append(Future())
+		return self.rendered[-1]
+
 TICK_RATE_FAST = 0.05
 TICK_RATE_SLOW = 1
 TICKS = 60*1
@@ -280,6 +294,31 @@ class TestPlugins(unittest.TestCase):
 		datasources = DataSourceManager(None, dsmap)
 		display = self.run_slide_show(track, datasources, 61)
 		self.assertEqual(len(display.msgs), 1, "display.msgs failed")
+	def test_slide_show_prepare_cancel(self):
+		source = PendingMediaList("pending", "pending")
+		root = ServiceContainer()
+		root.add_service(ConfigurationManager, create_configuration_manager())
+		root.add_service(DataSourceManager, DataSourceManager(None, { "pending": source }))
+		context = BasicExecutionContext2(root, [800,480], datetime.now())
+		track = PlaylistSchedule(plugin_name="slide-show", id="10", title="10 Item", content=PlaylistScheduleData({ "dataSource": "pending" }))
+		plugin = SlideShow("slide-show", "Slide Show Plugin")
+		# cancelled while opening
+		staged = plugin.prepare(context, track)
+		plugin.reset()
+		self.assertTrue(staged.cancelled())
+		self.assertTrue(source.opened[0].cancelled())
+		# cancelled while rendering
+		staged = plugin.prepare(context, track)
+		source.opened[1].set_result(["a", "b"])
+		self.assertEqual(len(source.rendered), 1)
+		plugin.reset()
+		self.assertTrue(staged.cancelled())
+		self.assertTrue(source.rendered[0].cancelled())
+		# not cancelled: staged image
+		staged = plugin.prepare(context, track)
+		source.opened[2].set_result(["a", "b"])
+		source.rendered[1].set_result("image")
+		self.assertEqual(staged.result(timeout=1), (["b"], "image"))
 
 if __name__ == "__main__":
 	unittest.main()
\ No newline at end of file
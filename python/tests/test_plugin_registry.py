@@ -0,0 +1,67 @@
+import os
+import unittest
+
+from ..plugins.plugin_registry import PluginRegistry
+from .utils import create_configuration_manager
+
+class PooledPlugin:
+	def __init__(self, id, name):
+		self._id = id
+		self._name = name
+		self.resets = 0
+		self.closed = False
+	@property
+	def id(self) -> str:
+		return self._id
+	@property
+	def name(self) -> str:
+		return self._name
+	def reset(self):
+		self.resets += 1
+	def close(self):
+		self.closed = True
+
+def plugin_info(id:str, disabled:bool = False):
+	return {
+		"info": {
+			"id": id, "name": f"Plugin {id}",
+			"module":"python.tests.test_plugin_registry",
+			"class":"PooledPlugin",
+			"file":"test_plugin_registry.py",
+			"disabled": disabled
+		},
+		"path": os.path.dirname(os.path.abspath(__file__))
+	}
+
+class TestPluginRegistry(unittest.TestCase):
+	def test_acquire_release(self):
+		cm = create_configuration_manager()
+		registry = PluginRegistry(cm, [plugin_info("p1"), plugin_info("p2", disabled=True)], max_idle=1)
+		plugin = registry.acquire("p1")
+		self.assertIsInstance(plugin, PooledPlugin)
+		self.assertEqual(plugin.id, "p1")
+		# released instance is reset and handed out again
+		registry.release(plugin)
+		self.assertEqual(plugin.resets, 1)
+		self.assertIs(registry.acquire("p1"), plugin)
+		# a second concurrent user gets its own instance, class resolved only once
+		other = registry.acquire("p1")
+		self.assertIsNot(other, plugin)
+		self.assertEqual(list(registry._classes.keys()), ["p1"])
+		# idle pool is bounded; the overflow is closed
+		registry.release(plugin)
+		registry.release(other)
+		self.assertFalse(plugin.closed)
+		self.assertTrue(other.closed)
+		self.assertEqual(registry.stats(), { "created": 2, "reused": 1, "idle": 1 })
+		# unknown and disabled plugins
+		self.assertIsNone(registry.info("nope"))
+		self.assertIsNone(registry.acquire("nope"))
+		self.assertIsNone(registry.acquire("p2"))
+		self.assertIsNone(registry.acquire("p2"))
+		registry.close()
+		self.assertTrue(plugin.closed)
+		self.assertEqual(registry.stats()["idle"], 0)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,64 @@
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+
+from ..task.profiler import SamplingProfiler
+
+def busy_loop(stop: threading.Event):
+	while not stop.is_set():
+		sum(ix * ix for ix in range(1000))
+
+class TestProfiler(unittest.TestCase):
+	def test_collapsed_stacks(self):
+		with tempfile.TemporaryDirectory() as folder:
+			profiler = SamplingProfiler(os.path.join(folder, "profiles"), interval=0.002)
+			self.assertIsNone(profiler.stop())
+			stop = threading.Event()
+			worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+			parked = threading.Thread(target=stop.wait, name="parked-worker")
+			worker.start()
+			parked.start()
+			self.assertTrue(profiler.start())
+			self.assertFalse(profiler.start())
+			time.sleep(0.2)
+			path = profiler.stop()
+			stop.set()
+			worker.join()
+			parked.join()
+			self.assertFalse(profiler.running)
+			self.assertGreater(profiler.idle, 0)
+			with open(path) as fx:
+				lines = fx.read().splitlines()
+			busy = [lx for lx in lines if lx.startswith("busy-worker;")]
+			self.assertGreater(len(busy), 0)
+			self.assertIn("busy_loop (test_profiler.py:", busy[0])
+			# parked threads are idle and not recorded
+			self.assertEqual([lx for lx in lines if lx.startswith("parked-worker;")], [])
+			(stack, count) = busy[0].rsplit(" ", 1)
+			self.assertGreater(int(count), 0)
+	@unittest.skipUnless(hasattr(signal, "SIGUSR2"), "needs SIGUSR2")
+	def test_toggle_on_signal(self):
+		previous = signal.getsignal(signal.SIGUSR2)
+		try:
+			with tempfile.TemporaryDirectory() as folder:
+				profiler = SamplingProfiler(os.path.join(folder, "profiles"))
+				profiler.toggle_on_signal(signal.SIGUSR2)
+				# start and stop happen on the toggle thread, not in the handler
+				os.kill(os.getpid(), signal.SIGUSR2)
+				deadline = time.monotonic() + 5
+				while not profiler.running and time.monotonic() < deadline:
+					time.sleep(0.01)
+				self.assertTrue(profiler.running)
+				os.kill(os.getpid(), signal.SIGUSR2)
+				while profiler.last_output is None and time.monotonic() < deadline:
+					time.sleep(0.01)
+				self.assertFalse(profiler.running)
+				self.assertTrue(os.path.exists(profiler.last_output))
+		finally:
+			signal.signal(signal.SIGUSR2, previous)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 import random
 import string
 
-from ..model.schedule import TimedSchedule, PluginSchedule, PluginScheduleData, generate_schedule, generate_trigger_time
+import pytz
+
+from ..model.schedule import MasterSchedule, MasterScheduleItem, TimedSchedule, PluginSchedule, PluginScheduleData, TriggerSpec, compile_schedule_trigger, compile_trigger, generate_schedule, next_fire_times, parse_cron, generate_trigger_time, render_schedules
 
 def random_plugin_data():
 	return PluginScheduleData({
@@ -90,6 +92,59 @@ class TestSchedule(unittest.TestCase):
 		ts = self.items[2].end + timedelta(minutes=5)
 		self.assertIsNone(self.schedule.current(ts))
 
+	def test_next_change(self):
+		midnight = datetime(2025, 1, 1)
+		self.assertEqual(self.schedule.next_change(midnight), midnight + timedelta(minutes=25))
+		self.assertEqual(self.schedule.next_change(midnight + timedelta(minutes=25)), midnight + timedelta(minutes=30))
+		self.assertEqual(self.schedule.next_change(midnight + timedelta(minutes=56)), midnight + timedelta(minutes=60))
+		# after the last slot: the next day
+		self.assertEqual(self.schedule.next_change(midnight + timedelta(minutes=75)), midnight + timedelta(days=1))
+
+	def test_compiled_matches_scan(self):
+		day = datetime(2025, 1, 1)
+		random.seed(15)
+		for overlapping in (False, True):
+			items = []
+			start = 0
+			for ix in range(40):
+				duration = random.randint(1, 30)
+				items.append(PluginSchedule("PluginA", str(ix), f"slot {ix}", start, duration, random_plugin_data()))
+				start += duration + random.randint(0, 10) - (random.randint(0, duration) if overlapping else 0)
+			random.shuffle(items)
+			schedule = TimedSchedule("compiled", "Compiled", items)
+			schedule.set_date_controller(lambda: day)
+			self.assertEqual(schedule.compiled.overlapping, overlapping)
+			for minute in range(0, 24 * 60, 3):
+				ts = day + timedelta(minutes=minute, seconds=30)
+				expected = next((item for item in items if item.start <= ts < item.end), None)
+				self.assertIs(schedule.current(ts), expected, f"minute {minute}")
+		# replacing the items rebuilds the index
+		schedule.items = items[:1]
+		self.assertEqual(len(schedule.sorted_items), 1)
+		# a different list of the same length (which may reuse the old list's id) is noticed too
+		schedule.items = items[1:2]
+		self.assertIs(schedule.sorted_items[0], items[1])
+		schedule.items.append(items[2])
+		self.assertEqual(len(schedule.sorted_items), 2)
+
+	def test_sweep_matches_pairwise(self):
+		random.seed(16)
+		items = [PluginSchedule("PluginA", str(ix), f"slot {ix}", random.randint(0, 1400), random.randint(0, 60), random_plugin_data()) for ix in range(150)]
+		schedule = TimedSchedule("sweep", "Sweep", items)
+		expected = [(ix, jx) for ix in range(len(items)) for jx in range(ix + 1, len(items)) if items[ix].start < items[jx].end and items[jx].start < items[ix].end]
+		overlaps = schedule.validate()
+		self.assertEqual([(ox.first_index, ox.second_index) for ox in overlaps], expected)
+		for ox in overlaps:
+			self.assertIs(ox.first, items[ox.first_index])
+			self.assertLessEqual(ox.start_minutes, ox.end_minutes)
+		probe = PluginSchedule("PluginX", "X", "Probe", 700, 30, random_plugin_data())
+		self.assertIs(schedule.check(probe), next((item for item in items if probe.start < item.end and item.start < probe.end), None))
+		# disjoint schedule: incremental check through the index
+		disjoint = TimedSchedule("disjoint", "Disjoint", [PluginSchedule("PluginA", str(ix), "", ix * 5, 5, random_plugin_data()) for ix in range(288)])
+		self.assertIsNone(disjoint.validate())
+		self.assertEqual(disjoint.check(PluginSchedule("PluginX", "X", "Probe", 12, 10, random_plugin_data())).id, "2")
+		self.assertIsNone(disjoint.check(PluginSchedule("PluginX", "X", "Probe", 1440, 10, random_plugin_data())))
+
 	def test_validate(self):
 		# Should raise ValueError due to overlap between items 1 and 2
 		result = self.schedule.validate()
@@ -119,6 +174,158 @@ class TestSchedule(unittest.TestCase):
 		self.assertIsNone(overlaps)
 
 class TestTriggers(unittest.TestCase):
+	def test_master_compiled_triggers(self):
+		triggers = [
+			{ "type": "dayofweek", "days": [0, 2, 4] },
+			{ "type": "dayofmonth", "dayofmonth": 15 },
+			{ "type": "dayandmonth", "day": 4, "month": 7 },
+			{ "type": "dayandmonthrange", "day_start": 20, "month_start": 12, "day_end": 31, "month_end": 12 },
+			{ "type": "daymonthyear", "day": 29, "month": 2, "year": 2024 },
+			{ "type": "dayandmonthrange", "day_start": 1, "month_start": 11, "day_end": 5, "month_end": 2 },
+			{ "type": "unknown" },
+		]
+		items = [MasterScheduleItem(f"m{ix}", f"m{ix}", "", tx, ix != 1, f"s{ix}") for ix, tx in enumerate(triggers)]
+		master = MasterSchedule("default", items)
+		def reference(now:datetime):
+			# the interpreted evaluation: walk every enabled trigger, last match wins
+			matches = []
+			for item in items:
+				trigger = item.trigger
+				if not item.enabled:
+					continue
+				match trigger["type"]:
+					case "dayofweek":
+						if now.weekday() in trigger["days"]: matches.append(item)
+					case "dayofmonth":
+						if now.day == trigger["dayofmonth"]: matches.append(item)
+					case "dayandmonth":
+						if now.day == trigger["day"] and now.month == trigger["month"]: matches.append(item)
+					case "dayandmonthrange":
+						start = datetime(now.year, trigger["month_start"], trigger["day_start"])
+						end = datetime(now.year, trigger["month_end"], trigger["day_end"], 23, 59, 59)
+						if start <= now <= end: matches.append(item)
+					case "daymonthyear":
+						if (now.day, now.month, now.year) == (trigger["day"], trigger["month"], trigger["year"]): matches.append(item)
+			return matches[-1] if matches else None
+		start = datetime(2023, 12, 1)
+		days = master.evaluate_range(start, 500)
+		self.assertEqual(len(days), 500)
+		for ix, (day, item) in enumerate(days):
+			now = start + timedelta(days=ix, hours=ix % 24)
+			self.assertEqual(day, now.date())
+			self.assertIs(item, reference(now), now)
+			self.assertIs(master.evaluate(now), item)
+		self.assertIsNone(compile_trigger({ "type": "dayofmonth" }))
+		# in-place edits take effect after invalidate()
+		items[3].enabled = False
+		master.invalidate()
+		self.assertIs(master.evaluate(datetime(2024, 12, 25, 10, 0)), items[0])
+		# assigning a list of the same length drops the compiled triggers and the per-day memo
+		master.schedules = [items[6]] * len(items)
+		self.assertIsNone(master.evaluate(datetime(2024, 12, 25, 10, 0)))
+
+	def test_render_schedules(self):
+		weekday = TimedSchedule("weekday-id", "Weekday", [
+			PluginSchedule("PluginA", "d1", "Morning", 0, 30, random_plugin_data()),
+			PluginSchedule("PluginB", "d2", "Noon", 12 * 60, 60, random_plugin_data()),
+			PluginSchedule("PluginC", "d3", "Night", 23 * 60, 60, random_plugin_data()),
+		])
+		weekend = TimedSchedule("weekend-id", "Weekend", [
+			PluginSchedule("PluginA", "w1", "Morning", 8 * 60, 120, random_plugin_data()),
+			PluginSchedule("PluginB", "w2", "Evening", 18 * 60, 90, random_plugin_data()),
+		])
+		master = MasterSchedule("default", [
+			MasterScheduleItem("m1", "weekday", "", { "type": "dayofweek", "days": [0, 1, 2, 3, 4] }, True, "weekday.json"),
+			MasterScheduleItem("m2", "weekend", "", { "type": "dayofweek", "days": [5, 6] }, True, "weekend.json"),
+		])
+		schedules = { "weekday.json": weekday, "weekend.json": weekend }
+		controller = weekday.date_controller
+		start = pytz.timezone("US/Eastern").localize(datetime(2024, 3, 1, 15, 30))
+		result = render_schedules(master, schedules, start, 14)
+		self.assertIsNone(result.unmatched)
+		self.assertEqual(set(result.schedules.keys()), { "weekday-id", "weekend-id" })
+		self.assertEqual(len(result.render), 10 * 3 + 4 * 2)
+		# the same occurrences as pointing each schedule's date controller at the day
+		expected = []
+		for ix in range(14):
+			day = start.replace(hour=0, minute=0) + timedelta(days=ix)
+			target = weekday if day.weekday() < 5 else weekend
+			expected.extend({ "schedule": target.id, "id": xx.id, "start": (day + timedelta(minutes=xx.start_minutes)).isoformat(), "end": (day + timedelta(minutes=xx.start_minutes + xx.duration_minutes)).isoformat() } for xx in target.items)
+		self.assertEqual(result.render, expected)
+		self.assertIs(weekday.date_controller, controller)
+		# a day the master does not cover stops the expansion
+		weekdays = MasterSchedule("default", master.schedules[:1])
+		result = render_schedules(weekdays, schedules, start, 14)
+		self.assertEqual(result.unmatched.date(), datetime(2024, 3, 2).date())
+		self.assertEqual(len(result.render), 3)
+
+	def test_trigger_spec_next_n(self):
+		def scan(spec: TriggerSpec, after: datetime, count: int):
+			# reference: test every minute
+			retv = []
+			ts = after.replace(second=0, microsecond=0)
+			while len(retv) < count:
+				ts += timedelta(minutes=1)
+				if ts.hour in spec.hours and ts.minute in spec.minutes and spec.matches_day(ts.date()):
+					retv.append(ts)
+			return retv
+		after = datetime(2024, 1, 30, 22, 47, 12)
+		specs = [
+			parse_cron("*/15 8-17 * * 1-5"),
+			parse_cron("0 12 1,15 * 0"),
+			parse_cron("30 6 29 2 *"),
+			compile_schedule_trigger({ "day": { "type": "dayofmonth", "days": [31] }, "time": { "type": "hourofday", "hours": [9], "minutes": [0, 30] } }),
+			compile_schedule_trigger({ "day": { "type": "dayandmonth", "day": 1, "month": 3 }, "time": { "type": "specific", "hour": 0, "minute": 5 } }),
+		]
+		for spec in specs[:2]:
+			self.assertEqual(spec.next_n(after, 40), scan(spec, after, 40))
+		# leap day: only every fourth year
+		self.assertEqual(specs[2].next_n(after, 2), [datetime(2024, 2, 29, 6, 30), datetime(2028, 2, 29, 6, 30)])
+		self.assertEqual(specs[3].next_n(after, 3), [datetime(2024, 1, 31, 9, 0), datetime(2024, 1, 31, 9, 30), datetime(2024, 3, 31, 9, 0)])
+		self.assertEqual(specs[4].next_after(after), datetime(2024, 3, 1, 0, 5))
+		# cron Sunday is 0 or 7, weekday() 6
+		self.assertEqual(parse_cron("0 0 * * 7").weekdays, frozenset([6]))
+		self.assertIsNone(parse_cron("0 0 30 2 *").next_after(after))
+		self.assertEqual(next_fire_times({ "cron": "0 */6 * * *" }, after, 3), [datetime(2024, 1, 31, 0, 0), datetime(2024, 1, 31, 6, 0), datetime(2024, 1, 31, 12, 0)])
+		with self.assertRaises(ValueError):
+			parse_cron("61 * * * *")
+		with self.assertRaises(ValueError):
+			compile_schedule_trigger({ "day": { "type": "dayofweek", "days": [0] } })
+
+	def test_trigger_spec_skips_days(self):
+		class CountingSpec(TriggerSpec):
+			visited = 0
+			def _next_day(self, day):
+				CountingSpec.visited += 1
+				return super()._next_day(day)
+		def scan(spec: TriggerSpec, after: datetime, count: int):
+			# reference: test every day
+			retv = []
+			day = after.date()
+			while len(retv) < count:
+				if spec.matches_day(day):
+					for hour in spec.hours:
+						for minute in spec.minutes:
+							ts = datetime(day.year, day.month, day.day, hour, minute)
+							if ts > after and len(retv) < count:
+								retv.append(ts)
+				day += timedelta(days=1)
+			return retv
+		after = datetime(2024, 3, 1, 12, 0)
+		specs = [
+			TriggerSpec([0], [9], days=[13], weekdays=[4]),
+			TriggerSpec([0], [9], days=[13], weekdays=[4], day_or=True),
+			TriggerSpec([15], [6, 18], days=[31, 30, 1]),
+			TriggerSpec([0], [0], weekdays=[6], months=[2, 11]),
+			TriggerSpec([0], [0], days=[29], months=[2]),
+		]
+		for spec in specs:
+			self.assertEqual(spec.next_n(after, 6), scan(spec, after, 6), spec.__slots__)
+		# Feb 29th: a handful of steps per year instead of every day in between
+		spec = CountingSpec([0], [0], days=[29], months=[2])
+		self.assertEqual(spec.next_n(after, 2), [datetime(2028, 2, 29), datetime(2032, 2, 29)])
+		self.assertLess(CountingSpec.visited, 40)
+
 	def test_generate_trigger_time_hourly(self):
 		now = datetime(2024, 1, 1, 10, 15)  # Jan 1, 2024, 10:15 AM
 		time_config = {
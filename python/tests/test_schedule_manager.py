@@ -1,10 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
 import unittest
+import json
 import os
 import tempfile
+import threading
+from datetime import datetime
 
 from .utils import storage_path
 from ..model.schedule import MasterSchedule, Playlist, TimedSchedule
-from ..model.schedule_manager import ScheduleManager
+from ..model.hash_manager import HashManager
+from ..model.schedule_loader import SCHEMA_TIMED
+from ..model.schedule_manager import ScheduleCache, ScheduleLoadResult, ScheduleManager, ScheduleSnapshot
+
+def write_schedules(folder: str):
+	master = {
+		"_schema": "urn:inky:storage:schedule:master:1",
+		"id": "master",
+		"defaultSchedule": "day.json",
+		"schedules": [
+			{ "id": "m1", "name": "Every day", "enabled": True, "schedule": "day.json", "trigger": { "type": "dayofweek", "days": [0,1,2,3,4,5,6] } },
+		]
+	}
+	day = {
+		"_schema": "urn:inky:storage:schedule:timed:1",
+		"id": "day",
+		"name": "Day",
+		"items": [
+			{ "type": "PluginSchedule", "id": "morning", "title": "Morning", "start_minutes": 480, "duration_minutes": 240, "plugin_name": "clock", "content": {} },
+			{ "type": "PluginSchedule", "id": "evening", "title": "Evening", "start_minutes": 1080, "duration_minutes": 120, "plugin_name": "clock", "content": {} },
+		]
+	}
+	for name, document in [("master_schedule.json", master), ("day.json", day)]:
+		with open(os.path.join(folder, name), "w") as fx:
+			json.dump(document, fx)
 
 class TestScheduleManager(unittest.TestCase):
 	def test_load_schedule(self):
@@ -56,3 +84,120 @@ class TestScheduleManager(unittest.TestCase):
 		self.assertGreater(len(sinfos), 0)
 		sm.validate(sinfos)
 		pass
+
+	def test_snapshot(self):
+		with tempfile.TemporaryDirectory() as folder:
+			write_schedules(folder)
+			sm = ScheduleManager(root_path=folder)
+			snapshot = sm.snapshot()
+			self.assertIsInstance(snapshot, ScheduleSnapshot)
+			self.assertEqual(snapshot.revision, sm.revision())
+			self.assertEqual(list(snapshot.timed.keys()), ["day.json"])
+			with self.assertRaises(AttributeError):
+				snapshot.master = None
+			with self.assertRaises(TypeError):
+				snapshot.schedules[0]["info"] = None
+			# evaluation takes the timestamp; concurrent readers at different times don't interfere
+			results = {}
+			def evaluate(hour: int):
+				for _ in range(200):
+					(item, target, timeslot) = snapshot.select(datetime(2025, 6, 1 + hour % 20, hour, 30))
+					results[hour] = timeslot.id if timeslot is not None else None
+			threads = [threading.Thread(target=evaluate, args=(hour,)) for hour in range(24)]
+			for tx in threads:
+				tx.start()
+			for tx in threads:
+				tx.join()
+			self.assertEqual(results[9], "morning")
+			self.assertEqual(results[19], "evening")
+			self.assertIsNone(results[15])
+			self.assertEqual(snapshot.next_change(datetime(2025, 6, 1, 13, 0)), datetime(2025, 6, 1, 18, 0))
+			self.assertEqual(len(snapshot.render(datetime(2025, 6, 1), 3).render), 6)
+			with open(os.path.join(folder, "day.json"), "a") as fx:
+				fx.write("\n")
+			self.assertNotEqual(snapshot.revision, sm.revision())
+
+	def test_load_cache(self):
+		with tempfile.TemporaryDirectory() as folder:
+			write_schedules(folder)
+			cache = ScheduleCache()
+			first = ScheduleManager(folder, cache).load()
+			# a new manager (as each caller creates) shares the cache
+			second = ScheduleManager(folder, cache).load()
+			self.assertEqual((cache.misses, cache.hits), (2, 2))
+			self.assertIs(first["schedules"][0]["info"], second["schedules"][0]["info"])
+			self.assertIs(first["master"]["info"], second["master"]["info"])
+			# only the changed file is parsed again
+			path = os.path.join(folder, "day.json")
+			with open(path, "a") as fx:
+				fx.write("\n")
+			third = ScheduleManager(folder, cache).load()
+			self.assertEqual((cache.misses, cache.hits), (3, 3))
+			self.assertIsNot(third["schedules"][0]["info"], first["schedules"][0]["info"])
+			self.assertIs(third["master"]["info"], first["master"]["info"])
+			# one snapshot instance until something changes
+			sm = ScheduleManager(folder, cache)
+			snapshot = sm.snapshot()
+			self.assertIs(sm.snapshot(), snapshot)
+			os.remove(path)
+			# the master references it
+			with self.assertRaises(ValueError):
+				sm.snapshot()
+			write_schedules(folder)
+			self.assertIsNot(sm.snapshot(), snapshot)
+			self.assertEqual(len(sm.snapshot().timed), 1)
+			# files evicted from the HashManager are re-read so their hash is registered again
+			hm = HashManager(folder)
+			before = sm.load(hm)["schedules"][0]["info"]
+			self.assertIs(sm.load(hm)["schedules"][0]["info"], before)
+			hm.evict(path)
+			self.assertIsNot(sm.load(hm)["schedules"][0]["info"], before)
+			self.assertTrue(hm.has_path(path))
+
+	def test_load_isolates_failures(self):
+		with tempfile.TemporaryDirectory() as folder:
+			write_schedules(folder)
+			with open(os.path.join(folder, "broken.json"), "w") as fx:
+				fx.write("{ not json")
+			with open(os.path.join(folder, "notes.txt"), "w") as fx:
+				fx.write("not a schedule")
+			with ThreadPoolExecutor(3) as pool:
+				cache = ScheduleCache()
+				sm = ScheduleManager(folder, cache, executor=pool)
+				result = sm.load()
+				self.assertIsInstance(result, ScheduleLoadResult)
+				self.assertEqual(list(result.errors.keys()), ["broken.json"])
+				self.assertEqual(sorted(result.by_name.keys()), ["day.json", "master_schedule.json"])
+				self.assertIs(result.by_id["day"], result.by_name["day.json"])
+				self.assertEqual(result.by_schema[SCHEMA_TIMED], result["schedules"])
+				self.assertIs(result["master"], result.by_id["master"])
+				# the bad file is not parsed again until it changes
+				misses = cache.misses
+				self.assertEqual(list(sm.load().errors.keys()), ["broken.json"])
+				self.assertEqual(cache.misses, misses)
+				# but a snapshot is all or nothing
+				with self.assertRaises(ValueError):
+					sm.snapshot()
+				os.remove(os.path.join(folder, "broken.json"))
+				self.assertEqual(len(sm.snapshot().timed), 1)
+
+	def test_snapshot_rejects_partial_file(self):
+		with tempfile.TemporaryDirectory() as folder:
+			write_schedules(folder)
+			cache = ScheduleCache()
+			sm = ScheduleManager(folder, cache)
+			good = sm.snapshot()
+			# a half-written referenced file must not produce a snapshot without it
+			path = os.path.join(folder, "day.json")
+			with open(path) as fx:
+				text = fx.read()
+			with open(path, "w") as fx:
+				fx.write(text[:len(text) // 2])
+			with self.assertRaises(ValueError) as ctx:
+				sm.snapshot()
+			self.assertIn("day.json", str(ctx.exception))
+			# and a master that references a missing schedule does not validate
+			os.remove(path)
+			with self.assertRaises(ValueError):
+				sm.snapshot()
+			self.assertIsNotNone(good.timed["day.json"])
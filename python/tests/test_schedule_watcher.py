@@ -0,0 +1,79 @@
+from datetime import timedelta
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from ..model.hash_manager import HashManager
+from ..task.message_router import MessageRouter, Route
+from ..task.messages import BasicMessage, MessageSink, ScheduleUpdated, Telemetry
+from ..task.schedule_watcher import SCHEDULE_UPDATED_ROUTE, ScheduleWatcher
+from .test_schedule_manager import write_schedules
+
+class CollectingSink(MessageSink):
+	def __init__(self):
+		self.msgs = []
+		self.event = threading.Event()
+	def send(self, msg: BasicMessage):
+		self.msgs.append(msg)
+		self.event.set()
+
+class TestScheduleWatcher(unittest.TestCase):
+	def test_reload_on_change(self):
+		with tempfile.TemporaryDirectory() as folder:
+			write_schedules(folder)
+			hm = HashManager(folder)
+			router = MessageRouter()
+			updates = CollectingSink()
+			telemetry = CollectingSink()
+			router.addRoute(Route(SCHEDULE_UPDATED_ROUTE, [updates]))
+			router.addRoute(Route("telemetry", [telemetry]))
+			watcher = ScheduleWatcher(router, folder, hm, debounce=timedelta(milliseconds=50))
+			watcher.start()
+			try:
+				first = watcher.reload()
+				self.assertIsNotNone(first)
+				updates.event.clear()
+				# a burst of events for one edit reloads once; other files are ignored
+				path = os.path.join(folder, "day.json")
+				with open(path) as fx:
+					day = json.load(fx)
+				day["items"][0]["duration_minutes"] = 60
+				with open(path, "w") as fx:
+					json.dump(day, fx)
+				for _ in range(5):
+					hm.notify(path)
+				hm.notify(os.path.join(folder, "notes.txt"))
+				self.assertTrue(updates.event.wait(2))
+				msg = updates.msgs[-1]
+				self.assertIsInstance(msg, ScheduleUpdated)
+				self.assertEqual(msg.changed, ["day.json"])
+				self.assertIsNot(msg.snapshot, first)
+				self.assertEqual(msg.snapshot.timed["day.json"].items[0].duration_minutes, 60)
+				self.assertEqual(watcher.reloads, 2)
+				# an edit that does not validate keeps the current snapshot
+				day["items"][1]["start_minutes"] = 500
+				with open(path, "w") as fx:
+					json.dump(day, fx)
+				hm.notify(path)
+				self.assertTrue(telemetry.event.wait(2))
+				self.assertIsInstance(telemetry.msgs[-1], Telemetry)
+				self.assertEqual(len(updates.msgs), 2)
+				self.assertIs(watcher.last, msg.snapshot)
+				# so does a half-written file
+				telemetry.event.clear()
+				with open(path, "w") as fx:
+					fx.write(json.dumps(day)[:40])
+				hm.notify(path)
+				self.assertTrue(telemetry.event.wait(2))
+				self.assertIn("day.json", telemetry.msgs[-1].values["error"])
+				self.assertEqual(len(updates.msgs), 2)
+				self.assertIs(watcher.last, msg.snapshot)
+				self.assertEqual(watcher.reloads, 2)
+			finally:
+				watcher.stop()
+				router.shutdown()
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+
+from ..task.messages import ConfigureNotify, Telemetry
+from ..task.telemetry import Histogram, TelemetryAggregator
+from ..task.telemetry_sink import TelemetrySink
+
+class TestTelemetry(unittest.TestCase):
+	def test_aggregate(self):
+		aggregator = TelemetryAggregator()
+		aggregator.send(Telemetry("route:display", { "sent": 1, "jitter_ms": 3.0, "state": "playing" }))
+		aggregator.send(Telemetry("route:display", { "sent": 4, "jitter_ms": 40.0, "state": "stopped" }))
+		aggregator.observe("trace.panel", 700)
+		aggregator.count("errors")
+		snapshot = aggregator.snapshot()
+		self.assertEqual(snapshot["counters"], { "route:display.reports": 2, "errors": 1 })
+		self.assertEqual(snapshot["gauges"]["route:display.sent"], { "last": 4, "min": 1, "max": 4 })
+		self.assertEqual(snapshot["labels"]["route:display.state"], "stopped")
+		self.assertEqual(snapshot["histograms"]["route:display.jitter_ms"]["count"], 2)
+		self.assertEqual(snapshot["histograms"]["trace.panel"]["p50_ms"], 1000)
+		self.assertEqual(len(snapshot["events"]), 2)
+
+	def test_bounded(self):
+		aggregator = TelemetryAggregator(max_metrics=4, events=3)
+		for ix in range(10):
+			aggregator.send(Telemetry(f"plugin-{ix}", { "value": ix }))
+		snapshot = aggregator.snapshot()
+		self.assertEqual(len(snapshot["counters"]) + len(snapshot["gauges"]), 4)
+		self.assertGreater(snapshot["dropped_metrics"], 0)
+		self.assertEqual([ex["name"] for ex in snapshot["events"]], ["plugin-7", "plugin-8", "plugin-9"])
+		histogram = Histogram()
+		for ix in range(1000):
+			histogram.observe(ix)
+		self.assertEqual(len(histogram.buckets), len(Histogram().buckets))
+		self.assertEqual(histogram.percentile(95), 1000)
+
+	def test_rolling_log(self):
+		with tempfile.TemporaryDirectory() as folder:
+			path = os.path.join(folder, "telemetry.log")
+			aggregator = TelemetryAggregator(log_path=path, log_bytes=512, log_backups=2)
+			for ix in range(50):
+				aggregator.send(Telemetry("timer_tick", { "ticks": ix }))
+			aggregator.close()
+			files = sorted(os.listdir(folder))
+			self.assertEqual(files, ["telemetry.log", "telemetry.log.1", "telemetry.log.2"])
+			with open(path) as fx:
+				last = [json.loads(lx) for lx in fx.read().splitlines()][-1]
+			self.assertEqual(last["values"]["ticks"], 49)
+
+	def test_sink_bounded(self):
+		aggregator = TelemetryAggregator()
+		sink = TelemetrySink(aggregator, maxsize=2)
+		for ix in range(5):
+			sink.send(Telemetry("t", { "ix": ix }))
+			sink.send(ConfigureNotify(f"token-{ix}", True))
+		# telemetry is aggregated, not queued; other messages keep the newest maxsize
+		self.assertEqual(aggregator.snapshot()["counters"]["t.reports"], 5)
+		self.assertEqual([sink.receive().token, sink.receive().token], ["token-3", "token-4"])
+		self.assertIsNone(sink.receive())
+		self.assertEqual(sink.discarded, 3)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -1,11 +1,19 @@
 from datetime import datetime, timedelta
+from concurrent.futures import wait
+import threading
 import unittest
 import time
 import logging
 
 from ..task.messages import BasicMessage, ExecuteMessage, MessageSink
 from ..task.timer_tick import TickMessage
+from ..model.schedule import MasterSchedule, TimerTaskItem, TimerTaskTask, TimerTasks
+from ..model.schedule_manager import ScheduleSnapshot
+from ..task.message_router import MessageRouter
+from ..task.messages import QuitMessage
+from ..task.scheduler import Scheduler
 from ..task.timer import Timer, TimerService
+from ..task.timer_tasks import TimerTaskFired, TimerTaskRunner
 
 logging.basicConfig(
 	level=logging.DEBUG,  # Or DEBUG for more detail
@@ -58,6 +66,14 @@ class TestSink(MessageSink):
 		self.received = True
 		self.message = message
 
+class CountingSink(MessageSink):
+	def __init__(self):
+		self.count = 0
+		self.lock = threading.Lock()
+	def send(self, message: BasicMessage):
+		with self.lock:
+			self.count += 1
+
 SLEEP_INTERVAL = 0.1
 class TestTimerService(unittest.TestCase):
 	def test_timer_service(self):
@@ -114,6 +130,91 @@ class TestTimerService(unittest.TestCase):
 		self.assertIs(timer_future.result(), None)
 		self.assertFalse(timer_future.cancelled())
 		timer_service.shutdown()
+	def test_many_timers_one_thread(self):
+		timer_service = TimerService()
+		threads = threading.active_count()
+		sink = CountingSink()
+		# every other timer is far enough out that cancelling it cannot race its expiry
+		timers = [timer_service.create_timer(timedelta(seconds=30 if ix % 2 == 0 else 1), sink, ExecuteMessage()) for ix in range(2000)]
+		self.assertLessEqual(threading.active_count(), threads + 1)
+		# cancel every other timer; the rest must still fire
+		for (_, cancel) in timers[::2]:
+			cancel()
+		self.assertTrue(all(fx.done() and fx.result() is None for (fx, _) in timers[::2]))
+		(_, not_done) = wait([fx for (fx, _) in timers[1::2]], timeout=30)
+		self.assertEqual(len(not_done), 0)
+		self.assertEqual(sink.count, 1000)
+		self.assertEqual(timer_service.pending, 0)
+		timer_service.shutdown()
+	def test_shutdown_resolves_pending(self):
+		timer_service = TimerService()
+		(timer_future, cancel) = timer_service.create_timer(timedelta(minutes=5), None, ExecuteMessage())
+		timer_service.shutdown()
+		self.assertIs(timer_future.result(timeout=1), None)
+		cancel()
+		with self.assertRaises(RuntimeError):
+			timer_service.create_timer(timedelta(seconds=1), None, ExecuteMessage())
+	def test_timer_task_runner(self):
+		timer_service = TimerService()
+		fired = []
+		event = threading.Event()
+		class FiredSink(MessageSink):
+			def send(self, message: BasicMessage):
+				fired.append(message)
+				event.set()
+		# wall clock starts half a second before 09:00
+		base = datetime(2025, 1, 6, 8, 59, 59, 500000)
+		t0 = time.monotonic()
+		clock = lambda: base + timedelta(seconds=time.monotonic() - t0)
+		task = TimerTaskTask("clock", "Chime", 1, {})
+		items = [
+			TimerTaskItem("chime", "Chime", True, "", task, { "day": { "type": "dayofweek", "days": [0] }, "time": { "type": "hourofday", "hours": [9, 12], "minutes": [0] } }),
+			TimerTaskItem("off", "Off", False, "", task, { "cron": "* * * * *" }),
+			TimerTaskItem("bad", "Bad", True, "", task, { "day": { "type": "nope" }, "time": { "type": "hourly" } }),
+		]
+		runner = TimerTaskRunner(timer_service, FiredSink(), clock)
+		runner.start(items)
+		self.assertEqual(runner.next_fire(), { "chime": datetime(2025, 1, 6, 9, 0) })
+		self.assertTrue(event.wait(2))
+		self.assertIsInstance(fired[0], TimerTaskFired)
+		self.assertEqual((fired[0].item.id, fired[0].fire_ts), ("chime", datetime(2025, 1, 6, 9, 0)))
+		# one pending timer per task, re-armed for the next fire time
+		self.assertEqual(runner.next_fire(), { "chime": datetime(2025, 1, 6, 12, 0) })
+		self.assertEqual(timer_service.pending, 1)
+		runner.stop()
+		self.assertEqual(timer_service.pending, 0)
+		timer_service.shutdown()
+	def test_scheduler_timer_tasks(self):
+		scheduler = Scheduler("scheduler", MessageRouter())
+		# loaded task files keep the task as a dict
+		item = TimerTaskItem("chime", "Chime", True, "", TimerTaskTask("clock", "Chime", 5, { "text": "dong" }).to_dict(), { "cron": "0 9 * * *" })
+		tasks = TimerTasks("tasks", "Tasks", [item])
+		scheduler.snapshot = ScheduleSnapshot(MasterSchedule("default", []), [], [], [{ "info": tasks, "name": "tasks" }])
+		scheduler.plugin_map = {}
+		scheduler.state = 'loaded'
+		scheduler._start_timer_tasks()
+		self.assertEqual(list(scheduler.timer_tasks.next_fire().keys()), ["chime"])
+		self.assertEqual(scheduler.timer.pending, 1)
+		# fired task takes over for its duration
+		fire_ts = datetime(2025, 1, 6, 9, 0)
+		scheduler.execute(TimerTaskFired(item, fire_ts))
+		tick = TickMessage(fire_ts, 0)
+		state = scheduler.calculate_current_state(fire_ts + timedelta(minutes=4), tick)
+		self.assertIs(state["schedule"], tasks)
+		self.assertEqual((state["timeslot"].plugin_name, state["timeslot"].id, state["timeslot"].start_minutes), ("clock", "chime", 540))
+		self.assertEqual(state["timeslot"].content.data, { "text": "dong" })
+		self.assertIn("error", state)
+		self.assertIsNone(scheduler._timer_task_state(fire_ts + timedelta(minutes=5), tick))
+		self.assertIsNone(scheduler.timer_task_state)
+		# schedule reload re-arms from the new snapshot
+		scheduler.snapshot = ScheduleSnapshot(MasterSchedule("default", []), [], [], [])
+		scheduler._start_timer_tasks()
+		self.assertEqual(scheduler.timer_tasks.next_fire(), {})
+		timer = scheduler.timer
+		scheduler.quitMsg(QuitMessage())
+		self.assertIsNone(scheduler.timer_tasks)
+		with self.assertRaises(RuntimeError):
+			timer.create_timer(timedelta(seconds=1), None, ExecuteMessage())
 
 if __name__ == "__main__":
 	unittest.main()
\ No newline at end of file
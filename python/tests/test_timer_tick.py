@@ -4,7 +4,7 @@ import time
 import logging
 
 from ..task.message_router import MessageRouter, Route
-from ..task.timer_tick import BasicTimer, TimerTick, TickMessage
+from ..task.timer_tick import BasicTimer, NextWakeup, TickGap, TimerTick, TickMessage
 from ..task.basic_task import BasicTask
 from ..task.messages import QuitMessage
 
@@ -46,6 +46,12 @@ class RecordingTask(BasicTask):
 			self.ticks.append((msg.tick_ts, msg.tick_number))
 		time.sleep(0.06)
 
+class RecordingSink:
+	def __init__(self):
+		self.ticks = []
+	def send(self, msg):
+		self.ticks.append(msg)
+
 class TestTimerTick(unittest.TestCase):
 	#@unittest.skip("Skipping timer tick test to avoid timing issues in CI")
 	def test_tick_messages_sent_to_tasks(self):
@@ -106,5 +112,86 @@ class TestTimerTick(unittest.TestCase):
 		self.assertEqual(len(task1.ticks), 1440, "Task 1 should have received 1440 messages")
 		self.assertEqual(len(task2.ticks), 1440, "Task 2 should have received 1440 messages")
 
+class TestTickEngine(unittest.TestCase):
+	def create_timer(self, **kwargs):
+		timer = TimerTick(MessageRouter(), interval=60, **kwargs)
+		timer.next_tick_ts = datetime(2025, 1, 1, 12, 0)
+		return timer
+	def test_on_time(self):
+		timer = self.create_timer()
+		self.assertEqual(timer._collect(datetime(2025, 1, 1, 11, 59, 59, 900000)), [])
+		ticks = timer._collect(datetime(2025, 1, 1, 12, 0, 0, 20000))
+		self.assertEqual(len(ticks), 1)
+		# stamped with the boundary, not the (late) wake-up time
+		self.assertEqual(ticks[0].tick_ts, datetime(2025, 1, 1, 12, 0))
+		self.assertEqual(timer.next_tick_ts, datetime(2025, 1, 1, 12, 1))
+		self.assertAlmostEqual(timer.stats()["jitter_max_ms"], 20)
+	def test_gap(self):
+		timer = self.create_timer()
+		ticks = timer._collect(datetime(2025, 1, 1, 12, 10, 30))
+		self.assertEqual(len(ticks), 1)
+		self.assertIsInstance(ticks[0], TickGap)
+		self.assertEqual(ticks[0].missed, 10)
+		self.assertEqual(ticks[0].gap_start, datetime(2025, 1, 1, 12, 0))
+		self.assertEqual(ticks[0].tick_ts, datetime(2025, 1, 1, 12, 10))
+		self.assertEqual(timer.next_tick_ts, datetime(2025, 1, 1, 12, 11))
+		self.assertEqual(timer.stats()["missed_ticks"], 10)
+	def test_catch_up(self):
+		timer = self.create_timer(catch_up=True, max_catch_up=5)
+		ticks = timer._collect(datetime(2025, 1, 1, 12, 2, 1))
+		self.assertEqual([tx.tick_ts.minute for tx in ticks], [0, 1, 2])
+		self.assertEqual([tx.catch_up for tx in ticks], [True, True, False])
+		self.assertEqual([tx.tick_number for tx in ticks], [0, 1, 2])
+		# too far behind: one gap instead of a burst
+		ticks = timer._collect(datetime(2025, 1, 1, 12, 30))
+		self.assertEqual(len(ticks), 1)
+		self.assertIsInstance(ticks[0], TickGap)
+	def test_wakeup_hint(self):
+		timer = self.create_timer(adaptive=True, max_idle=4 * 3600)
+		self.assertEqual(timer._wakeup_target(), datetime(2025, 1, 1, 12, 0))
+		timer.send(NextWakeup(datetime(2025, 1, 1, 14, 30, 10)))
+		# first boundary at or after the hint
+		self.assertEqual(timer._wakeup_target(), datetime(2025, 1, 1, 14, 31))
+		timer.send(NextWakeup(datetime(2025, 1, 2)))
+		self.assertEqual(timer._wakeup_target(), datetime(2025, 1, 1, 16, 0))
+		timer.send(NextWakeup(None))
+		self.assertEqual(timer._wakeup_target(), datetime(2025, 1, 1, 12, 0))
+		passive = self.create_timer()
+		passive.send(NextWakeup(datetime(2025, 1, 1, 14, 30)))
+		self.assertEqual(passive._wakeup_target(), datetime(2025, 1, 1, 12, 0))
+	def test_skip_until(self):
+		timer = self.create_timer(adaptive=True)
+		timer._skip_until(datetime(2025, 1, 1, 12, 3, 20))
+		self.assertEqual(timer.next_tick_ts, datetime(2025, 1, 1, 12, 4))
+		self.assertEqual(timer.stats()["skipped_ticks"], 4)
+		timer._skip_until(datetime(2025, 1, 1, 12, 4))
+		self.assertEqual(timer.stats()["skipped_ticks"], 4)
+		self.assertEqual(timer._collect(datetime(2025, 1, 1, 12, 4, 1))[0].tick_ts, datetime(2025, 1, 1, 12, 4))
+		self.assertEqual(timer.stats()["missed_ticks"], 0)
+	def test_hint_cleared_while_sleeping(self):
+		sink = RecordingSink()
+		router = MessageRouter()
+		router.addRoute(Route("tick", [sink]))
+		timer = TimerTick(router, interval=0.2, align_to_minute=False, adaptive=True, report_interval=0)
+		timer.send(NextWakeup(datetime.now() + timedelta(seconds=5)))
+		timer.start()
+		try:
+			# several boundaries pass while sleeping toward the hint, then the hint is cleared (e.g. a schedule update)
+			time.sleep(1.0)
+			timer.send(NextWakeup(None))
+			time.sleep(0.5)
+		finally:
+			timer.stop()
+			timer.join()
+		ticks = sink.ticks[1:]
+		self.assertGreaterEqual(len(ticks), 1)
+		self.assertFalse(any(isinstance(tx, TickGap) for tx in ticks))
+		self.assertEqual(timer.stats()["missed_ticks"], 0)
+		self.assertGreaterEqual(timer.stats()["skipped_ticks"], 3)
+	def test_clock_stepped_back(self):
+		timer = self.create_timer()
+		self.assertEqual(timer._collect(datetime(2025, 1, 1, 11, 0, 30)), [])
+		self.assertEqual(timer.next_tick_ts, datetime(2025, 1, 1, 11, 1))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
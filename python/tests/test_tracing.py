@@ -0,0 +1,64 @@
+import threading
+import unittest
+
+from ..task.active_plugin import ActivePlugin
+from ..task.message_router import MessageRouter, Route
+from ..task.messages import BasicMessage, ExecuteMessage, FutureCompleted, MessageSink
+from ..task.tracing import TRACER, Tracer, activate, current_trace
+
+class CompletionSink(MessageSink):
+	def __init__(self):
+		self.received:list[BasicMessage] = []
+		self.event = threading.Event()
+	def send(self, msg: BasicMessage):
+		self.received.append(msg)
+		if isinstance(msg, FutureCompleted):
+			self.event.set()
+
+class TestTracing(unittest.TestCase):
+	def test_spans_and_snapshot(self):
+		tracer = Tracer(capacity=8)
+		trace_id = tracer.begin("tick")
+		with activate(trace_id):
+			with tracer.span("schedule"):
+				pass
+			with tracer.span("panel"):
+				pass
+		tracer.complete(trace_id)
+		# untraced work records nothing
+		with tracer.span("schedule"):
+			pass
+		snapshot = tracer.snapshot()
+		self.assertEqual(len(snapshot), 1)
+		self.assertEqual(snapshot[0]["trace_id"], trace_id)
+		self.assertEqual([sx["stage"] for sx in snapshot[0]["spans"]], ["tick:end-to-end", "schedule", "panel"])
+		for _ in range(20):
+			with tracer.span("x", trace_id):
+				pass
+		self.assertEqual(len(tracer.spans), 8)
+
+	def test_propagation(self):
+		trace_id = TRACER.begin("test")
+		self.assertIsNone(ExecuteMessage().trace_id)
+		router = MessageRouter()
+		sink = CompletionSink()
+		router.addRoute(Route("test", [sink]))
+		with activate(trace_id):
+			self.assertEqual(current_trace(), trace_id)
+			msg = ExecuteMessage()
+			router.send("test", msg)
+			plugin = ActivePlugin("plugin", sink)
+			plugin.future("token", lambda: 42)
+		self.assertIsNone(current_trace())
+		self.assertEqual(msg.trace_id, trace_id)
+		self.assertTrue(sink.event.wait(timeout=2))
+		plugin.shutdown()
+		completed = sink.received[-1]
+		# created on the worker thread, still part of the trace
+		self.assertEqual(completed.trace_id, trace_id)
+		stages = [sx[1] for sx in list(TRACER.spans) if sx[0] == trace_id]
+		self.assertIn("route:test", stages)
+		self.assertIn("plugin.future", stages)
+
+if __name__ == "__main__":
+	unittest.main()